@@ -14,7 +14,15 @@
 import sys
 
 from .main import main
+from .common import batch_manager
+from .common import sweep_manager
 
 
 if __name__ == '__main__':
+    # NOTE the batch mode and the parameter sweep are selected by their
+    # sub-command, the rest of the command line is parsed by their own parser
+    if sys.argv[1:2] == ['batch']:
+        sys.exit(batch_manager.main(sys.argv[2:]))
+    if sys.argv[1:2] == ['sweep']:
+        sys.exit(sweep_manager.main(sys.argv[2:]))
     sys.exit(main(sys.argv))
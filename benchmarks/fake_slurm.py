@@ -0,0 +1,273 @@
+# ------------------------------------------------------------------------------
+#  Copyright 2020 Forschungszentrum Jülich GmbH and Aix-Marseille Université
+# "Licensed to the Apache Software Foundation (ASF) under one or more contributor
+#  license agreements; and to You under the Apache License, Version 2.0. "
+#
+# Forschungszentrum Jülich
+#  Institute: Institute for Advanced Simulation (IAS)
+#    Section: Jülich Supercomputing Centre (JSC)
+#   Division: High Performance Computing in Neuroscience
+# Laboratory: Simulation Laboratory Neuroscience
+#       Team: Multi-scale Simulation and Design
+#
+# ------------------------------------------------------------------------------
+"""
+Simulated SLURM allocation on one Linux machine, to exercise the HPC mode
+of the launcher (and to benchmark it) without a real allocation.
+
+The CPUs of this machine are split into fake nodes, the SLURM_* variables
+of the allocation are set and an 'srun' shim is put first in PATH. The shim
+honors --nodes, --nodelist, --ntasks and --cpus-per-task by running the
+tasks locally, each one pinned to CPUs of its fake node.
+
+NOTE the fake hostnames do not resolve, the tasks run and communicate on
+this machine.
+
+Usage:
+    python3 benchmarks/fake_slurm.py [--nodes 4] [--cpus-per-node 2]
+                                     [--prefix fakenode] -- <command> [args]
+e.g.
+    python3 benchmarks/fake_slurm.py --nodes 2 -- python3 main.py --global-settings ...
+"""
+import os
+import sys
+import json
+import stat
+import signal
+import pathlib
+import argparse
+import tempfile
+import threading
+import subprocess
+
+# adding the launcher root directory into the searching modules/packages path
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from common.utils import hostlist_utils  # noqa: E402
+
+# CPUs of each fake node as JSON, i.e. {hostname: [cpu, ...]}
+FAKE_SLURM_CPUS_VARIABLE = 'CO_SIM_FAKE_SLURM_CPUS'
+
+# srun options taking a separate value
+_SRUN_OPTIONS_WITH_VALUE = {'-N', '--nodes', '-n', '--ntasks', '-c', '--cpus-per-task',
+                            '-w', '--nodelist', '-J', '--job-name', '-o', '--output',
+                            '-e', '--error', '-p', '--partition', '-t', '--time',
+                            '--gres', '--cpu-bind', '--mem', '-A', '--account'}
+
+
+def split_cpus(n_nodes, cpus_per_node=None, cpus=None):
+    """
+    splits the CPUs of this process into the fake nodes, the CPUs are
+    shared (round robin) if there are not enough of them.
+
+    Returns
+    ------
+        cpus_of_nodes: list
+            one list of CPUs per node
+    """
+    cpus = sorted(os.sched_getaffinity(0) if cpus is None else cpus)
+    if cpus_per_node is None:
+        cpus_per_node = max(1, len(cpus) // n_nodes)
+    return [[cpus[(node * cpus_per_node + index) % len(cpus)]
+             for index in range(cpus_per_node)]
+            for node in range(n_nodes)]
+
+
+def fake_slurm_environment(n_nodes=2, cpus_per_node=None, prefix='fakenode',
+                           bin_directory=None, job_id=None):
+    """
+    returns the environment variables of a fake allocation of n_nodes,
+    including the PATH where the srun shim is put.
+
+    NOTE the job ID is the PID of this process by default, i.e. each fake
+    allocation has its own ID, and so its own node health cache.
+
+    Returns
+    ------
+        environment: dict
+            to be passed to the launcher e.g. os.environ.update(environment)
+    """
+    hostnames = [f'{prefix}{node:0>3d}' for node in range(n_nodes)]
+    cpus_of_nodes = split_cpus(n_nodes, cpus_per_node)
+    nodelist = hostlist_utils.compress_nodelist(hostnames)
+    cpus_per_node = len(cpus_of_nodes[0])
+    bin_directory = write_srun_shim(bin_directory or tempfile.mkdtemp(prefix='fake_slurm_'))
+    job_id = str(job_id or os.getpid())
+    return {'SLURM_JOB_ID': job_id,
+            'SLURM_JOBID': job_id,
+            'SLURM_NNODES': str(n_nodes),
+            'SLURM_JOB_NUM_NODES': str(n_nodes),
+            'SLURM_NODELIST': nodelist,
+            'SLURM_JOB_NODELIST': nodelist,
+            'SLURM_CPUS_ON_NODE': str(cpus_per_node),
+            'SLURM_JOB_CPUS_PER_NODE': f'{cpus_per_node}(x{n_nodes})',
+            FAKE_SLURM_CPUS_VARIABLE: json.dumps(dict(zip(hostnames, cpus_of_nodes))),
+            'PATH': f'{bin_directory}{os.pathsep}{os.environ.get("PATH", "")}'}
+
+
+def write_srun_shim(bin_directory):
+    """writes the srun executable which runs this module, returns the directory"""
+    os.makedirs(bin_directory, exist_ok=True)
+    srun = os.path.join(bin_directory, 'srun')
+    with open(srun, 'w') as shim:
+        shim.write(f'#!/bin/sh\nexec "{sys.executable}" "{os.path.abspath(__file__)}" srun "$@"\n')
+    os.chmod(srun, os.stat(srun).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return bin_directory
+
+
+def parse_srun_options(argv):
+    """
+    Returns
+    ------
+        (options, command): tuple
+            srun options as a dict (e.g. {'--ntasks': '4'}) and the command
+    """
+    aliases = {'-N': '--nodes', '-n': '--ntasks', '-c': '--cpus-per-task',
+               '-w': '--nodelist', '-l': '--label'}
+    options = {}
+    index = 0
+    while index < len(argv) and argv[index].startswith('-'):
+        name, separator, value = argv[index].partition('=')
+        if not separator and name in _SRUN_OPTIONS_WITH_VALUE and index + 1 < len(argv):
+            index += 1
+            value = argv[index]
+        options[aliases.get(name, name)] = value
+        index += 1
+    return options, argv[index:]
+
+
+def tasks_layout(options, cpus_of_nodes):
+    """
+    distributes the tasks on the nodes (block distribution) and pins each
+    one to --cpus-per-task CPUs of its node.
+
+    Raises ``ValueError`` exception if the nodes are not in the allocation.
+
+    Returns
+    ------
+        tasks: list
+            (hostname, node_id, local_id, cpus) per task
+    """
+    hostnames = list(cpus_of_nodes)
+    if options.get('--nodelist'):
+        nodes = hostlist_utils.expand_nodelist(options['--nodelist'])
+        missing = [hostname for hostname in nodes if hostname not in cpus_of_nodes]
+        if missing:
+            raise ValueError(f'Required node not available: {",".join(missing)}')
+    else:
+        # e.g. --nodes=2-4, the minimum is taken
+        n_nodes = int(options.get('--nodes', '1').split('-')[0])
+        if n_nodes > len(hostnames):
+            raise ValueError(f'{n_nodes} nodes requested, {len(hostnames)} are allocated')
+        nodes = hostnames[:n_nodes]
+    n_tasks = int(options.get('--ntasks', len(nodes)))
+    cpus_per_task = int(options.get('--cpus-per-task', 1))
+    tasks_per_node = -(-n_tasks // len(nodes))
+    tasks = []
+    for task in range(n_tasks):
+        node_id = task // tasks_per_node
+        local_id = task % tasks_per_node
+        node_cpus = cpus_of_nodes[nodes[node_id]]
+        # NOTE the CPUs of the node are shared if it is oversubscribed
+        cpus = {node_cpus[(local_id * cpus_per_task + index) % len(node_cpus)]
+                for index in range(cpus_per_task)}
+        tasks.append((nodes[node_id], node_id, local_id, cpus))
+    return tasks
+
+
+def _forward_output(stream, output, label):
+    """helper function to prefix the output lines of a task as per --label"""
+    for line in iter(stream.readline, b''):
+        output.write(label + line)
+        output.flush()
+    stream.close()
+
+
+def srun(argv):
+    """
+    runs the srun command line locally, returns the highest return code
+    of the tasks as srun does.
+    """
+    options, command = parse_srun_options(argv)
+    if not command:
+        print('srun: fatal: No command given to execute.', file=sys.stderr)
+        return 1
+    try:
+        cpus_of_nodes = json.loads(os.environ[FAKE_SLURM_CPUS_VARIABLE])
+        tasks = tasks_layout(options, cpus_of_nodes)
+    except KeyError:
+        print('srun: error: not within a fake allocation', file=sys.stderr)
+        return 1
+    except ValueError as e:
+        print(f'srun: error: {e}', file=sys.stderr)
+        return 1
+
+    is_labelled = '--label' in options
+    nodes = sorted({hostname for hostname, _, _, _ in tasks})
+    processes = []
+    forwarders = []
+    for task, (hostname, node_id, local_id, cpus) in enumerate(tasks):
+        environment = dict(os.environ,
+                           SLURM_PROCID=str(task), SLURM_LOCALID=str(local_id),
+                           SLURM_NODEID=str(node_id), SLURMD_NODENAME=hostname,
+                           SLURM_NTASKS=str(len(tasks)), SLURM_STEP_NUM_TASKS=str(len(tasks)),
+                           SLURM_STEP_NODELIST=hostlist_utils.compress_nodelist(nodes),
+                           SLURM_CPUS_PER_TASK=options.get('--cpus-per-task', '1'))
+        output = subprocess.PIPE if is_labelled else None
+        try:
+            process = subprocess.Popen(
+                command, env=environment, stdout=output, stderr=output,
+                preexec_fn=lambda cpus=cpus: os.sched_setaffinity(0, cpus))
+        except OSError as e:
+            print(f'srun: error: {hostname}: task {task}: {e}', file=sys.stderr)
+            return 2
+        processes.append(process)
+        if is_labelled:
+            for stream, target in ((process.stdout, sys.stdout.buffer),
+                                   (process.stderr, sys.stderr.buffer)):
+                forwarder = threading.Thread(target=_forward_output,
+                                             args=(stream, target, f'{task}: '.encode()),
+                                             daemon=True)
+                forwarder.start()
+                forwarders.append(forwarder)
+
+    def forward_signal(signal_number, _):
+        for process in processes:
+            if process.poll() is None:
+                process.send_signal(signal_number)
+
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signal_number, forward_signal)
+    returncodes = [process.wait() for process in processes]
+    for forwarder in forwarders:
+        forwarder.join()
+    # NOTE a task killed by a signal is reported as 128+signal as by srun
+    return max(returncode if returncode >= 0 else 128 - returncode
+               for returncode in returncodes)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == 'srun':
+        return srun(argv[1:])
+
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--nodes', type=int, default=2, help='number of fake nodes')
+    parser.add_argument('--cpus-per-node', type=int, default=None,
+                        help='CPUs per fake node, default is an even split of the CPUs')
+    parser.add_argument('--prefix', default='fakenode', help='prefix of the fake hostnames')
+    parser.add_argument('command', nargs=argparse.REMAINDER,
+                        help='command run within the fake allocation')
+    args = parser.parse_args(argv)
+    command = args.command[1:] if args.command[:1] == ['--'] else args.command
+    if not command:
+        parser.error('the command is missing')
+
+    environment = fake_slurm_environment(args.nodes, args.cpus_per_node, args.prefix)
+    print(f'fake allocation: {environment["SLURM_NODELIST"]}, '
+          f'{environment["SLURM_JOB_CPUS_PER_NODE"]} CPUs', file=sys.stderr)
+    return subprocess.call(command, env=dict(os.environ, **environment))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,160 @@
+# ------------------------------------------------------------------------------
+#  Copyright 2020 Forschungszentrum Jülich GmbH and Aix-Marseille Université
+# "Licensed to the Apache Software Foundation (ASF) under one or more contributor
+#  license agreements; and to You under the Apache License, Version 2.0. "
+#
+# Forschungszentrum Jülich
+#  Institute: Institute for Advanced Simulation (IAS)
+#    Section: Jülich Supercomputing Centre (JSC)
+#   Division: High Performance Computing in Neuroscience
+# Laboratory: Simulation Laboratory Neuroscience
+#       Team: Multi-scale Simulation and Design
+#
+# ------------------------------------------------------------------------------
+"""
+Microbenchmark of the spawn latency and throughput of the spawn backends.
+
+The baseline 'spawner' mimics the Spawner: one multiprocessing process
+which in turn runs the action by means of Popen.
+
+Usage:
+    python3 benchmarks/spawn_benchmark.py [--actions 1 10 100 1000 5000]
+                                          [--backends spawner popen posix_spawn forkserver]
+                                          [--window 256] [--ballast-mb 0]
+                                          [--fake-slurm 0]
+"""
+import os
+import sys
+import time
+import pathlib
+import argparse
+import statistics
+import subprocess
+import multiprocessing
+
+# adding the launcher root directory into the searching modules/packages path
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from common import spawn_backends  # noqa: E402
+from benchmarks import fake_slurm  # noqa: E402
+
+ACTION = ['true']
+# the action as deployed on HPC systems, see deployment_settings_hpc
+SRUN_ACTION = ['srun', '--exact', '--nodes=1', '--ntasks=1', '--cpus-per-task=1',
+               '--cpu-bind=none'] + ACTION
+
+
+def _spawner_target(argv):
+    """the Spawner way, Popen from within a multiprocessing process"""
+    sys.exit(subprocess.Popen(argv).wait())
+
+
+class SpawnerBaseline:
+    """mimics the Spawner, i.e. fork of the launcher followed by fork+exec"""
+    name = 'spawner'
+
+    def __init__(self):
+        self.__context = multiprocessing.get_context('fork')
+
+    def spawn(self, argv):
+        process = self.__context.Process(target=_spawner_target, args=(argv,))
+        process.start()
+        return process
+
+    @staticmethod
+    def wait(process):
+        process.join()
+        return process.exitcode
+
+    def close(self):
+        pass
+
+
+class BackendAdapter:
+    """adapts the spawn backends to the interface used by the benchmark"""
+
+    def __init__(self, name):
+        self.name = name
+        self.__backend = spawn_backends.get_spawn_backend(name)
+
+    def spawn(self, argv):
+        return self.__backend.spawn(argv, capture_output=False)
+
+    @staticmethod
+    def wait(spawned_process):
+        return spawned_process.wait()
+
+    def close(self):
+        self.__backend.close()
+
+
+def run_benchmark(backend, n_actions, window, action=ACTION):
+    """
+    spawns n_actions actions keeping at most window of them running.
+
+    Returns
+    ------
+        (latencies, elapsed): tuple
+            spawn latency of each action and the total elapsed time
+    """
+    latencies = []
+    running = []
+    failed = 0
+    start = time.perf_counter()
+    for _ in range(n_actions):
+        if len(running) == window:
+            failed += backend.wait(running.pop(0)) != 0
+        spawn_start = time.perf_counter()
+        running.append(backend.spawn(action))
+        latencies.append(time.perf_counter() - spawn_start)
+    for process in running:
+        failed += backend.wait(process) != 0
+    elapsed = time.perf_counter() - start
+    if failed:
+        print(f'WARNING: {failed} actions failed with {backend.name}', file=sys.stderr)
+    return latencies, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--actions', type=int, nargs='+', default=[1, 10, 100, 1000, 5000],
+                        help='number of actions to be spawned')
+    parser.add_argument('--backends', nargs='+',
+                        default=['spawner'] + list(spawn_backends.spawn_backends),
+                        help='backends to be compared')
+    parser.add_argument('--window', type=int, default=256,
+                        help='maximum number of actions running at the same time')
+    parser.add_argument('--ballast-mb', type=int, default=0,
+                        help='memory allocated by the launcher, to show the cost of '
+                             'copying the page tables of a large launcher process')
+    parser.add_argument('--fake-slurm', type=int, default=0, metavar='NODES',
+                        help='spawn the actions by srun within a fake allocation '
+                             'of NODES nodes, see fake_slurm')
+    args = parser.parse_args(argv)
+
+    action = ACTION
+    if args.fake_slurm:
+        os.environ.update(fake_slurm.fake_slurm_environment(args.fake_slurm))
+        action = SRUN_ACTION
+
+    # NOTE kept alive until the end of the benchmark
+    ballast = bytearray(args.ballast_mb * 1024 * 1024)  # noqa: F841
+
+    print(f'{"backend":<12} {"actions":>8} {"median [ms]":>12} {"p99 [ms]":>10} '
+          f'{"max [ms]":>10} {"actions/s":>10}')
+    for name in args.backends:
+        backend = SpawnerBaseline() if name == 'spawner' else BackendAdapter(name)
+        # warm up e.g. the fork server
+        run_benchmark(backend, 1, args.window, action)
+        for n_actions in args.actions:
+            latencies, elapsed = run_benchmark(backend, n_actions, args.window, action)
+            latencies_ms = sorted(latency * 1000 for latency in latencies)
+            p99 = latencies_ms[min(len(latencies_ms) - 1, int(len(latencies_ms) * 0.99))]
+            print(f'{name:<12} {n_actions:>8} {statistics.median(latencies_ms):>12.3f} '
+                  f'{p99:>10.3f} {latencies_ms[-1]:>10.3f} {n_actions / elapsed:>10.1f}')
+        backend.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
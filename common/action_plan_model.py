@@ -0,0 +1,165 @@
+# ------------------------------------------------------------------------------
+#  Copyright 2020 Forschungszentrum Jülich GmbH and Aix-Marseille Université
+# "Licensed to the Apache Software Foundation (ASF) under one or more contributor
+#  license agreements; and to You under the Apache License, Version 2.0. "
+#
+# Forschungszentrum Jülich
+#  Institute: Institute for Advanced Simulation (IAS)
+#    Section: Jülich Supercomputing Centre (JSC)
+#   Division: High Performance Computing in Neuroscience
+# Laboratory: Simulation Laboratory Neuroscience
+#       Team: Multi-scale Simulation and Design
+#
+# ------------------------------------------------------------------------------
+import sys
+
+
+def _seconds(value):
+    """
+    helper function to read the walltime limit e.g. of <action_timeout>,
+    None if it is not set.
+
+    Raises ``ValueError`` exception if it is not a positive number.
+    """
+    if value is None or str(value).strip() == '':
+        return None
+    seconds = float(value)
+    if not seconds > 0:
+        raise ValueError(f'timeout must be a positive number of seconds: {value}')
+    return seconds
+
+
+class _Record:
+    """read-only record, its fields are set once when it is created"""
+    __slots__ = ()
+
+    def __init__(self, **fields):
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'{type(self).__name__} is read-only')
+
+    def __delattr__(self, name):
+        raise AttributeError(f'{type(self).__name__} is read-only')
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)
+        return f'{type(self).__name__}({fields})'
+
+
+class Action(_Record):
+    """
+        Action of the action plan e.g. <action_006>.
+
+        index is the position of the action in the action plan, popen_args
+        is a tuple (or None if the action has no Popen args) and must be
+        copied before appending anything to it. timeout is the walltime
+        limit in seconds, None if it is not set.
+    """
+    __slots__ = ('index', 'action_xml_id', 'event_index', 'launch_method',
+                 'goal', 'label', 'action_xml', 'popen_args', 'sci_params_xml_file',
+                 'timeout')
+
+
+class Event(_Record):
+    """
+        Event of the action plan e.g. <action_010>, i.e. the barrier of the
+        actions it owns. timeout is the walltime limit of all its actions
+        in seconds, None if it is not set.
+    """
+    __slots__ = ('index', 'event_action_xml_id', 'action_event', 'actions', 'timeout')
+
+
+class ActionPlan:
+    """
+        Compact, read-only model of the action plan, built once from the
+        dictionaries given by the XML managers, with the actions grouped by
+        the events owning them.
+
+        The XML IDs are interned, the actions and events are indexed by
+        their position and by XML ID.
+
+        Raises ``ValueError`` exception if a timeout (<action_timeout>) is
+        not a positive number of seconds.
+
+    Methods:
+    --------
+        action(action_xml_id)
+            returns the action
+        event(event_action_xml_id)
+            returns the event
+    """
+    __slots__ = ('__actions', '__events', '__actions_by_id', '__events_by_id')
+
+    def __init__(self, grouping, action_plan_dict, actions_popen_args_dict,
+                 actions_sci_params_dict):
+        """
+        Parameters
+        ----------
+            grouping: list
+                (event_action_xml_id, action_event, [action_xml_id, ...]) in
+                the order of the action plan
+            action_plan_dict: dict
+                entries of the action plan keyed by XML ID
+            actions_popen_args_dict: dict
+                Popen args keyed by action XML ID
+            actions_sci_params_dict: dict
+                XML PATH+FILENAME of Scientific Parameters keyed by action XML ID
+        """
+        actions = []
+        events = []
+        for event_action_xml_id, action_event, actions_list in grouping:
+            event_actions = []
+            for action_xml_id in actions_list:
+                entry = action_plan_dict[action_xml_id]
+                popen_args = actions_popen_args_dict.get(action_xml_id)
+                action = Action(
+                    index=len(actions),
+                    action_xml_id=sys.intern(action_xml_id),
+                    event_index=len(events),
+                    launch_method=entry.get('action_launch_method'),
+                    goal=entry.get('action_goal'),
+                    label=entry.get('action_label'),
+                    action_xml=entry.get('action_xml'),
+                    popen_args=tuple(popen_args) if popen_args is not None else None,
+                    sci_params_xml_file=actions_sci_params_dict.get(action_xml_id),
+                    timeout=_seconds(entry.get('action_timeout')))
+                actions.append(action)
+                event_actions.append(action)
+            events.append(Event(index=len(events),
+                                event_action_xml_id=sys.intern(event_action_xml_id),
+                                action_event=action_event,
+                                actions=tuple(event_actions),
+                                timeout=_seconds(action_plan_dict[event_action_xml_id].get(
+                                    'action_timeout'))))
+        self.__actions = tuple(actions)
+        self.__events = tuple(events)
+        self.__actions_by_id = {action.action_xml_id: action for action in actions}
+        self.__events_by_id = {event.event_action_xml_id: event for event in events}
+
+    def __len__(self):
+        return len(self.__actions)
+
+    @property
+    def actions(self):
+        """actions in the order of the action plan"""
+        return self.__actions
+
+    @property
+    def events(self):
+        """events in the order of the action plan"""
+        return self.__events
+
+    @property
+    def maximum_number_actions(self):
+        """maximum number of actions owned by one event"""
+        return max((len(event.actions) for event in self.__events), default=0)
+
+    def action(self, action_xml_id):
+        """Raises ``KeyError`` exception if there is no such action"""
+        return self.__actions_by_id[action_xml_id]
+
+    def event(self, event_action_xml_id):
+        """Raises ``KeyError`` exception if there is no such event"""
+        return self.__events_by_id[event_action_xml_id]
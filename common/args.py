@@ -12,6 +12,7 @@
 # Team: Multi-scale Simulation and Design
 # -----------------------------------------------------------------------------
 import argparse
+import glob
 from pathlib import Path
 
 from common.utils.common_utils import strtobool
@@ -40,6 +41,27 @@ def xml_file_exists(path_and_filename):
     else:
         raise argparse.ArgumentTypeError(f'Does not exist: <{path_to_app}>')
 
+
+def file_exists(path_and_filename):
+    """
+    Returns the path to the given file (of any format) if it exists.
+
+    Parameters
+    ----------
+        path_and_filename: str
+            Location and file name
+
+    Returns
+    ------
+        path_to_file: Path
+            Path to the file if it exists.
+            Otherwise, it raises ArgumentTypeError exception.
+    """
+    path_to_file = Path(path_and_filename)
+    if path_to_file.is_file():
+        return path_to_file
+    raise argparse.ArgumentTypeError(f'Does not exist: <{path_to_file}>')
+
 def get_parser():
     '''
     creates and returns an object of ArgumentParser to parse the command line
@@ -94,6 +116,38 @@ def add_CLI_arguments(parser):
         required=True,
     )
 
+    # iv. node-local scratch directory for the outputs of the actions
+    parser.add_argument(
+        '--scratch-dir',
+        '-s',
+        help='(optional) Node-local directory (e.g. $TMPDIR or /dev/shm) where the actions\n'
+             'write their outputs, which are staged out to the results directory.\n'
+             'LOCAL mode only, i.e. the actions run on the launcher node.',
+        metavar='scratch_directory',
+        default=None,
+        required=False,
+    )
+
+    # v. profiling of the launcher and of the Python actions and services
+    parser.add_argument(
+        '--profile',
+        '-p',
+        help='(optional) Profile the launcher and the Python actions and services by means\n'
+             'of cProfile, the profiles are written into the logs directory.',
+        action='store_true',
+        default=False,
+        required=False,
+    )
+
+    # vi. memory profiling (tracemalloc) of the launcher, implies --profile
+    parser.add_argument(
+        '--profile-memory',
+        help='(optional) Trace the memory allocations of the launcher as well.',
+        action='store_true',
+        default=False,
+        required=False,
+    )
+
 
 def get_parsed_CLI_arguments():
     """
@@ -109,4 +163,193 @@ def get_parsed_CLI_arguments():
     # fill ArgumentParser to take CLI arguments for parsing
     add_CLI_arguments(parser)
     # return parsed CLI arguments
-    return parser.parse_args()
\ No newline at end of file
+    return parser.parse_args()
+
+
+def action_plans_from_patterns(patterns):
+    """
+    Expands the given list of action plan XML files and/or glob patterns
+    into the sorted list of (unique) action plan files.
+
+    Parameters
+    ----------
+        patterns: list
+            paths and/or glob patterns e.g. ['plans/*.xml', 'plan_001.xml']
+
+    Returns
+    ------
+        action_plans: list
+            list of Path to the action plan XML files.
+            It raises ArgumentTypeError exception if a pattern does not match
+            any file.
+    """
+    action_plans = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) or [pattern]
+        for match in matches:
+            action_plan = xml_file_exists(match)
+            if action_plan not in action_plans:
+                action_plans.append(action_plan)
+    return action_plans
+
+
+def positive_integer(value):
+    """
+    Returns the given value as int if it is a positive integer.
+    Otherwise, it raises ArgumentTypeError exception.
+    """
+    try:
+        integer_value = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'not an integer: <{value}>')
+    if integer_value < 1:
+        raise argparse.ArgumentTypeError(f'must be greater than 0: <{value}>')
+    return integer_value
+
+
+def get_batch_parser():
+    '''
+    creates and returns an object of ArgumentParser to parse the command line
+    of the batch mode into Python data types.
+    '''
+    return argparse.ArgumentParser(
+                    prog='MSM-batch',
+                    usage='%(prog)s --action-plans <path/to/plans/*.xml> [<path/to/plan.xml> ...] '
+                          '--global-settings <path/to/settings.xml> --max-workers <N> (optional)',
+                    description='Launch several co-simulation workflows defined in the XML files '
+                                'specified in --action-plans, sharing the global settings.',
+                    formatter_class=argparse.RawTextHelpFormatter)
+
+
+def add_batch_CLI_arguments(parser):
+    '''
+    Fills ArgumentParser to take the batch mode CLI arguments for parsing.
+
+    Parameters
+    ----------
+        parser: ArgumentParser
+            ArgumentParser object to fill with the program arguments
+    '''
+    # i. paths and/or glob patterns to the co-simulation plan XML files
+    parser.add_argument(
+        '--action-plans',
+        '-a',
+        help='XML files (or glob patterns) defining the Co-Simulations Plans to be executed',
+        metavar='co_simulation_plan.xml',
+        nargs='+',
+        required=True,
+    )
+
+    # ii. path to global-settings XML file
+    parser.add_argument(
+        '--global-settings',
+        '-g',
+        help='XML file defining the common settings for Co-Simulation',
+        metavar='co_simulation_global_settings.xml',
+        type=xml_file_exists,
+        required=True,
+    )
+
+    # iii. number of action plans carried out at the same time
+    parser.add_argument(
+        '--max-workers',
+        '-w',
+        help='(optional) Maximum number of action plans carried out concurrently. Default is 1.',
+        metavar='N',
+        type=positive_integer,
+        default=1,
+        required=False,
+    )
+
+
+def get_parsed_batch_CLI_arguments(argv=None):
+    """
+    Parses the command-line arguments passed to the batch mode of the
+    Modular Science Manager.
+
+    Returns
+    ------
+        parsed_arguments: argparse.Namespace
+            parsed arguments into Python data types, where action_plans is
+            the list of expanded action plan XML files
+    """
+    # create a parser
+    parser = get_batch_parser()
+    # fill ArgumentParser to take CLI arguments for parsing
+    add_batch_CLI_arguments(parser)
+    parsed_arguments = parser.parse_args(argv)
+    try:
+        parsed_arguments.action_plans = \
+            action_plans_from_patterns(parsed_arguments.action_plans)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    # return parsed CLI arguments
+    return parsed_arguments
+
+
+def get_sweep_parser():
+    '''
+    creates and returns an object of ArgumentParser to parse the command line
+    of the parameter sweep into Python data types.
+    '''
+    return argparse.ArgumentParser(
+                    prog='MSM-sweep',
+                    usage='%(prog)s --action-plan <path/to/plan.xml> --global-settings <path/to/settings.xml> '
+                          '--sweep <path/to/sweep.json> --max-workers <N> (optional)',
+                    description='Launch the variants of a co-simulation workflow defined in XML file specified '
+                                'in --action-plan, where the sci-params are swept as specified in --sweep.',
+                    formatter_class=argparse.RawTextHelpFormatter)
+
+
+def get_parsed_sweep_CLI_arguments(argv=None):
+    """
+    Parses the command-line arguments passed to the parameter sweep of the
+    Modular Science Manager.
+
+    Returns
+    ------
+        parsed_arguments: argparse.Namespace
+            parsed arguments into Python data types
+    """
+    # create a parser
+    parser = get_sweep_parser()
+    # i. path to co-simulaiton plan XML file
+    parser.add_argument(
+        '--action-plan',
+        '-a',
+        help='XML file defining the Co-Simulations Plan to be executed',
+        metavar='co_simulation_plan.xml',
+        type=xml_file_exists,
+        required=True,
+    )
+    # ii. path to global-settings XML file
+    parser.add_argument(
+        '--global-settings',
+        '-g',
+        help='XML file defining the common settings for Co-Simulation',
+        metavar='co_simulation_global_settings.xml',
+        type=xml_file_exists,
+        required=True,
+    )
+    # iii. path to the sweep specification JSON file
+    parser.add_argument(
+        '--sweep',
+        '-s',
+        help='JSON file defining the sci-params to be swept',
+        metavar='sweep.json',
+        type=file_exists,
+        required=True,
+    )
+    # iv. number of variants carried out at the same time (locally)
+    parser.add_argument(
+        '--max-workers',
+        '-w',
+        help='(optional) Maximum number of variants carried out concurrently when there is\n'
+             'no SLURM allocation, otherwise it is given by the allocated nodes. Default is 1.',
+        metavar='N',
+        type=positive_integer,
+        default=1,
+        required=False,
+    )
+    # return parsed CLI arguments
+    return parser.parse_args(argv)
\ No newline at end of file
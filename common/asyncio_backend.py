@@ -0,0 +1,331 @@
+# ------------------------------------------------------------------------------
+#  Copyright 2020 Forschungszentrum Jülich GmbH and Aix-Marseille Université
+# "Licensed to the Apache Software Foundation (ASF) under one or more contributor
+#  license agreements; and to You under the Apache License, Version 2.0. "
+#
+# Forschungszentrum Jülich
+#  Institute: Institute for Advanced Simulation (IAS)
+#    Section: Jülich Supercomputing Centre (JSC)
+#   Division: High Performance Computing in Neuroscience
+# Laboratory: Simulation Laboratory Neuroscience
+#       Team: Multi-scale Simulation and Design
+#
+# ------------------------------------------------------------------------------
+import sys
+import time
+import signal
+import asyncio
+import resource
+
+
+# name of the backend, i.e. value of CO_SIM_LAUNCHING_BACKEND
+ASYNCIO = 'asyncio'
+
+SEQUENTIAL = 'SEQUENTIAL'
+CONCURRENT = 'CONCURRENT'
+
+
+class ActionFailed(Exception):
+    """raised within a CONCURRENT event to cancel the rest of its actions"""
+
+    def __init__(self, action_xml_id, returncode):
+        super().__init__(f'<{action_xml_id}> finished with return code {returncode}')
+        self.action_xml_id = action_xml_id
+        self.returncode = returncode
+
+
+def default_max_concurrent_actions():
+    """each running action holds two pipes, leave room for the rest"""
+    soft_limit, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    return max(1, min(4096, (soft_limit - 64) // 4))
+
+
+class AsyncioLaunchingBackend:
+    """
+        Carries out the launching strategy from within the Launching Manager
+        process by means of asyncio subprocesses, i.e. without the spawner
+        processes and the multiprocessing queues.
+
+        The actions of a CONCURRENT event run as tasks of one TaskGroup, so
+        that a failing action (or a stop request) cancels the rest of them,
+        and the cancelled actions are terminated (SIGTERM, then SIGKILL
+        after ``grace_period`` seconds).
+
+        The walltime limits of the actions and events are enforced by the
+        timers of the event loop, an action (or the running actions of an
+        event) exceeding it is terminated the same way.
+
+        The actions of a CONCURRENT event must all run at once, hence an event
+        owning more actions than ``max_concurrent_actions`` fails up front
+        rather than being carried out in batches.
+
+    Methods:
+    --------
+        run(events)
+            carries out the events, returns the return codes of the actions
+        terminate(action_xml_id)
+            terminates the running action, thread-safe
+        stop()
+            cancels the running event, thread-safe
+    """
+
+    def __init__(self, logger, max_concurrent_actions=None,
+                 grace_period=5.0, on_state=None, on_output=None, before_spawn=None):
+        if sys.version_info < (3, 11):
+            raise RuntimeError('the asyncio launching backend requires Python 3.11+')
+        self.__logger = logger
+        self.__max_concurrent_actions = max_concurrent_actions or default_max_concurrent_actions()
+        # seconds per action (and event) XML ID, missing means no timeout
+        self.__timeouts = {}
+        self.__event_timeouts = {}
+        self.__grace_period = grace_period
+        # called as on_state(action_xml_id, phase, pid=None, exit_code=None),
+        # where phase is 'RUNNING', 'FINISHED' or 'FAILED'
+        self.__on_state = on_state or (lambda *args, **kwargs: None)
+        # called as on_output(action_xml_id, stream_name, chunk)
+        self.__on_output = on_output
+        # blocking callable e.g. the launch throttle, called before each spawn
+        self.__before_spawn = before_spawn
+        self.__loop = None
+        self.__main_task = None
+        self.__returncodes = {}
+        # running processes keyed by action XML ID, and the tasks
+        # terminating them on request
+        self.__processes = {}
+        self.__terminating_tasks = set()
+        # actions terminated due to a timeout, and the cancelled ones
+        self.__timed_out = set()
+        self.__cancelled = set()
+        self.__spawn_latencies = []
+        # seconds from the start of each CONCURRENT event until all its
+        # actions are running
+        self.__times_to_all_running = {}
+
+    @property
+    def spawn_latencies(self):
+        return list(self.__spawn_latencies)
+
+    @property
+    def timed_out(self):
+        """actions terminated due to their timeout or the one of their event"""
+        return set(self.__timed_out)
+
+    @property
+    def times_to_all_running(self):
+        """seconds until all the actions are running, keyed by CONCURRENT event"""
+        return dict(self.__times_to_all_running)
+
+    async def __read_stream(self, action_xml_id, stream, stream_name):
+        """helper function to read the output of the action chunk by chunk"""
+        while True:
+            chunk = await stream.read(65536)
+            if not chunk:
+                return
+            if self.__on_output is not None:
+                self.__on_output(action_xml_id, stream_name, chunk)
+
+    async def __terminate(self, process):
+        """helper function to terminate the process, then to kill it"""
+        if process.returncode is not None:
+            return
+        try:
+            process.send_signal(signal.SIGTERM)
+            await asyncio.wait_for(process.wait(), timeout=self.__grace_period)
+        except ProcessLookupError:
+            pass
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+
+    def __count_running(self, event_clock):
+        """helper function to account an action of a CONCURRENT event as running"""
+        event_clock['pending'] -= 1
+        if event_clock['pending'] == 0:
+            time_to_all_running = time.perf_counter() - event_clock['start']
+            self.__times_to_all_running[event_clock['event_action_xml_id']] = time_to_all_running
+            self.__logger.info(f"all the actions owned by the event "
+                               f"<{event_clock['event_action_xml_id']}> are running, "
+                               f"time to all running: {time_to_all_running:.6f}s")
+
+    async def __perform_action(self, action_xml_id, argv, raise_on_failure,
+                               event_clock=None):
+        """
+        helper function to carry out one action, event_clock is given for
+        the actions of a CONCURRENT event.
+
+        Returns
+        ------
+            returncode: int
+        """
+        if self.__before_spawn is not None:
+            await self.__loop.run_in_executor(None, self.__before_spawn, action_xml_id)
+        spawn_start = time.perf_counter()
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *argv, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+        except OSError as e:
+            self.__logger.error(f'<{action_xml_id}> could not be spawned: {e}')
+            self.__returncodes[action_xml_id] = None
+            self.__on_state(action_xml_id, 'FAILED')
+            if raise_on_failure:
+                raise ActionFailed(action_xml_id, None)
+            return None
+        self.__spawn_latencies.append(time.perf_counter() - spawn_start)
+        self.__logger.debug(f'<{action_xml_id}> is spawned, PID={process.pid}')
+        self.__on_state(action_xml_id, 'RUNNING', pid=process.pid)
+        if event_clock is not None:
+            self.__count_running(event_clock)
+        self.__processes[action_xml_id] = process
+        try:
+            async with asyncio.timeout(self.__timeouts.get(action_xml_id)):
+                await asyncio.gather(
+                    self.__read_stream(action_xml_id, process.stdout, 'stdout'),
+                    self.__read_stream(action_xml_id, process.stderr, 'stderr'))
+                returncode = await process.wait()
+        except TimeoutError:
+            self.__logger.error(f'<{action_xml_id}> timed out after '
+                                f'{self.__timeouts[action_xml_id]}s')
+            self.__timed_out.add(action_xml_id)
+            await self.__terminate(process)
+            returncode = process.returncode
+        except asyncio.CancelledError:
+            # e.g. a sibling action failed, the event timed out or a stop
+            # was requested
+            self.__logger.info(f'<{action_xml_id}> is cancelled, terminating it')
+            self.__cancelled.add(action_xml_id)
+            await asyncio.shield(self.__terminate(process))
+            self.__returncodes[action_xml_id] = process.returncode
+            self.__on_state(action_xml_id, 'FAILED', exit_code=process.returncode)
+            raise
+        finally:
+            self.__processes.pop(action_xml_id, None)
+        self.__returncodes[action_xml_id] = returncode
+        self.__logger.info(f'<{action_xml_id}> finished, return code: {returncode}')
+        self.__on_state(action_xml_id, 'FINISHED' if returncode == 0 else 'FAILED',
+                        exit_code=returncode)
+        if returncode != 0 and raise_on_failure:
+            raise ActionFailed(action_xml_id, returncode)
+        return returncode
+
+    async def __perform_event(self, event_action_xml_id, launch_method, actions):
+        """
+        helper function to carry out the actions owned by an event within
+        its timeout, the running actions are terminated once it is exceeded.
+        """
+        timeout = self.__event_timeouts.get(event_action_xml_id)
+        try:
+            async with asyncio.timeout(timeout):
+                return await self.__perform_event_actions(event_action_xml_id, launch_method,
+                                                          actions)
+        except TimeoutError:
+            self.__logger.error(f'event <{event_action_xml_id}> timed out after {timeout}s')
+            self.__timed_out.update(action_xml_id for action_xml_id, _ in actions
+                                    if action_xml_id in self.__cancelled)
+            return False
+
+    async def __perform_event_actions(self, event_action_xml_id, launch_method, actions):
+        """helper function to carry out the actions owned by an event"""
+        self.__logger.info(f'{launch_method} processing of actions owned by the '
+                           f'event <{event_action_xml_id}>')
+        if launch_method == SEQUENTIAL:
+            for action_xml_id, argv in actions:
+                await self.__perform_action(action_xml_id, argv, raise_on_failure=False)
+            return True
+        if len(actions) > self.__max_concurrent_actions:
+            self.__logger.error(f'event <{event_action_xml_id}> owns {len(actions)} '
+                                f'concurrent actions, more than the maximum of '
+                                f'{self.__max_concurrent_actions}')
+            for action_xml_id, _ in actions:
+                self.__returncodes[action_xml_id] = None
+                self.__on_state(action_xml_id, 'FAILED')
+            return False
+        event_clock = {'event_action_xml_id': event_action_xml_id,
+                       'start': time.perf_counter(),
+                       'pending': len(actions)}
+        try:
+            async with asyncio.TaskGroup() as task_group:
+                for action_xml_id, argv in actions:
+                    task_group.create_task(
+                        self.__perform_action(action_xml_id, argv, raise_on_failure=True,
+                                              event_clock=event_clock),
+                        name=action_xml_id)
+        except ExceptionGroup as exception_group:
+            for exception in exception_group.exceptions:
+                self.__logger.error(f'event <{event_action_xml_id}>: {exception}')
+            return False
+        return True
+
+    async def __perform_events(self, events):
+        for event_action_xml_id, launch_method, actions in events:
+            if not await self.__perform_event(event_action_xml_id, launch_method, actions):
+                return False
+        return True
+
+    def run(self, events, timeouts=None, event_timeouts=None):
+        """
+        carries out the events in order.
+
+        Parameters
+        ----------
+            events: list
+                (event_action_xml_id, SEQUENTIAL|CONCURRENT, [(action_xml_id, argv), ...])
+            timeouts: dict
+                seconds keyed by action XML ID, missing means no timeout
+            event_timeouts: dict
+                seconds keyed by event XML ID, missing means no timeout
+
+        Returns
+        ------
+            (is_completed, returncodes): tuple
+                whether all the events were carried out, and the return code
+                of each action (None if it could not be spawned)
+        """
+        self.__returncodes = {}
+        self.__timeouts = timeouts or {}
+        self.__event_timeouts = event_timeouts or {}
+        self.__timed_out = set()
+        self.__cancelled = set()
+        self.__times_to_all_running = {}
+        self.__loop = asyncio.new_event_loop()
+        self.__main_task = self.__loop.create_task(self.__perform_events(events))
+        is_completed = False
+        try:
+            is_completed = self.__loop.run_until_complete(self.__main_task)
+        except asyncio.CancelledError:
+            self.__logger.critical('the action plan is stopped')
+        except KeyboardInterrupt:
+            self.__logger.critical('Caught KeyboardInterrupt! Terminating the actions')
+            # let the actions be terminated before leaving
+            self.__main_task.cancel()
+            try:
+                self.__loop.run_until_complete(self.__main_task)
+            except asyncio.CancelledError:
+                pass
+        finally:
+            self.__main_task = None
+            self.__loop.run_until_complete(self.__loop.shutdown_asyncgens())
+            self.__loop.close()
+            self.__loop = None
+        return is_completed, dict(self.__returncodes)
+
+    def __terminate_action(self, action_xml_id):
+        process = self.__processes.get(action_xml_id)
+        if process is None:
+            return
+        task = self.__loop.create_task(self.__terminate(process))
+        # NOTE a reference is kept until it is done
+        self.__terminating_tasks.add(task)
+        task.add_done_callback(self.__terminating_tasks.discard)
+
+    def terminate(self, action_xml_id):
+        """
+        terminates the running action (SIGTERM, then SIGKILL), it then fails
+        as any other action, it could be called from any thread
+        """
+        if self.__loop is not None:
+            self.__loop.call_soon_threadsafe(self.__terminate_action, action_xml_id)
+
+    def stop(self):
+        """cancels the running events, it could be called from any thread"""
+        if self.__loop is not None and self.__main_task is not None:
+            self.__loop.call_soon_threadsafe(self.__main_task.cancel)
@@ -0,0 +1,245 @@
+# ------------------------------------------------------------------------------
+#  Copyright 2020 Forschungszentrum Jülich GmbH and Aix-Marseille Université
+# "Licensed to the Apache Software Foundation (ASF) under one or more contributor
+#  license agreements; and to You under the Apache License, Version 2.0. "
+#
+# Forschungszentrum Jülich
+#  Institute: Institute for Advanced Simulation (IAS)
+#    Section: Jülich Supercomputing Centre (JSC)
+#   Division: High Performance Computing in Neuroscience
+# Laboratory: Simulation Laboratory Neuroscience
+#       Team: Multi-scale Simulation and Design
+#
+# ------------------------------------------------------------------------------
+import os
+import argparse
+import multiprocessing
+import concurrent.futures
+
+# Co-Simulator imports
+from EBRAINS_Launcher.common import args
+from EBRAINS_Launcher.common.ms_manager import MSManager
+from EBRAINS_Launcher.common.utils import directory_utils
+from EBRAINS_ConfigManager.workflow_configurations_manager.xml_parsers import enums
+from EBRAINS_ConfigManager.global_configurations_manager.xml_parsers import configurations_manager
+
+
+def warm_up_configurations_manager(global_settings):
+    """
+    Instantiates the configurations manager and parses the global settings
+    once, to be shared then by the action plans carried out by the workers.
+
+    Parameters
+    ----------
+        global_settings: Path
+            global settings XML file
+
+    Returns
+    ------
+        (configurations_manager, output_directory, logger_settings): tuple
+    """
+    shared_configurations_manager = configurations_manager.ConfigurationsManager()
+    default_dir = shared_configurations_manager.get_configuration_settings(
+        'output_directory', global_settings)
+    output_directory = default_dir['output_directory']
+    shared_configurations_manager.setup_default_directories(output_directory)
+    logger_settings = shared_configurations_manager.get_configuration_settings(
+        'log_configurations', global_settings)
+    return shared_configurations_manager, output_directory, logger_settings
+
+
+def run_action_plan(job, global_settings, shared_configurations_manager, logger_settings):
+    """
+    Carries out one action plan by means of an MSManager which re-uses the
+    already parsed global settings and configurations manager.
+
+    NOTE it is executed in the worker processes of the batch pool, therefore
+    it must be defined at module level (picklable).
+
+    Parameters
+    ----------
+        job: dict
+            {'action_plan': Path, 'output_directory': str}
+            and optionally
+            {'sci_params_overrides': dict, 'environment': dict}
+
+        global_settings: Path
+            global settings XML file
+
+        shared_configurations_manager: ConfigurationsManager
+            configurations manager warmed up by the batch manager
+
+        logger_settings: dict
+            logging settings already parsed from the global settings
+
+    Returns
+    ------
+        return_code: CoSimulatorReturnCodes
+            the return code of the carried out action plan
+    """
+    # NOTE the workers of the pool are re-used by the next jobs, which must
+    # not inherit the environment of this one
+    saved_environment = os.environ.copy()
+    # e.g. the SLURM_* variables restricting the action plan to a subset of
+    # the allocated nodes
+    os.environ.update(job.get('environment', {}))
+    try:
+        ms_manager_args = argparse.Namespace(action_plan=job['action_plan'],
+                                             global_settings=global_settings,
+                                             interactive=False)
+        ms_manager = MSManager(args=ms_manager_args,
+                               configurations_manager=shared_configurations_manager,
+                               logger_settings=logger_settings,
+                               output_directory=job['output_directory'],
+                               sci_params_overrides=job.get('sci_params_overrides'))
+        # NOTE an exception raised here is re-raised by the future in the batch
+        # manager, where it is logged without bringing the whole batch down
+        return ms_manager.run()
+    finally:
+        os.environ.clear()
+        os.environ.update(saved_environment)
+
+
+class BatchManager:
+    """
+        Class carrying out several Co-Simulation action plans from one
+        (warm) process, where the global settings are parsed only once
+        and the action plans are carried out by a bounded pool of workers.
+
+    Methods:
+    --------
+        run()
+            Entry point of the batch mode, carries out all the action plans
+        get_return_codes()
+            returns the return code of each carried out action plan
+    """
+
+    def __init__(self, action_plans=None, global_settings=None, max_workers=1, argv=None):
+        self.__action_plans = action_plans
+        self.__global_settings = global_settings
+        self.__max_workers = max_workers
+        # command line to be parsed if the action plans are not given,
+        # sys.argv by default
+        self.__argv = argv
+        self.__configurations_manager = None
+        self.__logger_settings = {}
+        self.__logger = None
+        self.__output_directory = None
+        # return codes keyed by action plan XML file
+        self.__return_codes = {}
+
+    def get_return_codes(self):
+        """returns the return code of each carried out action plan"""
+        return self.__return_codes
+
+    def __prepare_jobs(self):
+        """
+        helper function to assign an isolated output directory to each
+        action plan, i.e. <output_directory>/<index>_<action plan name>
+        """
+        jobs = []
+        for index, action_plan in enumerate(self.__action_plans):
+            action_plan_name = os.path.splitext(os.path.basename(action_plan))[0]
+            jobs.append({'action_plan': action_plan,
+                         'output_directory': os.path.join(
+                             self.__output_directory,
+                             f'{index:03d}_{action_plan_name}')})
+        return jobs
+
+    def __submit_jobs(self, executor, jobs):
+        """
+        helper function to submit the jobs to the pool of workers
+
+        Returns
+        ------
+            futures: dict
+                the submitted jobs keyed by their futures
+        """
+        return {executor.submit(run_action_plan,
+                                job,
+                                self.__global_settings,
+                                self.__configurations_manager,
+                                self.__logger_settings): job
+                for job in jobs}
+
+    def run(self):
+        """
+            Entry point of the batch mode
+        :return:
+            OK: all the action plans finished properly
+            LAUNCHER_ERROR: at least one action plan finished with error
+            PARAMETER_ERROR: wrong command-line arguments
+        """
+        ########
+        # STEP 1 - Checking command line parameters
+        ########
+        if self.__action_plans is None or self.__global_settings is None:
+            try:
+                batch_args = args.get_parsed_batch_CLI_arguments(self.__argv)
+            except SystemExit:
+                # argument parser has reported some issue with the arguments
+                return enums.CoSimulatorReturnCodes.PARAMETER_ERROR
+            self.__action_plans = batch_args.action_plans
+            self.__global_settings = batch_args.global_settings
+            self.__max_workers = batch_args.max_workers
+
+        ########
+        # STEP 2 - Setting Up the (shared) Configuration Manager
+        ########
+        self.__configurations_manager, self.__output_directory, self.__logger_settings = \
+            warm_up_configurations_manager(self.__global_settings)
+        self.__logger = self.__configurations_manager.load_log_configurations(
+            name=__name__, log_configurations=self.__logger_settings)
+        self.__logger.info(f'Batch STEP 2 done, {len(self.__action_plans)} action plans '
+                           f'to be carried out by {self.__max_workers} workers')
+
+        ########
+        # STEP 3 - Carrying out the action plans
+        ########
+        jobs = self.__prepare_jobs()
+        # create the output directories of all action plans at once
+        provisioning_report = directory_utils.provision_directories(
+            [job['output_directory'] for job in jobs])
+        self.__logger.info(f'output directories provisioned: {provisioning_report}')
+        # NOTE forked workers inherit the already imported modules, and they
+        # are not daemonic, so that the Launching Manager can still start
+        # its own (spawner) processes
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.__max_workers,
+                mp_context=multiprocessing.get_context('fork')) as executor:
+            futures = self.__submit_jobs(executor, jobs)
+            for future in concurrent.futures.as_completed(futures):
+                job = futures[future]
+                try:
+                    return_code = future.result()
+                except Exception as e:
+                    self.__logger.exception(f'{job["action_plan"]} got the exception: {e}')
+                    return_code = enums.CoSimulatorReturnCodes.NOT_OK
+                self.__return_codes[str(job['action_plan'])] = return_code
+                self.__logger.info(f'{job["action_plan"]} finished with {return_code}, '
+                                   f'output: {job["output_directory"]}')
+
+        ########
+        # STEP 4 - Finishing
+        ########
+        failed_action_plans = [action_plan
+                               for action_plan, return_code in self.__return_codes.items()
+                               if return_code != enums.CoSimulatorReturnCodes.OK]
+        if failed_action_plans:
+            self.__logger.error(f'action plans finished with error: {failed_action_plans}')
+            return enums.CoSimulatorReturnCodes.LAUNCHER_ERROR
+
+        self.__logger.info('END: all action plans finished properly')
+        return enums.CoSimulatorReturnCodes.OK
+
+
+def main(argv=None):
+    """
+    Entry point of the batch mode on the command line, see __main__.py
+
+    Returns
+    ------
+        exit_code: int
+            the value of the CoSimulatorReturnCodes returned by BatchManager.run
+    """
+    return BatchManager(argv=argv).run().value
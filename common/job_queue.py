@@ -0,0 +1,528 @@
+# ------------------------------------------------------------------------------
+#  Copyright 2020 Forschungszentrum Jülich GmbH and Aix-Marseille Université
+# "Licensed to the Apache Software Foundation (ASF) under one or more contributor
+#  license agreements; and to You under the Apache License, Version 2.0. "
+#
+# Forschungszentrum Jülich
+#  Institute: Institute for Advanced Simulation (IAS)
+#    Section: Jülich Supercomputing Centre (JSC)
+#   Division: High Performance Computing in Neuroscience
+# Laboratory: Simulation Laboratory Neuroscience
+#       Team: Multi-scale Simulation and Design
+#
+# ------------------------------------------------------------------------------
+"""
+Job queue behind the app server.
+
+The action plans to be carried out are queued into an SQLite database, i.e.
+the queue outlives the app server, and they are started by priority (then
+first come, first served) as long as the caps allow it: running jobs, running
+jobs per user and nodes of the allocation.
+
+Each job is carried out by an MSManager in its own process, which leads its
+own session, i.e. cancelling the job terminates the Launching Manager and
+everything it started. The job processes are forked by a fork server, a
+single-threaded process, rather than from the (multi-threaded) app server.
+"""
+import os
+import time
+import enum
+import signal
+import sqlite3
+import threading
+import multiprocessing
+import multiprocessing.connection
+
+from EBRAINS_Launcher.common.metrics import MetricsRegistry
+from EBRAINS_Launcher.common.watchdog import Watchdog
+from EBRAINS_Launcher.common.utils import hostlist_utils
+
+
+# environment variables setting up the job queue of the app server
+JOB_QUEUE_DATABASE_VARIABLE = 'CO_SIM_JOB_QUEUE_DB'
+GLOBAL_SETTINGS_VARIABLE = 'CO_SIM_GLOBAL_SETTINGS'
+MAX_RUNNING_JOBS_VARIABLE = 'CO_SIM_MAX_RUNNING_JOBS'
+MAX_RUNNING_JOBS_PER_USER_VARIABLE = 'CO_SIM_MAX_RUNNING_JOBS_PER_USER'
+
+QUEUE_WAIT_BUCKETS = (0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 600.0,
+                      1800.0, 3600.0, 4 * 3600.0, 12 * 3600.0)
+
+
+class JobState(str, enum.Enum):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FINISHED = 'finished'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    action_plan TEXT NOT NULL,
+    user TEXT,
+    priority INTEGER NOT NULL DEFAULT 0,
+    nodes INTEGER NOT NULL DEFAULT 1,
+    state TEXT NOT NULL,
+    submitted_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    server_pid INTEGER,
+    nodelist TEXT,
+    output_directory TEXT,
+    return_code TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_by_state ON jobs (state, priority DESC, job_id);
+"""
+
+
+def _pid_exists(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class JobQueue:
+    """
+        Persistent queue of the jobs, thread-safe.
+
+        The state changes are conditional (e.g. a job is started only if it
+        is still queued), i.e. a job cancelled meanwhile is not started.
+
+        The jobs left running by an app server which is gone are marked
+        as failed once the queue is opened again.
+
+    Methods:
+    --------
+        submit(action_plan, priority=0, nodes=1, user=None)
+            queues the action plan, returns the job ID
+        get(job_id)
+        jobs(state=None, limit=100)
+        queued_jobs()
+            the queued jobs in the order they are to be started
+        cancel_queued(job_id)
+        start(job_id, nodelist, output_directory)
+        finish(job_id, state, return_code=None, error=None)
+        counts()
+            number of jobs per state
+    """
+
+    def __init__(self, database_file):
+        self.__lock = threading.Lock()
+        # NOTE autocommit, each statement is a transaction of its own
+        self.__connection = sqlite3.connect(database_file, isolation_level=None,
+                                            check_same_thread=False, timeout=30.0)
+        self.__connection.row_factory = sqlite3.Row
+        with self.__lock:
+            self.__connection.execute('PRAGMA journal_mode=WAL')
+            self.__connection.executescript(_SCHEMA)
+            for row in self.__connection.execute(
+                    'SELECT job_id, server_pid FROM jobs WHERE state = ?',
+                    (JobState.RUNNING.value,)).fetchall():
+                if row['server_pid'] == os.getpid() or not _pid_exists(row['server_pid']):
+                    self.__connection.execute(
+                        'UPDATE jobs SET state = ?, finished_at = ?, error = ? '
+                        'WHERE job_id = ? AND state = ?',
+                        (JobState.FAILED.value, time.time(),
+                         'interrupted, the app server was stopped',
+                         row['job_id'], JobState.RUNNING.value))
+
+    @staticmethod
+    def __as_dict(row):
+        if row is None:
+            return None
+        job = dict(row)
+        if job['started_at'] is not None:
+            job['queue_wait'] = job['started_at'] - job['submitted_at']
+        return job
+
+    def submit(self, action_plan, priority=0, nodes=1, user=None):
+        """
+        Returns
+        ------
+            job_id: int
+        """
+        with self.__lock:
+            cursor = self.__connection.execute(
+                'INSERT INTO jobs (action_plan, user, priority, nodes, state, submitted_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (str(action_plan), user, int(priority), int(nodes),
+                 JobState.QUEUED.value, time.time()))
+            return cursor.lastrowid
+
+    def get(self, job_id):
+        """returns the job as a dict, None if there is no such job"""
+        with self.__lock:
+            return self.__as_dict(self.__connection.execute(
+                'SELECT * FROM jobs WHERE job_id = ?', (job_id,)).fetchone())
+
+    def jobs(self, state=None, limit=100):
+        """returns the latest jobs, optionally only the ones in the given state"""
+        with self.__lock:
+            if state is None:
+                rows = self.__connection.execute(
+                    'SELECT * FROM jobs ORDER BY job_id DESC LIMIT ?', (limit,))
+            else:
+                rows = self.__connection.execute(
+                    'SELECT * FROM jobs WHERE state = ? ORDER BY job_id DESC LIMIT ?',
+                    (JobState(state).value, limit))
+            return [self.__as_dict(row) for row in rows.fetchall()]
+
+    def queued_jobs(self):
+        with self.__lock:
+            return [self.__as_dict(row) for row in self.__connection.execute(
+                'SELECT * FROM jobs WHERE state = ? ORDER BY priority DESC, job_id',
+                (JobState.QUEUED.value,)).fetchall()]
+
+    def __transition(self, job_id, from_state, assignments, values):
+        """helper function to change the state, returns whether the job was in from_state"""
+        with self.__lock:
+            cursor = self.__connection.execute(
+                f'UPDATE jobs SET {assignments} WHERE job_id = ? AND state = ?',
+                (*values, job_id, from_state.value))
+            return cursor.rowcount == 1
+
+    def cancel_queued(self, job_id):
+        """returns whether the job is cancelled, i.e. it was still queued"""
+        return self.__transition(job_id, JobState.QUEUED,
+                                 'state = ?, finished_at = ?',
+                                 (JobState.CANCELLED.value, time.time()))
+
+    def start(self, job_id, nodelist, output_directory):
+        """returns whether the job is started, i.e. it was still queued"""
+        return self.__transition(
+            job_id, JobState.QUEUED,
+            'state = ?, started_at = ?, server_pid = ?, nodelist = ?, output_directory = ?',
+            (JobState.RUNNING.value, time.time(), os.getpid(), nodelist, output_directory))
+
+    def finish(self, job_id, state, return_code=None, error=None):
+        return self.__transition(job_id, JobState.RUNNING,
+                                 'state = ?, finished_at = ?, return_code = ?, error = ?',
+                                 (JobState(state).value, time.time(), return_code, error))
+
+    def counts(self):
+        with self.__lock:
+            counts = {state: 0 for state in JobState}
+            for row in self.__connection.execute(
+                    'SELECT state, COUNT(*) FROM jobs GROUP BY state').fetchall():
+                counts[JobState(row[0])] = row[1]
+            return counts
+
+    def close(self):
+        with self.__lock:
+            self.__connection.close()
+
+
+def _carry_out_job(job, global_settings, shared_configurations_manager,
+                   logger_settings, connection):
+    """
+    Carries out the job in its own process, sends back the name of the
+    return code and whether it is OK.
+    """
+    # NOTE its own session, the job is cancelled by signalling the session
+    os.setsid()
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    from EBRAINS_Launcher.common.batch_manager import run_action_plan
+    from EBRAINS_ConfigManager.workflow_configurations_manager.xml_parsers import enums
+    try:
+        return_code = run_action_plan(job, global_settings,
+                                      shared_configurations_manager, logger_settings)
+        connection.send((getattr(return_code, 'name', str(return_code)),
+                         return_code == enums.CoSimulatorReturnCodes.OK, None))
+    except Exception as e:
+        connection.send((enums.CoSimulatorReturnCodes.NOT_OK.name, False, repr(e)))
+    finally:
+        connection.close()
+
+
+class JobScheduler:
+    """
+        Starts the queued jobs as long as the caps allow it, from one thread
+        which wakes up when a job is submitted, cancelled or finished.
+
+        NOTE there is no backfilling, the next job (by priority) which does
+        not fit holds the ones behind it, i.e. a job asking for many nodes
+        is not starved by the smaller ones.
+
+        Within a SLURM allocation, each job is restricted to its own nodes
+        (SLURM_NODELIST and SLURM_NNODES), otherwise ``max_nodes`` is only
+        a count.
+
+        The global settings are parsed once, by the scheduler, and passed
+        down to the job processes (see batch_manager). The job processes are
+        forked by the multiprocessing fork server, where the Co-Simulation
+        packages are preloaded, since forking the app server itself (i.e.
+        its threads holding locks) could deadlock the jobs.
+
+        The jobs without user share one cap, as if it were one user.
+
+    Methods:
+    --------
+        start()
+        submit(action_plan, priority=0, nodes=1, user=None)
+            returns the job ID
+        cancel(job_id)
+            returns the job, None if there is no such job
+        get_metrics()
+            returns the metrics in the Prometheus text format
+        stop()
+    """
+
+    def __init__(self, job_queue, global_settings, logger, max_running_jobs=1,
+                 max_running_jobs_per_user=None, max_nodes=None, grace_period=10.0):
+        self.__job_queue = job_queue
+        self.__global_settings = global_settings
+        self.__logger = logger
+        self.__max_running_jobs = max_running_jobs
+        self.__max_running_jobs_per_user = max_running_jobs_per_user
+        self.__hostnames = None
+        if 'SLURM_NODELIST' in os.environ:
+            self.__hostnames = hostlist_utils.expand_nodelist(os.environ['SLURM_NODELIST'])
+            max_nodes = len(self.__hostnames) if max_nodes is None \
+                else min(max_nodes, len(self.__hostnames))
+        self.__max_nodes = max_nodes if max_nodes is not None else max_running_jobs
+        self.__free_hostnames = list(self.__hostnames or [])
+        self.__free_nodes = self.__max_nodes
+        # (configurations_manager, output_directory, logger_settings)
+        self.__warmed_up = None
+        self.__context = multiprocessing.get_context('forkserver')
+        # NOTE the missing modules are skipped
+        self.__context.set_forkserver_preload(['EBRAINS_Launcher.common.batch_manager'])
+        # job processes and what they hold, keyed by job ID
+        self.__running = {}
+        self.__cancelled = set()
+        self.__watchdog = Watchdog(logger, grace_period)
+        self.__lock = threading.Lock()
+        self.__wakeup_reader, self.__wakeup_writer = multiprocessing.Pipe(duplex=False)
+        self.__thread = None
+        self.__is_stopped = False
+        self.__metrics_registry = MetricsRegistry()
+        self.__create_metrics()
+
+    def __create_metrics(self):
+        registry = self.__metrics_registry
+        self.__queue_wait = registry.histogram(
+            'cosim_job_queue_wait_seconds', 'time a job waited in the queue before it started',
+            buckets=QUEUE_WAIT_BUCKETS)
+        self.__jobs_total = registry.counter(
+            'cosim_jobs_total', 'jobs done, per final state')
+        registry.gauge('cosim_jobs_queued', 'jobs waiting in the queue',
+                       function=lambda: self.__job_queue.counts()[JobState.QUEUED])
+        registry.gauge('cosim_jobs_running', 'jobs being carried out',
+                       function=lambda: len(self.__running))
+        registry.gauge('cosim_job_nodes_free', 'nodes not used by the running jobs',
+                       function=lambda: self.__free_nodes)
+
+    def get_metrics(self):
+        return self.__metrics_registry.render()
+
+    @property
+    def job_queue(self):
+        return self.__job_queue
+
+    @property
+    def max_nodes(self):
+        return self.__max_nodes
+
+    def start(self):
+        self.__thread = threading.Thread(target=self.__run, name='JobScheduler', daemon=True)
+        self.__thread.start()
+
+    def __wake_up(self):
+        with self.__lock:
+            self.__wakeup_writer.send_bytes(b'')
+
+    def submit(self, action_plan, priority=0, nodes=1, user=None):
+        """
+        Raises ``ValueError`` exception if the job could never be started,
+        i.e. it asks for more nodes than there are.
+
+        Returns
+        ------
+            job_id: int
+        """
+        if not 1 <= int(nodes) <= self.__max_nodes:
+            raise ValueError(f'{nodes} nodes asked for, there are {self.__max_nodes}')
+        job_id = self.__job_queue.submit(action_plan, priority, nodes, user)
+        self.__logger.info(f'job {job_id} is queued: {action_plan}, priority={priority}, '
+                           f'nodes={nodes}, user={user}')
+        self.__wake_up()
+        return job_id
+
+    def cancel(self, job_id):
+        """
+        cancels the job if it is queued, or terminates it if it is running
+        (then killed after the grace period).
+
+        Returns
+        ------
+            job: dict
+                or None if there is no such job
+        """
+        if self.__job_queue.cancel_queued(job_id):
+            self.__logger.info(f'job {job_id} is cancelled')
+            self.__jobs_total.labels(state=JobState.CANCELLED.value).inc()
+            self.__wake_up()
+            return self.__job_queue.get(job_id)
+        with self.__lock:
+            running = self.__running.get(job_id)
+            if running is not None and job_id not in self.__cancelled:
+                self.__cancelled.add(job_id)
+                process = running['process']
+                # NOTE the job process leads its session (see _carry_out_job)
+                running['watch'] = self.__watchdog.terminate(
+                    f'job {job_id}', lambda signal_number: os.killpg(process.pid, signal_number),
+                    'is cancelled')
+        return self.__job_queue.get(job_id)
+
+    def __warm_up(self):
+        """helper function to parse the global settings once, before starting the jobs"""
+        if self.__warmed_up is None:
+            # NOTE imported here, the app server serves the queue even if
+            # the Co-Simulation packages are not installed
+            from EBRAINS_Launcher.common.batch_manager import warm_up_configurations_manager
+            self.__warmed_up = warm_up_configurations_manager(self.__global_settings)
+        return self.__warmed_up
+
+    def __fits(self, job, running_jobs_per_user):
+        """helper function to check the caps"""
+        if len(self.__running) >= self.__max_running_jobs or job['nodes'] > self.__free_nodes:
+            return False
+        return self.__max_running_jobs_per_user is None or \
+            running_jobs_per_user.get(job['user'], 0) < self.__max_running_jobs_per_user
+
+    def __dispatch(self):
+        """helper function to start the queued jobs which fit"""
+        running_jobs_per_user = {}
+        for running in self.__running.values():
+            user = running['job']['user']
+            running_jobs_per_user[user] = running_jobs_per_user.get(user, 0) + 1
+        for job in self.__job_queue.queued_jobs():
+            if not self.__fits(job, running_jobs_per_user):
+                if self.__max_running_jobs_per_user is not None and \
+                        len(self.__running) < self.__max_running_jobs and \
+                        job['nodes'] <= self.__free_nodes:
+                    # held by the cap of its user only, the others may go
+                    continue
+                break
+            try:
+                self.__start_job(job)
+            except Exception as e:
+                self.__logger.exception(f'job {job["job_id"]} could not be started: {e}')
+                continue
+            user = job['user']
+            running_jobs_per_user[user] = running_jobs_per_user.get(user, 0) + 1
+
+    def __start_job(self, job):
+        """helper function to start the process carrying out the job"""
+        configurations_manager, output_directory, logger_settings = self.__warm_up()
+        action_plan_name = os.path.splitext(os.path.basename(job['action_plan']))[0]
+        job_output_directory = os.path.join(output_directory, 'jobs',
+                                            f'{job["job_id"]:06d}_{action_plan_name}')
+        hostnames = []
+        environment = {}
+        if self.__hostnames is not None:
+            hostnames = self.__free_hostnames[:job['nodes']]
+            environment = {'SLURM_NODELIST': hostlist_utils.compress_nodelist(hostnames),
+                           'SLURM_NNODES': str(len(hostnames))}
+        if not self.__job_queue.start(job['job_id'], environment.get('SLURM_NODELIST'),
+                                      job_output_directory):
+            # e.g. cancelled meanwhile
+            return
+        os.makedirs(job_output_directory, exist_ok=True)
+        reader, writer = self.__context.Pipe(duplex=False)
+        process = self.__context.Process(
+            target=_carry_out_job,
+            args=({'action_plan': job['action_plan'],
+                   'output_directory': job_output_directory,
+                   'environment': environment},
+                  self.__global_settings, configurations_manager, logger_settings, writer),
+            name=f'Job-{job["job_id"]}')
+        try:
+            process.start()
+        except OSError as e:
+            self.__job_queue.finish(job['job_id'], JobState.FAILED, error=repr(e))
+            self.__jobs_total.labels(state=JobState.FAILED.value).inc()
+            raise
+        finally:
+            writer.close()
+        del self.__free_hostnames[:len(hostnames)]
+        self.__free_nodes -= job['nodes']
+        with self.__lock:
+            self.__running[job['job_id']] = {'job': job, 'process': process,
+                                              'connection': reader, 'hostnames': hostnames,
+                                              'watch': None}
+        queue_wait = time.time() - job['submitted_at']
+        self.__queue_wait.observe(queue_wait)
+        self.__logger.info(f'job {job["job_id"]} is started after {queue_wait:.1f}s in the '
+                           f'queue, pid={process.pid}, nodes={hostnames or job["nodes"]}, '
+                           f'output: {job_output_directory}')
+
+    def __reap(self, job_id):
+        """helper function to record the job whose process is gone"""
+        with self.__lock:
+            running = self.__running.pop(job_id)
+            is_cancelled = job_id in self.__cancelled
+            self.__cancelled.discard(job_id)
+        if running['watch'] is not None:
+            running['watch'].cancel()
+        running['process'].join()
+        return_code, is_ok, error = None, False, None
+        try:
+            if running['connection'].poll():
+                return_code, is_ok, error = running['connection'].recv()
+        except (EOFError, OSError):
+            pass
+        running['connection'].close()
+        if is_cancelled:
+            state = JobState.CANCELLED
+        elif is_ok:
+            state = JobState.FINISHED
+        else:
+            state = JobState.FAILED
+            if return_code is None:
+                error = f'exit code {running["process"].exitcode}'
+        self.__job_queue.finish(job_id, state, return_code, error)
+        self.__free_hostnames.extend(running['hostnames'])
+        self.__free_nodes += running['job']['nodes']
+        self.__jobs_total.labels(state=state.value).inc()
+        self.__logger.info(f'job {job_id} is {state.value}, return code: {return_code}'
+                           f'{f", error: {error}" if error else ""}')
+
+    def __run(self):
+        while not self.__is_stopped:
+            try:
+                self.__dispatch()
+            except Exception as e:
+                # e.g. the global settings could not be parsed, the queued
+                # jobs are tried again on the next wake up
+                self.__logger.exception(f'jobs could not be dispatched: {e}')
+            sentinels = {running['process'].sentinel: job_id
+                         for job_id, running in list(self.__running.items())}
+            ready = multiprocessing.connection.wait([self.__wakeup_reader, *sentinels])
+            for ready_object in ready:
+                if ready_object is self.__wakeup_reader:
+                    while self.__wakeup_reader.poll():
+                        self.__wakeup_reader.recv_bytes()
+                else:
+                    self.__reap(sentinels[ready_object])
+
+    def stop(self, cancel_running=True):
+        """stops dispatching, the running jobs are cancelled unless told otherwise"""
+        if cancel_running:
+            for job_id in list(self.__running):
+                self.cancel(job_id)
+        self.__is_stopped = True
+        self.__wake_up()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+        for job_id in list(self.__running):
+            self.__reap(job_id)
+        self.__watchdog.stop()
@@ -0,0 +1,360 @@
+# ------------------------------------------------------------------------------
+#  Copyright 2020 Forschungszentrum Jülich GmbH and Aix-Marseille Université
+# "Licensed to the Apache Software Foundation (ASF) under one or more contributor
+#  license agreements; and to You under the Apache License, Version 2.0. "
+#
+# Forschungszentrum Jülich
+#  Institute: Institute for Advanced Simulation (IAS)
+#    Section: Jülich Supercomputing Centre (JSC)
+#   Division: High Performance Computing in Neuroscience
+# Laboratory: Simulation Laboratory Neuroscience
+#       Team: Multi-scale Simulation and Design
+#
+# ------------------------------------------------------------------------------
+import os
+import re
+import json
+import time
+import queue
+import struct
+import logging
+import threading
+import socketserver
+import logging.handlers
+
+# Co-Simulator imports
+from EBRAINS_Launcher.common.utils import dictionary_utils
+
+
+# handler classes writing on the (shared) file system, which are replaced by
+# a SocketHandler sending the records to the collector
+FILE_HANDLER_CLASSES = ('logging.FileHandler',
+                        'logging.handlers.RotatingFileHandler',
+                        'logging.handlers.TimedRotatingFileHandler',
+                        'logging.handlers.WatchedFileHandler')
+
+# records below this level are sampled out under overload
+SAMPLED_LEVEL = logging.WARNING
+
+_STOP = None  # poison pill for the writer thread
+
+# longest record accepted, a longer one closes the connection
+MAX_RECORD_SIZE = 16 * 2**20
+
+# seconds to wait for the connections still open to be drained once stopping
+DRAIN_TIMEOUT = 5.0
+
+
+class JSONSocketHandler(logging.handlers.SocketHandler):
+    """
+    SocketHandler sending the records JSON-encoded instead of pickled, i.e.
+    4 bytes length followed by the JSON record dictionary.
+
+    NOTE the collector could listen on the cluster network, unpickling what
+    it receives there would let anyone run code as the user.
+
+    The records are tagged with action_xml_id, if given, so that the
+    collector writes them into the file of the action.
+    """
+
+    def __init__(self, host, port, action_xml_id=None):
+        super().__init__(host, port)
+        self.action_xml_id = action_xml_id
+
+    def makePickle(self, record):
+        if record.exc_info:
+            # caches the formatted traceback into record.exc_text
+            self.format(record)
+        record_dict = dict(record.__dict__)
+        record_dict['msg'] = record.getMessage()
+        record_dict['args'] = None
+        record_dict['exc_info'] = None
+        record_dict.pop('message', None)
+        if self.action_xml_id is not None:
+            record_dict['action_xml_id'] = self.action_xml_id
+        payload = json.dumps(record_dict, default=str).encode('utf-8')
+        return struct.pack('>L', len(payload)) + payload
+
+
+def redirect_log_settings(log_settings, host, port):
+    """
+    Returns a copy of the logging settings where the file handlers are
+    replaced by a JSONSocketHandler sending the records to the log collector.
+
+    Parameters
+    ----------
+        log_settings: dict
+            logging settings as per logging.config.dictConfig schema
+
+        host: str
+            address where the log collector is listening
+
+        port: int
+            port where the log collector is listening
+
+    Returns
+    ------
+        redirected_log_settings: dict
+    """
+    updates = {}
+    for name, handler in log_settings.get('handlers', {}).items():
+        if handler.get('class') not in FILE_HANDLER_CLASSES:
+            continue
+        socket_handler = {'class': f'{__name__}.JSONSocketHandler',
+                          'host': host,
+                          'port': port}
+        if 'level' in handler:
+            socket_handler['level'] = handler['level']
+        updates[('handlers', name)] = socket_handler
+    # only the handlers are copied, the rest is shared with log_settings
+    return dictionary_utils.patched_copy(log_settings, updates)
+
+
+def tag_log_settings(log_settings, action_xml_id):
+    """
+    Returns a copy of the (redirected) logging settings where the records
+    sent to the log collector are tagged with the action, i.e. written into
+    the file of the action instead of the one of the logger.
+
+    Parameters
+    ----------
+        log_settings: dict
+            logging settings returned by redirect_log_settings
+
+        action_xml_id: str
+            e.g. action_004
+
+    Returns
+    ------
+        tagged_log_settings: dict
+    """
+    updates = {}
+    for name, handler in log_settings.get('handlers', {}).items():
+        if handler.get('class') != f'{__name__}.JSONSocketHandler':
+            continue
+        updates[('handlers', name)] = {**handler, 'action_xml_id': action_xml_id}
+    return dictionary_utils.patched_copy(log_settings, updates)
+
+
+class _LogRecordStreamHandler(socketserver.StreamRequestHandler):
+    """
+    Receives the records sent by JSONSocketHandler, i.e. 4 bytes length
+    followed by the JSON record dictionary.
+    """
+
+    def setup(self):
+        super().setup()
+        with self.server.connections_lock:
+            self.server.connections.add(threading.current_thread())
+
+    def finish(self):
+        with self.server.connections_lock:
+            self.server.connections.discard(threading.current_thread())
+        super().finish()
+
+    def handle(self):
+        while True:
+            header = self.rfile.read(4)
+            if len(header) < 4:
+                # the sender has closed the connection
+                break
+            length = struct.unpack('>L', header)[0]
+            if length > MAX_RECORD_SIZE:
+                break
+            payload = self.rfile.read(length)
+            if len(payload) < length:
+                break
+            try:
+                record_dict = json.loads(payload)
+            except ValueError:
+                # e.g. not sent by JSONSocketHandler
+                break
+            if not isinstance(record_dict, dict):
+                break
+            record = logging.makeLogRecord(record_dict)
+            self.server.log_collector.put(record)
+
+
+class _LogRecordSocketServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+    # NOTE the threads of the connections are joined by LogCollector.stop,
+    # with a timeout
+    block_on_close = False
+
+    def __init__(self, server_address, request_handler_class):
+        super().__init__(server_address, request_handler_class)
+        self.connections = set()
+        self.connections_lock = threading.Lock()
+
+
+class LogCollector:
+    """
+        Collects the log records of the Launching Manager, the spawners and
+        the actions over a local socket, and writes them in batches to one
+        file per action (or logger) and to one merged file.
+
+        The records are buffered into a bounded queue. When the queue is
+        full, the receiving threads block which in turn applies
+        backpressure to the senders (TCP flow control). When the queue is
+        filled above the sampling threshold, only one out of
+        ``sampling_rate`` records below WARNING is kept.
+
+    Methods:
+    --------
+        start()
+            starts listening and writing, returns (host, port)
+        put(record)
+            enqueues a record to be written
+        stop()
+            flushes the pending records and stops the collector
+    """
+
+    def __init__(self, logs_directory, logger, host='127.0.0.1', port=0,
+                 queue_size=10000, batch_size=512, flush_interval=0.5,
+                 sampling_threshold=0.8, sampling_rate=10,
+                 merged_filename='merged_logs.log'):
+        self.__logs_directory = logs_directory
+        self.__logger = logger
+        self.__host = host
+        self.__port = port
+        self.__queue_size = queue_size
+        self.__batch_size = batch_size
+        self.__flush_interval = flush_interval
+        self.__sampling_watermark = int(queue_size * sampling_threshold)
+        self.__sampling_rate = sampling_rate
+        self.__merged_filename = merged_filename
+        self.__records_q = queue.Queue(maxsize=queue_size)
+        self.__formatter = logging.Formatter(
+            '%(asctime)s - %(name)s - %(processName)s[%(process)d] - '
+            '%(levelname)s - %(message)s')
+        self.__files = {}
+        self.__server = None
+        self.__server_thread = None
+        self.__writer_thread = None
+        # statistics
+        # NOTE the records are put from the thread of each connection
+        self.__sampling_lock = threading.Lock()
+        self.__sampling_counter = 0
+        self.__dropped_records = 0
+        self.__written_records = 0
+
+    def start(self):
+        """
+        starts the socket server and the writer thread.
+
+        Returns
+        ------
+            (host, port): tuple
+                address where the collector is listening
+        """
+        self.__server = _LogRecordSocketServer((self.__host, self.__port),
+                                               _LogRecordStreamHandler)
+        self.__server.log_collector = self
+        self.__host, self.__port = self.__server.server_address
+        self.__server_thread = threading.Thread(target=self.__server.serve_forever,
+                                                name='LogCollectorServer',
+                                                daemon=True)
+        self.__writer_thread = threading.Thread(target=self.__write_records,
+                                                name='LogCollectorWriter',
+                                                daemon=True)
+        self.__server_thread.start()
+        self.__writer_thread.start()
+        self.__logger.info(f'log collector is listening on {self.__host}:{self.__port}')
+        return self.__host, self.__port
+
+    def put(self, record):
+        """
+        enqueues the record to be written, samples the records below WARNING
+        out under overload and blocks when the queue is full (backpressure).
+        """
+        if record.levelno < SAMPLED_LEVEL and \
+                self.__records_q.qsize() >= self.__sampling_watermark:
+            with self.__sampling_lock:
+                self.__sampling_counter += 1
+                is_sampled_out = self.__sampling_counter % self.__sampling_rate
+                if is_sampled_out:
+                    self.__dropped_records += 1
+            if is_sampled_out:
+                return
+        self.__records_q.put(record)
+
+    def __file_for(self, record):
+        """
+        helper function to get the (lazily opened) per action file, or None
+        if the owner of the record would be written into the merged file
+        """
+        owner = getattr(record, 'action_xml_id', None) or record.name
+        filename = re.sub(r'[^\w.-]', '_', owner) + '.log'
+        if filename == self.__merged_filename:
+            return None
+        if filename not in self.__files:
+            self.__files[filename] = open(
+                os.path.join(self.__logs_directory, filename), 'a')
+        return self.__files[filename]
+
+    def __write_batch(self, batch):
+        """helper function to write a batch of records, one write per file"""
+        lines_per_file = {}
+        merged_lines = []
+        for record in batch:
+            line = self.__formatter.format(record) + '\n'
+            merged_lines.append(line)
+            lines_per_file.setdefault(self.__file_for(record), []).append(line)
+        # NOTE the records of a clashing owner are in the merged file only
+        lines_per_file.pop(None, None)
+        for log_file, lines in lines_per_file.items():
+            log_file.write(''.join(lines))
+            log_file.flush()
+        merged_file = self.__files[self.__merged_filename]
+        merged_file.write(''.join(merged_lines))
+        merged_file.flush()
+        self.__written_records += len(batch)
+
+    def __write_records(self):
+        """writer thread, drains the queue in batches until poison pill"""
+        self.__files[self.__merged_filename] = open(
+            os.path.join(self.__logs_directory, self.__merged_filename), 'a')
+        is_stopping = False
+        while not is_stopping:
+            batch = []
+            try:
+                # wait for the first record of the batch
+                record = self.__records_q.get(timeout=self.__flush_interval)
+            except queue.Empty:
+                continue
+            while True:
+                if record is _STOP:
+                    is_stopping = True
+                    break
+                batch.append(record)
+                if len(batch) == self.__batch_size:
+                    break
+                try:
+                    record = self.__records_q.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self.__write_batch(batch)
+
+    def stop(self):
+        """flushes the pending records, stops the collector and closes files"""
+        if self.__server is None:
+            return
+        self.__server.shutdown()
+        self.__server.server_close()
+        # NOTE the records still to be received come before the poison pill
+        with self.__server.connections_lock:
+            connections = list(self.__server.connections)
+        deadline = time.monotonic() + DRAIN_TIMEOUT
+        for connection in connections:
+            connection.join(max(deadline - time.monotonic(), 0))
+        self.__records_q.put(_STOP)
+        self.__writer_thread.join()
+        for log_file in self.__files.values():
+            log_file.close()
+        self.__files = {}
+        self.__server = None
+        self.__logger.info(f'log collector is stopped, written records: '
+                           f'{self.__written_records}, sampled out records: '
+                           f'{self.__dropped_records}')
@@ -0,0 +1,267 @@
+# ------------------------------------------------------------------------------
+#  Copyright 2020 Forschungszentrum Jülich GmbH and Aix-Marseille Université
+# "Licensed to the Apache Software Foundation (ASF) under one or more contributor
+#  license agreements; and to You under the Apache License, Version 2.0. "
+#
+# Forschungszentrum Jülich
+#  Institute: Institute for Advanced Simulation (IAS)
+#    Section: Jülich Supercomputing Centre (JSC)
+#   Division: High Performance Computing in Neuroscience
+# Laboratory: Simulation Laboratory Neuroscience
+#       Team: Multi-scale Simulation and Design
+#
+# ------------------------------------------------------------------------------
+"""
+Prometheus-style metrics of the launcher.
+
+The hot path only appends the observations to a deque, which is atomic in
+CPython, i.e. there is no lock shared with the scraper. The observations are
+folded into the totals when the metrics are rendered (on demand), or when
+too many of them are pending.
+"""
+import os
+import bisect
+import resource
+import threading
+import collections
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# environment variable passing the URL of the metrics to the children
+METRICS_URL_VARIABLE = 'CO_SIM_METRICS_URL'
+
+# observations pending to be folded, before the hot path folds them itself
+_MAX_PENDING = 4096
+
+DEFAULT_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                           0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+                           300.0)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in labels) + '}'
+
+
+class _Metric:
+    """base class of the metrics, keeps the children per label values"""
+    metric_type = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self._label_values = labels
+        self._children = {}
+
+    def labels(self, **label_values):
+        """returns the metric for the given label values"""
+        key = tuple(sorted(label_values.items()))
+        child = self._children.get(key)
+        if child is None:
+            # NOTE setdefault is atomic, concurrent creators get the same one
+            child = self._children.setdefault(key, self._new_child(key))
+        return child
+
+    def _new_child(self, label_values):
+        return type(self)(self.name, self.documentation, label_values)
+
+    def _samples(self):
+        raise NotImplementedError
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}',
+                 f'# TYPE {self.name} {self.metric_type}']
+        for metric in [self] + list(self._children.values()):
+            lines.extend(metric._samples())
+        return lines
+
+
+class Counter(_Metric):
+    """monotonically increasing counter"""
+    metric_type = 'counter'
+
+    def __init__(self, name, documentation, labels=()):
+        super().__init__(name, documentation, labels)
+        self.__increments = collections.deque()
+        self.__value = 0
+        self.__fold_lock = threading.Lock()
+
+    def inc(self, amount=1):
+        self.__increments.append(amount)
+        if len(self.__increments) > _MAX_PENDING:
+            self.__fold()
+
+    def __fold(self):
+        # only the folders serialize, the hot path never waits for them
+        with self.__fold_lock:
+            increments = self.__increments
+            while increments:
+                self.__value += increments.popleft()
+
+    @property
+    def value(self):
+        self.__fold()
+        return self.__value
+
+    def _samples(self):
+        if self._children and not self._label_values and not self.value:
+            # only the labeled children are meaningful
+            return []
+        return [f'{self.name}{_format_labels(self._label_values)} {self.value}']
+
+
+class Gauge(_Metric):
+    """value that goes up and down, or is computed by a function on demand"""
+    metric_type = 'gauge'
+
+    def __init__(self, name, documentation, labels=(), function=None):
+        super().__init__(name, documentation, labels)
+        self.__value = 0
+        self.__function = function
+
+    def set(self, value):
+        self.__value = value
+
+    @property
+    def value(self):
+        return self.__function() if self.__function is not None else self.__value
+
+    def _samples(self):
+        if self._children and not self._label_values:
+            return []
+        return [f'{self.name}{_format_labels(self._label_values)} {self.value}']
+
+
+class Histogram(_Metric):
+    """cumulative histogram of the observations"""
+    metric_type = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.__buckets = tuple(buckets)
+        self.__counts = [0] * (len(self.__buckets) + 1)
+        self.__sum = 0.0
+        self.__observations = collections.deque()
+        self.__fold_lock = threading.Lock()
+
+    def _new_child(self, label_values):
+        return Histogram(self.name, self.documentation, label_values, self.__buckets)
+
+    def observe(self, value):
+        self.__observations.append(value)
+        if len(self.__observations) > _MAX_PENDING:
+            self.__fold()
+
+    def __fold(self):
+        with self.__fold_lock:
+            observations = self.__observations
+            while observations:
+                value = observations.popleft()
+                self.__counts[bisect.bisect_left(self.__buckets, value)] += 1
+                self.__sum += value
+
+    def _samples(self):
+        self.__fold()
+        if self._children and not self._label_values and not any(self.__counts):
+            return []
+        samples = []
+        cumulative = 0
+        for upper_bound, count in zip(self.__buckets + ('+Inf',), self.__counts):
+            cumulative += count
+            labels = self._label_values + (('le', upper_bound),)
+            samples.append(f'{self.name}_bucket{_format_labels(labels)} {cumulative}')
+        labels = _format_labels(self._label_values)
+        samples.append(f'{self.name}_sum{labels} {self.__sum}')
+        samples.append(f'{self.name}_count{labels} {cumulative}')
+        return samples
+
+
+class MetricsRegistry:
+    """
+        Keeps the metrics and renders them in the Prometheus text format.
+
+    Methods:
+    --------
+        counter(name, documentation)
+        gauge(name, documentation, function=None)
+        histogram(name, documentation, buckets=DEFAULT_LATENCY_BUCKETS)
+        render()
+            returns the metrics in the Prometheus text format
+    """
+
+    def __init__(self):
+        self.__metrics = {}
+
+    def __register(self, metric):
+        return self.__metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, documentation):
+        return self.__register(Counter(name, documentation))
+
+    def gauge(self, name, documentation, function=None):
+        return self.__register(Gauge(name, documentation, function=function))
+
+    def histogram(self, name, documentation, buckets=DEFAULT_LATENCY_BUCKETS):
+        return self.__register(Histogram(name, documentation, buckets=buckets))
+
+    def render(self):
+        lines = []
+        for metric in list(self.__metrics.values()):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+def resident_set_size():
+    """returns the current resident set size in bytes of the calling process"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        # fall back to the maximum resident set size (KiB on Linux)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class MetricsServer:
+    """
+        Serves the rendered metrics on http://<host>:<port>/metrics from a
+        daemon thread of the launcher.
+    """
+
+    def __init__(self, registry, host='127.0.0.1', port=0):
+        self.__registry = registry
+
+        class _MetricsRequestHandler(BaseHTTPRequestHandler):
+            def do_GET(handler):
+                if handler.path.split('?')[0] != '/metrics':
+                    handler.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                handler.send_response(200)
+                handler.send_header('Content-Type', 'text/plain; version=0.0.4')
+                handler.send_header('Content-Length', str(len(body)))
+                handler.end_headers()
+                handler.wfile.write(body)
+
+            def log_message(handler, *args):
+                # do not log every scrape
+                pass
+
+        self.__server = ThreadingHTTPServer((host, port), _MetricsRequestHandler)
+        self.__server.daemon_threads = True
+        self.__thread = None
+
+    @property
+    def url(self):
+        host, port = self.__server.server_address[:2]
+        return f'http://{host}:{port}/metrics'
+
+    def start(self):
+        self.__thread = threading.Thread(target=self.__server.serve_forever,
+                                         name='MetricsServer', daemon=True)
+        self.__thread.start()
+        return self.url
+
+    def stop(self):
+        self.__server.shutdown()
+        self.__server.server_close()
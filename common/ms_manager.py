@@ -12,10 +12,18 @@
 #
 # ------------------------------------------------------------------------------
 import os
-import json
+import re
 
 # Co-Simulator imports
 from EBRAINS_Launcher.common import args
+from EBRAINS_Launcher.common.utils import directory_utils
+from EBRAINS_Launcher.common.utils import parameters_export_utils
+from EBRAINS_Launcher.common.utils import profiling_utils
+from EBRAINS_Launcher.common.utils import node_health_utils
+from EBRAINS_Launcher.common.utils.common_utils import strtobool
+from EBRAINS_Launcher.common.stage_out_manager import StageOutManager
+from EBRAINS_Launcher.common.preflight import Preflight
+from EBRAINS_Launcher.enums import CoSimulatorReturnCodes
 from EBRAINS_ConfigManager.workflow_configurations_manager.xml_parsers import enums
 from EBRAINS_ConfigManager.workflow_configurations_manager.xml_parsers import variables
 from EBRAINS_ConfigManager.workflow_configurations_manager.xml_parsers import comm_settings_xml_manager
@@ -41,11 +49,18 @@ class MSManager:
             Entry point to the Co-Simulator and executes the main loop of the tool
     """
 
-    def __init__(self):
+    def __init__(self, args=None, configurations_manager=None,
+                 logger_settings=None, output_directory=None,
+                 sci_params_overrides=None):
         # general members
-        self.__args = None
+        # NOTE args, configurations_manager, logger_settings and
+        # output_directory are injected when several action plans are
+        # carried out from one process (see batch_manager.BatchManager),
+        # otherwise they are taken from the command-line and global settings
+        self.__args = args
         self.__arranger = None
-        self.__configurations_manager = None
+        self.__configurations_manager = configurations_manager
+        self.__output_directory = output_directory
         # self.__logs_root_dir = None
         self.__logger = None
         # self.__launcher = None
@@ -69,6 +84,9 @@ class MSManager:
 
         self.__actions_popen_args_dict = {}
         self.__actions_sci_params_xml_files_dict = {}
+        # sci-params XML files replacing the ones referred by the actions,
+        # keyed by action XML ID (see sweep_manager.SweepManager)
+        self.__sci_params_overrides = sci_params_overrides or {}
 
         # self.__parameters_parameters_dict = {}
         self.__parameters_parameters_for_json_file_dict = {}
@@ -82,36 +100,104 @@ class MSManager:
         self.__co_sim_services_deployment_xml_file = ''  # empty, reference to is gotten from action plan XML file
 
         # logging settings
-        self.__logger_settings = {}
+        self.__logger_settings = logger_settings if logger_settings is not None else {}
+
+        # stages out the results written into the node-local scratch, if enabled
+        self.__stage_out_manager = None
+        # where the results end up, i.e. not the scratch they are staged out from
+        self.__results_path = None
 
     def generate_parameters_json_file(self):
         """
-            Dumps into the /path/to/co_sim/results/dir/filename.json file
-            the parameters gathered from the parameters XML file
+            Streams into the /path/to/co_sim/results/dir/filename.json file
+            the parameters gathered from the parameters XML file.
+            The file is written atomically, i.e. into a temporary file which
+            is fsync'ed and renamed.
         :return:
             JSON_FILE_ERROR: reporting error during the parameter JSON file
+            JSON_FILE_OS_ERROR: the parameter JSON file cannot be created
             OK: parameter JSON file was generated properly
         """
-        # TODO: exception management when the file cannot be created
-
         results_dir = self.__configurations_manager.get_directory(DefaultDirectories.RESULTS)
         json_output_filename = \
             self.__parameters_parameters_for_json_file_dict[xml_tags.CO_SIM_XML_CO_SIM_PARAMS_FILENAME]
         json_output_path_filename = os.path.join(results_dir, json_output_filename)
+        parameters = \
+            self.__parameters_parameters_for_json_file_dict[xml_tags.CO_SIM_XML_CO_SIM_PARAMS_JSON_FILE]
 
         try:
-            with open(json_output_path_filename, 'w') as json_output_file:
-                json.dump(
-                    self.__parameters_parameters_for_json_file_dict[xml_tags.CO_SIM_XML_CO_SIM_PARAMS_JSON_FILE],
-                    json_output_file)
+            parameters_export_utils.write_json(parameters, json_output_path_filename)
         except OSError:
             self.__logger.error('{} cannot be created, OS error'.format(json_output_path_filename))
             return enums.CoSimulatorReturnCodes.JSON_FILE_OS_ERROR
+        except TypeError as e:
+            self.__logger.error(f'{json_output_path_filename} cannot be created: {e}')
+            return enums.CoSimulatorReturnCodes.JSON_FILE_ERROR
 
         self.__logger.info('Co-Simulation parameters were transformed successfully')
         self.__logger.info('Co-Simulation parameters: {}'.format(json_output_path_filename))
         return enums.CoSimulatorReturnCodes.OK
 
+    def __directories_to_be_arranged(self):
+        """
+            Gathers the directories to be created by the Arranger, i.e. the
+            CO_SIM_ARRANGEMENT_DIR_CREATION items, where the references to
+            the CO_SIM_* variables are replaced with their values.
+        :return:
+            list of directories
+        """
+        directories = []
+        for item in self.__items_to_be_arranged.values():
+            if not isinstance(item, dict) or \
+                    item.get('arr_duty') != 'CO_SIM_ARRANGEMENT_DIR_CREATION':
+                continue
+            directories.append(re.sub(
+                r'\{(CO_SIM_\w+)\}',
+                lambda match: str(self.__variables_manager.get_value(match.group(1))),
+                item['arr_what']))
+        return directories
+
+    def __run_preflight(self):
+        """
+            Checks concurrently the executables, input files, ports and the
+            node and CPU demands of the actions against the allocation, the
+            findings are written into the logs directory. It is opt-in, i.e.
+            enabled by CO_SIM_ENABLE_PREFLIGHT.
+        :return:
+            OK: no errors were found, or the preflight is disabled
+            NOT_OK: errors were found, they are already logged
+        """
+        is_preflight_enabled = False
+        try:
+            is_preflight_enabled = strtobool(
+                self.__action_plan_parameters_dict.get('CO_SIM_ENABLE_PREFLIGHT', 'false'))
+        except ValueError:
+            self.__logger.warning('CO_SIM_ENABLE_PREFLIGHT could not be set from XML, '
+                                  'falling back to default settings')
+        if not is_preflight_enabled:
+            self.__logger.info('Co-Simulator STEP 8.1 skipped, preflight is disabled')
+            return enums.CoSimulatorReturnCodes.OK
+
+        preflight = Preflight(action_plan_dict=self.__action_plan_dict,
+                              actions_popen_args_dict=self.__actions_popen_args_dict,
+                              actions_sci_params_dict=self.__actions_sci_params_xml_files_dict,
+                              communication_settings_dict=self.__communication_settings_dict,
+                              logger=self.__logger)
+        preflight.run()
+        try:
+            report_file = preflight.write_report(os.path.join(
+                self.__configurations_manager.get_directory(DefaultDirectories.LOGS),
+                'preflight_report.json'))
+            self.__logger.info(f'preflight report: {report_file}')
+        except OSError as e:
+            self.__logger.warning(f'preflight report could not be written: {e}')
+        if preflight.has_errors:
+            self.__logger.error('Co-Simulator STEP 8.1, the preflight found errors, '
+                                'no action is carried out')
+            return enums.CoSimulatorReturnCodes.NOT_OK
+        self.__logger.info('Co-Simulator STEP 8.1 done, preflight passed')
+        return enums.CoSimulatorReturnCodes.OK
+
     def run(self):
         """
             Entry point of the Co-Simulation Co-Simulator tool
@@ -123,12 +209,13 @@ class MSManager:
         ########
         # STEP 1 - Checking command line parameters
         ########
-        try:
-            # self.__args = args.arg_parse()
-            self.__args = args.get_parsed_CLI_arguments()
-        except SystemExit:
-            # argument parser has reported some issue with the arguments
-            return enums.CoSimulatorReturnCodes.PARAMETER_ERROR
+        if self.__args is None:
+            try:
+                # self.__args = args.arg_parse()
+                self.__args = args.get_parsed_CLI_arguments()
+            except SystemExit:
+                # argument parser has reported some issue with the arguments
+                return enums.CoSimulatorReturnCodes.PARAMETER_ERROR
         
         # set whether interactive steering is enabled from CLI arguments
         self.__is_interactive = self.__args.interactive
@@ -138,26 +225,50 @@ class MSManager:
         ########
 
         ####################
-        # instantiate configuration manager
-        self.__configurations_manager = configurations_manager.ConfigurationsManager()
+        # instantiate configuration manager, unless an already warmed up one
+        # is shared with this instance
+        if self.__configurations_manager is None:
+            self.__configurations_manager = configurations_manager.ConfigurationsManager()
 
         # get path to set up the output directories
-        default_dir = self.__configurations_manager.get_configuration_settings(
-            'output_directory', self.__args.global_settings)
+        if self.__output_directory is None:
+            default_dir = self.__configurations_manager.get_configuration_settings(
+                'output_directory', self.__args.global_settings)
+            self.__output_directory = default_dir['output_directory']
 
         # setup default directories (Output, Output/Results, Output/Logs,
         # Output/Figures, Output/Monitoring_DATA)
-        self.__configurations_manager.setup_default_directories(default_dir['output_directory'])
+        self.__configurations_manager.setup_default_directories(self.__output_directory)
 
         # load common settings for the logging
-        self.__logger_settings = self.__configurations_manager.get_configuration_settings(
-            'log_configurations', self.__args.global_settings)
+        if not self.__logger_settings:
+            self.__logger_settings = self.__configurations_manager.get_configuration_settings(
+                'log_configurations', self.__args.global_settings)
 
         self.__logger = self.__configurations_manager.load_log_configurations(
             name=__name__, log_configurations=self.__logger_settings)
         self.__logger.info('Co-Simulator STEP 1 done, args are parsed.')
         self.__logger.info('Co-Simulator STEP 2 done, output directories are setup.')
 
+        # STEP 2.1 - Profiling (opt-in) the rest of the run, the actions and
+        #            services started afterwards inherit the settings
+        profiles_directory = None
+        if getattr(self.__args, 'profile', False) or getattr(self.__args, 'profile_memory', False):
+            profiles_directory = profiling_utils.enable_profiling(
+                os.path.join(self.__configurations_manager.get_directory(DefaultDirectories.LOGS),
+                             'profiles'),
+                trace_memory=self.__args.profile_memory)
+            self.__logger.info(f'Co-Simulator STEP 2.1 done, profiles: {profiles_directory}')
+        profile = profiling_utils.Profile('ms_manager')
+        profile.start()
+
+        # STEP 2.2 - Caching the node health on the shared file system, i.e.
+        #            the nodes are probed once per allocation (by the preflight
+        #            or by the deployment of the services), not once per node
+        if not os.environ.get(node_health_utils.NODE_HEALTH_CACHE_DIRECTORY_VARIABLE):
+            os.environ[node_health_utils.NODE_HEALTH_CACHE_DIRECTORY_VARIABLE] = \
+                self.__configurations_manager.get_directory(DefaultDirectories.OUTPUT)
+
         ########
         # STEP 3 - Setting Up CO_SIM_* Variables by means of the Variables Manager
         ########
@@ -166,16 +277,56 @@ class MSManager:
             variables_manager.VariablesManager(self.__logger_settings, self.__configurations_manager)
 
         # STEP 3.1 - Setting Up the output location (path) for results
+        results_path = self.__configurations_manager.get_directory(DefaultDirectories.OUTPUT)
+        self.__results_path = results_path
+
+        # STEP 3.2 - Pointing the actions to the node-local scratch (opt-in),
+        #            the results are staged out to the output location
+        # NOTE the scratch and its stager exist on the launcher node only,
+        #      i.e. LOCAL mode (see STEP 4.6)
+        scratch_dir = getattr(self.__args, 'scratch_dir', None)
+        if scratch_dir:
+            scratch_results_path = os.path.join(
+                os.path.expandvars(scratch_dir),
+                f'{os.path.basename(os.path.normpath(results_path))}_{os.getpid()}')
+            directory_utils.safe_makedir(scratch_results_path)
+            self.__stage_out_manager = StageOutManager(scratch_directory=scratch_results_path,
+                                                       target_directory=results_path,
+                                                       logger=self.__logger)
+            self.__stage_out_manager.start()
+            results_path = scratch_results_path
+
         # TODO handle case when set value() fails
         self.__variables_manager.set_value(
             variables.CO_SIM_RESULTS_PATH,
-            self.__configurations_manager.get_directory(DefaultDirectories.OUTPUT)
+            results_path
         )
 
+        if self.__stage_out_manager is not None:
+            self.__logger.info(f'Co-Simulator STEP 3.2 done, the results are written into '
+                               f'{results_path} and staged out')
         self.__logger.info(
-            f'Co-Simulator STEP 3 done, Co-Simulation results location: '
-            f'{self.__variables_manager.get_value(variables.CO_SIM_RESULTS_PATH)}')
+            f'Co-Simulator STEP 3 done, Co-Simulation results location: {self.__results_path}')
 
+        try:
+            return self.__carry_out_co_simulation()
+        finally:
+            if self.__stage_out_manager is not None:
+                # STEP 10.1 - Staging out what is left in the scratch
+                self.__stage_out_manager.drain()
+            profile.stop()
+            if profiles_directory is not None:
+                # STEP 10.2 - Summarizing the hotspots of each process
+                self.__logger.info(f'profiles summary: '
+                                   f'{profiling_utils.summarize_profiles(profiles_directory)}')
+
+    def __carry_out_co_simulation(self):
+        """
+            Performs the STEPs 4 to 10, i.e. from dissecting the Co-Simulation
+            Plan to carrying it out
+        :return:
+            common.enums.CoSimulatorReturnCodes
+        """
         ########
         # STEP 4 - Co-Simulation Plan
         ########
@@ -221,6 +372,12 @@ class MSManager:
         if not enums.VariablesReturnCodes.VARIABLE_OK == \
                self.__variables_manager.create_co_sim_run_time_variables():
             return enums.CoSimulatorReturnCodes.VARIABLE_ERROR
+        if self.__stage_out_manager is not None and \
+                self.__action_plan_variables_dict[CO_SIM_EXECUTION_ENVIRONMENT].upper() != "LOCAL":
+            # the actions on the other nodes would not find the scratch
+            self.__logger.error('--scratch-dir is only supported in LOCAL mode, the scratch '
+                                'is not reachable from the other nodes')
+            return enums.CoSimulatorReturnCodes.PARAMETER_ERROR
 
         # Action Plan -> ordered and grouped sequence of actions to achieve the Co-Simulation Experiment
         # STEP 4.7 - Getting the action plan per se
@@ -330,6 +487,14 @@ class MSManager:
         self.__actions_popen_args_dict = self.__actions_xml_manager.get_actions_popen_arguments_dict()
         self.__actions_sci_params_xml_files_dict = self.__actions_xml_manager.get_actions_sci_params_xml_files_dict()
 
+        # STEP 6.2 - Replacing the sci-params XML files e.g. by a parameter sweep variant
+        for action_xml_id, sci_params_xml_file in self.__sci_params_overrides.items():
+            if action_xml_id not in self.__actions_sci_params_xml_files_dict:
+                self.__logger.error(f'cannot override sci-params, no such action: <{action_xml_id}>')
+                return enums.CoSimulatorReturnCodes.PARAMETER_ERROR
+            self.__logger.info(f'<{action_xml_id}> sci-params: {sci_params_xml_file}')
+            self.__actions_sci_params_xml_files_dict[action_xml_id] = sci_params_xml_file
+
         self.__logger.info('Co-Simulator STEP 6 done')
 
         ########
@@ -338,6 +503,16 @@ class MSManager:
         self.__logger.info('Co-Simulator STEP 7, arranging environment')
         self.__items_to_be_arranged = self.__plan_xml_manager.get_items_to_be_arranged_dict()
 
+        # STEP 7.1 - Provisioning the directories in one batch, so that the
+        #            Arranger finds them already created
+        # NOTE the Arranger is still the one reporting arrangement issues
+        try:
+            provisioning_report = directory_utils.provision_directories(
+                self.__directories_to_be_arranged())
+            self.__logger.info(f'Co-Simulator STEP 7.1, directories provisioned: {provisioning_report}')
+        except (OSError, KeyError, TypeError) as e:
+            self.__logger.warning(f'directories could not be provisioned in batch: {e}')
+
         self.__arranger = arranger.Arranger(
             self.__logger_settings,
             self.__configurations_manager,
@@ -352,10 +527,22 @@ class MSManager:
         ########
         # STEP 8 - Converting Co-Simulation parameters from XML into JSON
         ########
-        # self.__logger.info('Co-Simulator STEP 8, transforming Co-Simulation parameters')
-        # if not self.generate_parameters_json_file() == enums.CoSimulatorReturnCodes.OK:
-        #     return enums.CoSimulatorReturnCodes.JSON_FILE_ERROR
-        # self.__logger.info('Co-Simulator STEP 8 done')
+        self.__logger.info('Co-Simulator STEP 8, transforming Co-Simulation parameters')
+        if not self.__parameters_parameters_for_json_file_dict:
+            # NOTE the parameters XML file (STEP 5 of former versions) is
+            # not dissected, there are no parameters to be transformed
+            self.__logger.info('Co-Simulator STEP 8 skipped, no Co-Simulation parameters')
+        elif not self.generate_parameters_json_file() == enums.CoSimulatorReturnCodes.OK:
+            return enums.CoSimulatorReturnCodes.JSON_FILE_ERROR
+        else:
+            self.__logger.info('Co-Simulator STEP 8 done')
+
+        # STEP 8.1 - Preflight, checking the whole action plan before any
+        #            action is carried out (opt-in)
+        if not self.__run_preflight() == enums.CoSimulatorReturnCodes.OK:
+            # NOTE the code of the launcher, the one of EBRAINS_ConfigManager
+            # has no preflight
+            return CoSimulatorReturnCodes.PREFLIGHT_ERROR
 
         ########
         # STEP 9 - Launching the Action Plan
@@ -381,7 +568,7 @@ class MSManager:
 
         if not launching_manager.carry_out_action_plan() == enums.LauncherReturnCodes.LAUNCHER_OK:
             self.__logger.error('Error(s) were reported, check the errors log on {}'.format(
-                self.__variables_manager.get_value(variables.CO_SIM_RESULTS_PATH)))
+                self.__results_path))
             return enums.CoSimulatorReturnCodes.LAUNCHER_ERROR
         # if not self.__launcher.carry_out_action_plan() == common.enums.LauncherReturnCodes.LAUNCHER_OK:
         #     self.__logger.error('Error(s) were reported, check the errors log on {}'.format(
@@ -393,7 +580,7 @@ class MSManager:
         # STEP 10 - Finishing
         ########
         self.__logger.info('Information about Co-Simulation process could be found on: {}'.format(
-            self.__variables_manager.get_value(variables.CO_SIM_RESULTS_PATH)))
+            self.__results_path))
         self.__logger.info('END: Co-Simulation Co-Simulator')
 
         return enums.CoSimulatorReturnCodes.OK
@@ -0,0 +1,226 @@
+# ------------------------------------------------------------------------------
+#  Copyright 2020 Forschungszentrum Jülich GmbH and Aix-Marseille Université
+# "Licensed to the Apache Software Foundation (ASF) under one or more contributor
+#  license agreements; and to You under the Apache License, Version 2.0. "
+#
+# Forschungszentrum Jülich
+#  Institute: Institute for Advanced Simulation (IAS)
+#    Section: Jülich Supercomputing Centre (JSC)
+#   Division: High Performance Computing in Neuroscience
+# Laboratory: Simulation Laboratory Neuroscience
+#       Team: Multi-scale Simulation and Design
+#
+# ------------------------------------------------------------------------------
+import re
+import enum
+import json
+
+
+class RuleAction(str, enum.Enum):
+    """what is done once a rule matches the output of an action"""
+    # the action plan is stopped, i.e. the running actions are terminated
+    ABORT_PLAN = 'abort-plan'
+    # the action is terminated
+    KILL_ACTION = 'kill-action'
+    # the match is only reported
+    EMIT_EVENT = 'emit-event'
+
+
+STREAMS = ('stdout', 'stderr')
+
+# longest unterminated line kept to match a pattern split across two chunks
+MAX_PARTIAL_LINE = 4096
+
+
+class Rule:
+    """
+        Pattern to be looked for in the output of the actions, a literal
+        string unless is_regex is set. The pattern is matched within a line.
+    """
+    __slots__ = ('name', 'pattern', 'is_regex', 'action', 'streams')
+
+    def __init__(self, name, pattern, is_regex=False, action=RuleAction.EMIT_EVENT,
+                 streams=STREAMS):
+        self.name = name
+        self.pattern = pattern
+        self.is_regex = is_regex
+        self.action = RuleAction(action)
+        self.streams = tuple(streams)
+
+    def __repr__(self):
+        return f'Rule({self.name!r}, {self.pattern!r}, action={self.action.value})'
+
+
+# rules of the most common fatal errors after which the simulators hang
+DEFAULT_RULES = (
+    Rule('segmentation_fault', 'Segmentation fault', action=RuleAction.ABORT_PLAN),
+    Rule('mpi_abort', 'MPI_ABORT', action=RuleAction.ABORT_PLAN),
+    Rule('nan', r'(?:NaN|nan) (?:value|detected|encountered)', is_regex=True,
+         action=RuleAction.EMIT_EVENT),
+)
+
+
+def load_rules(rules_file):
+    """
+    loads the rules from a JSON file, e.g.
+        [{"name": "mpi_abort", "pattern": "MPI_ABORT", "action": "abort-plan"},
+         {"name": "nan", "pattern": "\\\\bNaN\\\\b", "regex": true,
+          "action": "emit-event", "streams": ["stderr"]}]
+
+    Raises ``OSError`` or ``ValueError`` exception if the file could not be
+    read or a rule is wrong.
+
+    Returns
+    ------
+        rules: list
+    """
+    with open(rules_file) as json_file:
+        entries = json.load(json_file)
+    rules = []
+    for index, entry in enumerate(entries):
+        try:
+            rules.append(Rule(name=entry.get('name', f'rule_{index}'),
+                              pattern=entry['pattern'],
+                              is_regex=bool(entry.get('regex', False)),
+                              action=entry.get('action', RuleAction.EMIT_EVENT),
+                              streams=entry.get('streams', STREAMS)))
+        except (KeyError, TypeError, AttributeError) as e:
+            raise ValueError(f'wrong rule #{index}: {entry}') from e
+    return rules
+
+
+class OutputRuleEngine:
+    """
+        Matches the output of the actions against the rules, the literal
+        strings are compiled once into one regular expression and the
+        regexes into another, i.e. each chunk is scanned twice at most
+        whatever the number of rules. They only tell the lines where
+        something matched, each rule is then looked for in these lines, so
+        that the overlapping matches (e.g. MPI_ABORT and ABORT) are found.
+
+        NOTE the matchers have no capturing groups on purpose, re then skips
+        the positions where none of the patterns could start; the rule is
+        told only once something matched.
+
+        The chunks are scanned as they are read (bytes), the unterminated
+        line at the end of a chunk is kept to match a pattern split across
+        two chunks. A rule matches at most once per action.
+
+        Raises ``ValueError`` exception if a regex of the rules is wrong.
+
+    Methods:
+    --------
+        scan(action_xml_id, stream_name, chunk)
+            returns the rules matching the chunk
+        forget(action_xml_id)
+            drops what is kept of the output of the action once it finished
+    """
+
+    def __init__(self, rules):
+        self.__rules = list(rules)
+        self.__rules_by_literal = {}
+        self.__regexes = []
+        # (rule, literal or compiled regex), in the order of the rules
+        self.__patterns = []
+        for rule in self.__rules:
+            if not rule.is_regex:
+                self.__rules_by_literal.setdefault(rule.pattern.encode(), []).append(rule)
+                self.__patterns.append((rule, rule.pattern.encode()))
+                continue
+            try:
+                self.__regexes.append((re.compile(rule.pattern.encode()), rule))
+            except re.error as e:
+                raise ValueError(f'wrong pattern of the rule {rule.name}: {e}') from e
+            self.__patterns.append((rule, self.__regexes[-1][0]))
+        self.__literals_matcher = None
+        if self.__rules_by_literal:
+            # NOTE the longest literal matching at a position is found first
+            self.__literals_matcher = re.compile(b'|'.join(
+                re.escape(literal)
+                for literal in sorted(self.__rules_by_literal, key=len, reverse=True)))
+        self.__regexes_matcher = None
+        if self.__regexes:
+            self.__regexes_matcher = re.compile(b'|'.join(
+                b'(?:' + regex.pattern + b')' for regex, _ in self.__regexes))
+        # unterminated line at the end of the last chunk, per (action, stream)
+        self.__partial_lines = {}
+        # rules already matched per action
+        self.__matched = {}
+
+    @property
+    def rules(self):
+        return list(self.__rules)
+
+    def __matched_lines(self, data):
+        """helper function to find the (start, end) of the lines where something matched"""
+        lines = set()
+        for matcher in (self.__literals_matcher, self.__regexes_matcher):
+            if matcher is None:
+                continue
+            checked_end = 0
+            for match in matcher.finditer(data):
+                if match.start() < checked_end:
+                    continue
+                if not isinstance(data, bytes):
+                    # NOTE copied once something matched, i.e. rarely
+                    data = bytes(data)
+                line_start = data.rfind(b'\n', 0, match.start()) + 1
+                checked_end = data.find(b'\n', match.end())
+                if checked_end < 0:
+                    checked_end = len(data)
+                # NOTE a regex could match across lines
+                for line in data[line_start:checked_end].split(b'\n'):
+                    lines.add((line_start, line_start + len(line)))
+                    line_start += len(line) + 1
+        return [data[start:end] for start, end in sorted(lines)]
+
+    def __match(self, stream_name, data, matched):
+        """helper function to gather the rules (not yet matched) matching the data"""
+        new_rules = []
+        for line in self.__matched_lines(data):
+            for rule, pattern in self.__patterns:
+                if stream_name not in rule.streams or rule.name in matched:
+                    continue
+                is_matching = pattern in line if isinstance(pattern, bytes) \
+                    else pattern.search(line) is not None
+                if is_matching:
+                    matched.add(rule.name)
+                    new_rules.append(rule)
+        return new_rules
+
+    def scan(self, action_xml_id, stream_name, chunk):
+        """
+        Returns
+        ------
+            rules: list
+                the rules matching the chunk, for the first time for this action
+        """
+        if not self.__rules:
+            return []
+        matched = self.__matched.setdefault(action_xml_id, set())
+        key = (action_xml_id, stream_name)
+        data = memoryview(chunk)
+        rules = []
+        partial_line = self.__partial_lines.pop(key, None)
+        if partial_line is not None:
+            # NOTE only the line split across the chunks is copied
+            newline = chunk.find(b'\n')
+            if newline < 0:
+                # the line is still unterminated
+                line = partial_line + chunk
+                self.__partial_lines[key] = line[-MAX_PARTIAL_LINE:]
+                return self.__match(stream_name, line, matched)
+            rules.extend(self.__match(stream_name, partial_line + chunk[:newline + 1], matched))
+            data = data[newline + 1:]
+        if data:
+            rules.extend(self.__match(stream_name, data, matched))
+            # keep the unterminated line, to be matched with the next chunk
+            tail_start = max(chunk.rfind(b'\n') + 1, len(chunk) - MAX_PARTIAL_LINE)
+            if tail_start < len(chunk):
+                self.__partial_lines[key] = chunk[tail_start:]
+        return rules
+
+    def forget(self, action_xml_id):
+        self.__matched.pop(action_xml_id, None)
+        for stream_name in STREAMS:
+            self.__partial_lines.pop((action_xml_id, stream_name), None)
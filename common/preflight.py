@@ -0,0 +1,331 @@
+# ------------------------------------------------------------------------------
+#  Copyright 2020 Forschungszentrum Jülich GmbH and Aix-Marseille Université
+# "Licensed to the Apache Software Foundation (ASF) under one or more contributor
+#  license agreements; and to You under the Apache License, Version 2.0. "
+#
+# Forschungszentrum Jülich
+#  Institute: Institute for Advanced Simulation (IAS)
+#    Section: Jülich Supercomputing Centre (JSC)
+#   Division: High Performance Computing in Neuroscience
+# Laboratory: Simulation Laboratory Neuroscience
+#       Team: Multi-scale Simulation and Design
+#
+# ------------------------------------------------------------------------------
+import os
+import re
+import json
+import time
+import shutil
+import socket
+import concurrent.futures
+import xml.etree.ElementTree as ElementTree
+
+# Co-Simulator imports
+from EBRAINS_Launcher.common.utils import hostlist_utils
+from EBRAINS_Launcher.common.utils import node_health_utils
+from EBRAINS_ConfigManager.workflow_configurations_manager.xml_parsers import constants
+
+
+ERROR = 'ERROR'
+WARNING = 'WARNING'
+
+# job launchers whose options are parsed to get the demands of the actions
+_JOB_LAUNCHERS = ('srun', 'mpirun', 'mpiexec')
+# options of the job launchers and python taking a separate value
+_OPTIONS_WITH_VALUE = {'-N', '-n', '-c', '-w', '-p', '-t', '-J', '-o', '-e', '-A',
+                       '-np', '-H', '--host', '-x', '--nodes', '--ntasks',
+                       '--cpus-per-task', '--nodelist', '-W', '-X'}
+_PYTHON_INTERPRETER = re.compile(r'^python(\d+(\.\d+)?)?$')
+
+
+def _finding(check, subject, severity, message):
+    return {'check': check, 'subject': subject, 'severity': severity, 'message': message}
+
+
+def _split_options(argv):
+    """
+    helper function to split the command at its first non-option argument.
+
+    Returns
+    ------
+        (options, rest): tuple
+            options as a dict (e.g. {'--ntasks': '4'}) and the rest of argv
+    """
+    options = {}
+    index = 0
+    while index < len(argv):
+        argument = str(argv[index])
+        if not argument.startswith('-'):
+            break
+        name, separator, value = argument.partition('=')
+        if not separator and name in _OPTIONS_WITH_VALUE and index + 1 < len(argv):
+            index += 1
+            value = str(argv[index])
+        options[name] = value
+        index += 1
+    return options, argv[index:]
+
+
+def action_demand(argv):
+    """
+    Returns the program, script and resource demand of the action, taken
+    from the options of the job launcher (srun/mpirun) if any.
+
+    Returns
+    ------
+        demand: dict
+            program, script (or None), nodes, cpus and nodelist (or None)
+    """
+    demand = {'program': str(argv[0]) if argv else None, 'script': None,
+              'nodes': 1, 'cpus': 1, 'nodelist': None}
+    rest = list(argv)
+    if rest and os.path.basename(str(rest[0])) in _JOB_LAUNCHERS:
+        options, rest = _split_options(rest[1:])
+        nodes = options.get('--nodes') or options.get('-N') or '1'
+        tasks = options.get('--ntasks') or options.get('-n') or options.get('-np') or '1'
+        cpus_per_task = options.get('--cpus-per-task') or options.get('-c') or '1'
+        # e.g. --nodes=2-4, the minimum is what must be there
+        demand['nodes'] = int(nodes.split('-')[0])
+        demand['cpus'] = int(tasks) * int(cpus_per_task)
+        demand['nodelist'] = options.get('--nodelist') or options.get('-w')
+        demand['program'] = str(rest[0]) if rest else None
+    if rest and _PYTHON_INTERPRETER.match(os.path.basename(str(rest[0]))):
+        options, script_and_args = _split_options(rest[1:])
+        if '-m' not in options and '-c' not in options and script_and_args:
+            demand['script'] = str(script_and_args[0])
+    return demand
+
+
+def allocation():
+    """
+    Returns the resources of the SLURM allocation, or of the local node if
+    there is no allocation.
+
+    Returns
+    ------
+        allocation: dict
+            is_slurm, hostnames and cpus (in total)
+    """
+    nodelist = os.environ.get('SLURM_JOB_NODELIST') or os.environ.get('SLURM_NODELIST')
+    if not nodelist:
+        return {'is_slurm': False, 'hostnames': [socket.gethostname()],
+                'cpus': len(os.sched_getaffinity(0))}
+    hostnames = hostlist_utils.expand_nodelist(nodelist)
+    # e.g. SLURM_JOB_CPUS_PER_NODE=48(x2),24
+    cpus = 0
+    for entry in os.environ.get('SLURM_JOB_CPUS_PER_NODE', '').split(','):
+        match = re.match(r'^(\d+)(?:\(x(\d+)\))?$', entry)
+        if match:
+            cpus += int(match.group(1)) * int(match.group(2) or 1)
+    if not cpus:
+        cpus = int(os.environ.get('SLURM_CPUS_ON_NODE', 1)) * len(hostnames)
+    return {'is_slurm': True, 'hostnames': hostnames, 'cpus': cpus}
+
+
+def ports_to_be_bound(settings):
+    """
+    returns the ports found in the (nested) settings, i.e. the integer
+    values whose keys refer to a port.
+    """
+    ports = []
+    if isinstance(settings, dict):
+        for key, value in settings.items():
+            if 'port' in str(key).lower() and str(value).strip().isdigit():
+                ports.append((str(key), int(value)))
+            else:
+                ports.extend(ports_to_be_bound(value))
+    elif isinstance(settings, (list, tuple)):
+        for value in settings:
+            ports.extend(ports_to_be_bound(value))
+    return ports
+
+
+class Preflight:
+    """
+        Checks the whole action plan before any action is carried out, i.e.
+        the executables, the input files, the ports, the node and CPU
+        demands against the allocation and the health of the nodes. The checks run concurrently and
+        are gathered into one report.
+
+    Methods:
+    --------
+        run()
+            runs the checks, returns the findings
+        write_report(report_file)
+            writes the findings as JSON
+    """
+
+    def __init__(self, action_plan_dict, actions_popen_args_dict,
+                 actions_sci_params_dict, communication_settings_dict,
+                 logger, max_workers=32, timeout=30.0):
+        self.__action_plan_dict = action_plan_dict
+        self.__actions_popen_args_dict = actions_popen_args_dict
+        self.__actions_sci_params_dict = actions_sci_params_dict
+        self.__communication_settings_dict = communication_settings_dict
+        self.__logger = logger
+        self.__max_workers = max_workers
+        self.__timeout = timeout
+        self.__findings = []
+        self.__elapsed = None
+
+    @property
+    def has_errors(self):
+        return any(finding['severity'] == ERROR for finding in self.__findings)
+
+    def __check_executable(self, action_xml_id, argv):
+        """helper function to check the program and script of the action"""
+        findings = []
+        demand = action_demand(argv)
+        if argv and demand['program'] != str(argv[0]) and shutil.which(str(argv[0])) is None:
+            findings.append(_finding('executable', action_xml_id, ERROR,
+                                     f'job launcher not found: {argv[0]}'))
+        if demand['program'] is None:
+            findings.append(_finding('executable', action_xml_id, ERROR, 'nothing to execute'))
+        elif shutil.which(demand['program']) is None:
+            findings.append(_finding('executable', action_xml_id, ERROR,
+                                     f'not found or not executable: {demand["program"]}'))
+        if demand['script'] is not None and not os.access(demand['script'], os.R_OK):
+            findings.append(_finding('input_file', action_xml_id, ERROR,
+                                     f'script not readable: {demand["script"]}'))
+        return findings
+
+    @staticmethod
+    def __check_sci_params(action_xml_id, sci_params_xml_file):
+        """helper function to check the sci-params XML file is readable"""
+        try:
+            ElementTree.parse(sci_params_xml_file)
+        except (OSError, ElementTree.ParseError) as e:
+            return [_finding('input_file', action_xml_id, ERROR,
+                             f'sci-params XML file cannot be read: {e}')]
+        return []
+
+    @staticmethod
+    def __check_port(name, port, severity):
+        """helper function to check the port could be bound on this node"""
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as tcp_socket:
+            try:
+                tcp_socket.bind(('', port))
+            except OSError as e:
+                return [_finding('port', f'{name}={port}', severity, f'port is not available: {e}')]
+        return []
+
+    def __check_allocation(self):
+        """
+        helper function to check the demands of the actions against the
+        allocation, the CONCURRENT actions of an event add up, whereas
+        the SEQUENTIAL ones are taken one by one.
+        """
+        findings = []
+        resources = allocation()
+        # NOTE locally, oversubscribing is usual, it is only warned about
+        severity = ERROR if resources['is_slurm'] else WARNING
+        hostnames = set(resources['hostnames'])
+        event_demand = {'nodes': 0, 'cpus': 0}
+        for action_xml_id, action in self.__action_plan_dict.items():
+            if action.get('action_type') == constants.CO_SIM_EVENT:
+                for resource in ('nodes', 'cpus'):
+                    available = len(hostnames) if resource == 'nodes' else resources['cpus']
+                    if event_demand[resource] > available:
+                        findings.append(_finding(
+                            'allocation', action_xml_id, severity,
+                            f'{event_demand[resource]} {resource} are required at once, '
+                            f'{available} are allocated'))
+                event_demand = {'nodes': 0, 'cpus': 0}
+                continue
+            argv = self.__actions_popen_args_dict.get(action_xml_id)
+            if not argv:
+                continue
+            demand = action_demand(argv)
+            is_concurrent = action.get('action_launch_method') == constants.CO_SIM_CONCURRENT_ACTION
+            for resource in ('nodes', 'cpus'):
+                event_demand[resource] = event_demand[resource] + demand[resource] \
+                    if is_concurrent else max(event_demand[resource], demand[resource])
+            if demand['nodelist'] and resources['is_slurm']:
+                missing = set(hostlist_utils.expand_nodelist(demand['nodelist'])) - hostnames
+                if missing:
+                    findings.append(_finding(
+                        'allocation', action_xml_id, ERROR,
+                        f'nodes not in the allocation: {sorted(missing)}'))
+        return findings
+
+    def __check_nodes_health(self):
+        """
+        helper function to probe the allocated nodes, the unhealthy ones are
+        left out of the placement later on (see cosim_slurm_nodes_mapping)
+        """
+        resources = allocation()
+        if not resources['is_slurm']:
+            return []
+        findings = []
+        results = node_health_utils.probe_nodes(resources['hostnames'], self.__logger)
+        for hostname, result in results.items():
+            if not result['is_healthy']:
+                findings.append(_finding('node_health', hostname, WARNING,
+                                         f"excluded, {', '.join(result['reasons'])}"))
+        if len(findings) == len(results):
+            findings.append(_finding('node_health', 'allocation', ERROR,
+                                     'none of the allocated nodes is healthy'))
+        return findings
+
+    def run(self):
+        """
+        runs the checks concurrently.
+
+        Returns
+        ------
+            findings: list
+                one dict (check, subject, severity, message) per finding
+        """
+        start = time.perf_counter()
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.__max_workers,
+                                                         thread_name_prefix='Preflight')
+        futures = {}
+        for action_xml_id, argv in self.__actions_popen_args_dict.items():
+            futures[executor.submit(self.__check_executable, action_xml_id, argv)] = \
+                ('executable', action_xml_id)
+        for action_xml_id, sci_params_xml_file in self.__actions_sci_params_dict.items():
+            if sci_params_xml_file:
+                futures[executor.submit(self.__check_sci_params, action_xml_id,
+                                        sci_params_xml_file)] = ('input_file', action_xml_id)
+        # NOTE the ports are checked on this node, where the services could
+        # not be deployed on HPC systems
+        port_severity = WARNING if allocation()['is_slurm'] else ERROR
+        for name, port in ports_to_be_bound(self.__communication_settings_dict):
+            futures[executor.submit(self.__check_port, name, port, port_severity)] = ('port', name)
+        futures[executor.submit(self.__check_allocation)] = ('allocation', 'action plan')
+        futures[executor.submit(self.__check_nodes_health)] = ('node_health', 'allocation')
+
+        done, not_done = concurrent.futures.wait(futures, timeout=self.__timeout)
+        for future in done:
+            check, subject = futures[future]
+            try:
+                self.__findings.extend(future.result())
+            except Exception as e:
+                self.__findings.append(_finding(check, subject, ERROR,
+                                                f'check failed: {e!r}'))
+        for future in not_done:
+            # e.g. a hanging file system, the check is reported instead
+            check, subject = futures[future]
+            self.__findings.append(_finding(check, subject, ERROR,
+                                            f'check timed out after {self.__timeout}s'))
+        # do not wait for the hanging checks
+        executor.shutdown(wait=False, cancel_futures=True)
+        self.__findings.sort(key=lambda finding: (finding['severity'] != ERROR,
+                                                  finding['check'], finding['subject']))
+        self.__elapsed = time.perf_counter() - start
+
+        for finding in self.__findings:
+            log = self.__logger.error if finding['severity'] == ERROR else self.__logger.warning
+            log(f"preflight {finding['check']} <{finding['subject']}>: {finding['message']}")
+        self.__logger.info(f'preflight: {len(futures)} checks in {self.__elapsed:.3f}s, '
+                           f'{len(self.__findings)} findings')
+        return self.__findings
+
+    def write_report(self, report_file):
+        """writes the findings as JSON"""
+        with open(report_file, 'w') as json_file:
+            json.dump({'elapsed': self.__elapsed,
+                       'has_errors': self.has_errors,
+                       'findings': self.__findings},
+                      json_file, indent=2)
+        return report_file
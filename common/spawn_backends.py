@@ -0,0 +1,500 @@
+# ------------------------------------------------------------------------------
+#  Copyright 2020 Forschungszentrum Jülich GmbH and Aix-Marseille Université
+# "Licensed to the Apache Software Foundation (ASF) under one or more contributor
+#  license agreements; and to You under the Apache License, Version 2.0. "
+#
+# Forschungszentrum Jülich
+#  Institute: Institute for Advanced Simulation (IAS)
+#    Section: Jülich Supercomputing Centre (JSC)
+#   Division: High Performance Computing in Neuroscience
+# Laboratory: Simulation Laboratory Neuroscience
+#       Team: Multi-scale Simulation and Design
+#
+# ------------------------------------------------------------------------------
+import os
+import sys
+import json
+import types
+import errno
+import signal
+import socket
+import weakref
+import selectors
+import threading
+import subprocess
+
+
+# names of the spawn backends, i.e. values of CO_SIM_SPAWN_BACKEND
+POPEN = 'popen'
+POSIX_SPAWN = 'posix_spawn'
+FORKSERVER = 'forkserver'
+
+
+class SpawnedProcess:
+    """
+        Handle of a process started by a spawn backend.
+
+        stdout and stderr are the (binary, raw) file descriptors of the
+        pipes where the outputs of the process could be read, or None if
+        the outputs are not captured.
+    """
+    __slots__ = ('pid', 'stdout', 'stderr', 'returncode', 'rusage', '_wait', '__weakref__')
+
+    def __init__(self, pid, stdout, stderr, wait):
+        self.pid = pid
+        self.stdout = stdout
+        self.stderr = stderr
+        self.returncode = None
+        # resource usage of the process, if the backend could reap it
+        # by means of os.wait4, otherwise None
+        self.rusage = None
+        self._wait = wait
+
+    def wait(self):
+        """waits until the process finishes and returns its return code"""
+        if self.returncode is None:
+            self.returncode, self.rusage = self._wait()
+        return self.returncode
+
+    def send_signal(self, signal_number):
+        """sends the signal if the process is not reaped yet"""
+        if self.returncode is None:
+            try:
+                os.kill(self.pid, signal_number)
+            except ProcessLookupError:
+                pass
+
+    def terminate(self):
+        self.send_signal(signal.SIGTERM)
+
+    def kill(self):
+        self.send_signal(signal.SIGKILL)
+
+
+def _wait4(pid):
+    """helper function to reap the child and to gather its resource usage"""
+    _, status, rusage = os.wait4(pid, 0)
+    return os.waitstatus_to_exitcode(status), rusage
+
+
+def rusage_from_proc(pid):
+    """
+    Reads the resource usage of a (running or not yet reaped) process from
+    /proc, as a substitute of the rusage of os.wait4 when the process is not
+    a child of the launcher. The block I/O is given in 512-byte blocks, as
+    in the rusage on Linux.
+
+    Returns
+    ------
+        rusage: SimpleNamespace
+            the ru_* fields, or None if the process is gone
+    """
+    try:
+        with open(f'/proc/{pid}/stat') as stat_file:
+            # NOTE the command name could contain spaces, skip it
+            stat_fields = stat_file.read().rpartition(')')[2].split()
+        status = {}
+        with open(f'/proc/{pid}/status') as status_file:
+            for line in status_file:
+                key, _, value = line.partition(':')
+                status[key] = value.split()
+    except OSError:
+        return None
+    io_counters = {}
+    try:
+        with open(f'/proc/{pid}/io') as io_file:
+            for line in io_file:
+                key, _, value = line.partition(':')
+                io_counters[key] = int(value)
+    except OSError:
+        # e.g. not permitted
+        pass
+    ticks_per_second = os.sysconf('SC_CLK_TCK')
+    return types.SimpleNamespace(
+        # utime and stime are the 14th and 15th fields of /proc/<pid>/stat
+        ru_utime=int(stat_fields[11]) / ticks_per_second,
+        ru_stime=int(stat_fields[12]) / ticks_per_second,
+        ru_maxrss=int(status.get('VmHWM', [0])[0]),
+        ru_nvcsw=int(status.get('voluntary_ctxt_switches', [0])[0]),
+        ru_nivcsw=int(status.get('nonvoluntary_ctxt_switches', [0])[0]),
+        ru_inblock=io_counters.get('read_bytes', 0) // 512,
+        ru_oublock=io_counters.get('write_bytes', 0) // 512)
+
+
+class SpawnBackend:
+    """
+        Base class of the spawn backends, i.e. the way the actions
+        (Popen arguments) are turned into processes.
+
+    Methods:
+    --------
+        spawn(argv, env=None, cwd=None, capture_output=True)
+            starts the process and returns its SpawnedProcess handle
+        close()
+            releases the resources held by the backend
+    """
+    name = None
+
+    def spawn(self, argv, env=None, cwd=None, capture_output=True):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class PopenBackend(SpawnBackend):
+    """subprocess.Popen (fork+exec, or vfork where the platform allows)"""
+    name = POPEN
+
+    def spawn(self, argv, env=None, cwd=None, capture_output=True):
+        output = subprocess.PIPE if capture_output else None
+        popen = subprocess.Popen(argv, env=env, cwd=cwd, stdout=output, stderr=output)
+
+        def wait():
+            # reap it by means of wait4 to gather the resource usage as well
+            returncode, rusage = _wait4(popen.pid)
+            popen.returncode = returncode
+            if capture_output:
+                popen.stdout.close()
+                popen.stderr.close()
+            return returncode, rusage
+
+        return SpawnedProcess(
+            popen.pid,
+            popen.stdout.fileno() if capture_output else None,
+            popen.stderr.fileno() if capture_output else None,
+            wait)
+
+
+class PosixSpawnBackend(SpawnBackend):
+    """os.posix_spawn, the C library uses vfork (or clone(CLONE_VFORK))
+    which does not copy the page tables of the (large) launcher process"""
+    name = POSIX_SPAWN
+
+    def spawn(self, argv, env=None, cwd=None, capture_output=True):
+        if cwd is not None:
+            # posix_spawn has no chdir file action in the Python API
+            raise ValueError(f'{self.name} backend does not support cwd')
+        file_actions = []
+        parent_fds = (None, None)
+        if capture_output:
+            stdout_read, stdout_write = os.pipe()
+            stderr_read, stderr_write = os.pipe()
+            file_actions = [(os.POSIX_SPAWN_DUP2, stdout_write, 1),
+                            (os.POSIX_SPAWN_DUP2, stderr_write, 2),
+                            (os.POSIX_SPAWN_CLOSE, stdout_read),
+                            (os.POSIX_SPAWN_CLOSE, stderr_read)]
+            parent_fds = (stdout_read, stderr_read)
+        try:
+            pid = os.posix_spawnp(argv[0], argv,
+                                  os.environ if env is None else env,
+                                  file_actions=file_actions)
+        except BaseException:
+            if capture_output:
+                os.close(stdout_read)
+                os.close(stderr_read)
+            raise
+        finally:
+            if capture_output:
+                # the write ends belong to the child from now on
+                os.close(stdout_write)
+                os.close(stderr_write)
+
+        def wait():
+            returncode_and_rusage = _wait4(pid)
+            for fd in parent_fds:
+                if fd is not None:
+                    os.close(fd)
+            return returncode_and_rusage
+
+        return SpawnedProcess(pid, parent_fds[0], parent_fds[1], wait)
+
+
+# largest request (mostly the environment) sent to the fork server
+_MAX_MESSAGE_SIZE = 4 * 2**20
+
+# run by the fork server, a small interpreter started once: it starts the
+# actions on request (posix_spawn, or fork+exec to change the directory),
+# then reaps them and reports their exit
+_FORK_SERVER_SCRIPT = """
+import os, sys, json, signal, socket, selectors
+connection = socket.socket(fileno=int(sys.argv[1]))
+wakeup_read, wakeup_write = os.pipe()
+os.set_blocking(wakeup_read, False)
+os.set_blocking(wakeup_write, False)
+signal.set_wakeup_fd(wakeup_write)
+signal.signal(signal.SIGCHLD, lambda *_: None)
+# NOTE ^C is sent to the whole foreground process group, the launcher closes
+# the fork server on its way out instead
+signal.signal(signal.SIGINT, signal.SIG_IGN)
+selector = selectors.DefaultSelector()
+selector.register(connection, selectors.EVENT_READ)
+selector.register(wakeup_read, selectors.EVENT_READ)
+
+def reply(message):
+    connection.sendall(json.dumps(message).encode())
+
+def spawn(request, fds):
+    if request['cwd'] is None:
+        file_actions = []
+        if fds:
+            file_actions = [(os.POSIX_SPAWN_DUP2, fds[0], 1), (os.POSIX_SPAWN_DUP2, fds[1], 2)]
+        try:
+            pid = os.posix_spawnp(request['argv'][0], request['argv'], request['env'],
+                                  file_actions=file_actions, setsigdef=(signal.SIGINT,))
+        except OSError as e:
+            reply({'request': request['request'], 'errno': e.errno})
+            return
+        finally:
+            for fd in fds:
+                os.close(fd)
+        reply({'request': request['request'], 'pid': pid})
+        return
+    error_read, error_write = os.pipe2(os.O_CLOEXEC)
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.close(error_read)
+            signal.set_wakeup_fd(-1)
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            if fds:
+                os.dup2(fds[0], 1)
+                os.dup2(fds[1], 2)
+            if request['cwd'] is not None:
+                os.chdir(request['cwd'])
+            os.execvpe(request['argv'][0], request['argv'], request['env'])
+        except OSError as e:
+            os.write(error_write, str(e.errno).encode())
+        finally:
+            os._exit(127)
+    os.close(error_write)
+    for fd in fds:
+        os.close(fd)
+    # NOTE EOF once the child has exec'ed (close-on-exec)
+    error = os.read(error_read, 64)
+    os.close(error_read)
+    if error:
+        os.waitpid(pid, 0)
+        reply({'request': request['request'], 'errno': int(error)})
+    else:
+        reply({'request': request['request'], 'pid': pid})
+
+def reap():
+    while True:
+        try:
+            pid, status, rusage = os.wait4(-1, os.WNOHANG)
+        except ChildProcessError:
+            return
+        if pid == 0:
+            return
+        reply({'exited': pid, 'returncode': os.waitstatus_to_exitcode(status),
+               'rusage': {name: getattr(rusage, name) for name in dir(rusage)
+                          if name.startswith('ru_')}})
+
+while True:
+    for key, _ in selector.select():
+        if key.fileobj is connection:
+            data, fds, _, _ = socket.recv_fds(connection, int(sys.argv[2]), 2)
+            if not data:
+                # the launcher is gone
+                sys.exit(0)
+            spawn(json.loads(data), fds)
+        else:
+            while True:
+                try:
+                    if not os.read(wakeup_read, 4096):
+                        break
+                except BlockingIOError:
+                    break
+            reap()
+"""
+
+
+class ForkServerBackend(SpawnBackend):
+    """
+        Fork server, the actions are forked (and then exec'ed) from a small
+        interpreter started once, instead of from the (large) launcher
+        process. The requests are sent over a Unix socket, with the pipes of
+        the outputs attached (SCM_RIGHTS).
+
+        The fork server reaps the actions and reports their return code and
+        resource usage back, which are gathered by a thread of the launcher.
+    """
+    name = FORKSERVER
+
+    def __init__(self):
+        self.__connection, server_connection = socket.socketpair(socket.AF_UNIX,
+                                                                 socket.SOCK_SEQPACKET)
+        for connection in (self.__connection, server_connection):
+            connection.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, _MAX_MESSAGE_SIZE)
+            connection.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, _MAX_MESSAGE_SIZE)
+        # NOTE same session as the launcher, the fork server (and the actions
+        # forked from it) go away with it, e.g. once the job ends
+        self.__server = subprocess.Popen(
+            [sys.executable, '-c', _FORK_SERVER_SCRIPT,
+             str(server_connection.fileno()), str(_MAX_MESSAGE_SIZE)],
+            pass_fds=(server_connection.fileno(),))
+        server_connection.close()
+        self.__condition = threading.Condition()
+        self.__send_lock = threading.Lock()
+        self.__requests = 0
+        # replies keyed by request, exits keyed by PID
+        self.__replies = {}
+        self.__exits = {}
+        # PIDs of the spawned processes still to be waited on, the exits of
+        # the other ones are not kept
+        self.__pending = set()
+        self.__is_closed = False
+        self.__reader = threading.Thread(target=self.__read_replies,
+                                         name='ForkServerReader', daemon=True)
+        self.__reader.start()
+
+    def __read_replies(self):
+        while True:
+            try:
+                data = self.__connection.recv(_MAX_MESSAGE_SIZE)
+            except OSError:
+                data = b''
+            with self.__condition:
+                if not data:
+                    # the fork server is gone
+                    self.__is_closed = True
+                    self.__condition.notify_all()
+                    return
+                message = json.loads(data)
+                if 'exited' in message:
+                    if message['exited'] in self.__pending:
+                        self.__exits[message['exited']] = (
+                            message['returncode'], types.SimpleNamespace(**message['rusage']))
+                else:
+                    if 'pid' in message:
+                        # NOTE before any exit of it could be read
+                        self.__pending.add(message['pid'])
+                    self.__replies[message['request']] = message
+                self.__condition.notify_all()
+
+    def __wait_for(self, table, key):
+        """helper function to wait for the reply or the exit"""
+        with self.__condition:
+            self.__condition.wait_for(lambda: key in table or self.__is_closed)
+            if key not in table:
+                raise ChildProcessError(errno.ECHILD, 'the fork server is gone')
+            return table.pop(key)
+
+    def spawn(self, argv, env=None, cwd=None, capture_output=True):
+        fds = []
+        if capture_output:
+            stdout_read, stdout_write = os.pipe()
+            stderr_read, stderr_write = os.pipe()
+            fds = [stdout_write, stderr_write]
+        try:
+            with self.__condition:
+                self.__requests += 1
+                request = self.__requests
+            message = json.dumps({'request': request, 'argv': list(argv), 'cwd': cwd,
+                                  'env': dict(os.environ if env is None else env)}).encode()
+            with self.__send_lock:
+                socket.send_fds(self.__connection, [message], fds)
+            reply = self.__wait_for(self.__replies, request)
+            if 'errno' in reply:
+                raise OSError(reply['errno'], os.strerror(reply['errno']), argv[0])
+        except BaseException:
+            if capture_output:
+                os.close(stdout_read)
+                os.close(stderr_read)
+            raise
+        finally:
+            # the write ends belong to the child from now on
+            for fd in fds:
+                os.close(fd)
+        pid = reply['pid']
+
+        def wait():
+            try:
+                returncode_and_rusage = self.__wait_for(self.__exits, pid)
+            finally:
+                # NOTE the PID could be reused from now on
+                finalizer.detach()
+                self.__forget(pid)
+            if capture_output:
+                os.close(stdout_read)
+                os.close(stderr_read)
+            return returncode_and_rusage
+
+        spawned_process = SpawnedProcess(pid,
+                                         stdout_read if capture_output else None,
+                                         stderr_read if capture_output else None,
+                                         wait)
+        # NOTE the exit of a process which is never waited on is dropped
+        # once its handle is gone
+        finalizer = weakref.finalize(spawned_process, self.__forget, pid)
+        return spawned_process
+
+    def __forget(self, pid):
+        """helper function to drop the exit of the process, if any"""
+        with self.__condition:
+            self.__pending.discard(pid)
+            self.__exits.pop(pid, None)
+
+    def close(self):
+        # NOTE wakes the reader up, and the fork server exits once it reads EOF
+        self.__connection.shutdown(socket.SHUT_RDWR)
+        self.__reader.join()
+        self.__connection.close()
+        self.__server.wait()
+
+
+spawn_backends = {
+    POPEN: PopenBackend,
+    POSIX_SPAWN: PosixSpawnBackend,
+    FORKSERVER: ForkServerBackend,
+}
+
+
+def get_spawn_backend(name):
+    """
+    Returns the spawn backend for the given name.
+
+    Raises ``ValueError`` exception if there is no such backend.
+    """
+    try:
+        return spawn_backends[name.lower()]()
+    except KeyError:
+        raise ValueError(f'unknown spawn backend: <{name}>, '
+                         f'expected one of {list(spawn_backends)}')
+
+
+def communicate(spawned_process, on_output=None):
+    """
+    Reads the outputs of the process until they are closed, then waits
+    until the process finishes.
+
+    Parameters
+    ----------
+        spawned_process: SpawnedProcess
+            process whose outputs are captured
+
+        on_output: callable
+            called as on_output(stream_name, chunk) for every chunk read,
+            where stream_name is either 'stdout' or 'stderr'
+
+    Returns
+    ------
+        returncode: int
+    """
+    streams = {spawned_process.stdout: 'stdout', spawned_process.stderr: 'stderr'}
+    streams.pop(None, None)
+    with selectors.DefaultSelector() as selector:
+        for fd in streams:
+            selector.register(fd, selectors.EVENT_READ)
+        while streams:
+            for key, _ in selector.select():
+                chunk = os.read(key.fd, 65536)
+                if not chunk:
+                    selector.unregister(key.fd)
+                    streams.pop(key.fd)
+                    continue
+                if on_output is not None:
+                    on_output(streams[key.fd], chunk)
+    return spawned_process.wait()
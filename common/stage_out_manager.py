@@ -0,0 +1,197 @@
+# ------------------------------------------------------------------------------
+#  Copyright 2020 Forschungszentrum Jülich GmbH and Aix-Marseille Université
+# "Licensed to the Apache Software Foundation (ASF) under one or more contributor
+#  license agreements; and to You under the Apache License, Version 2.0. "
+#
+# Forschungszentrum Jülich
+#  Institute: Institute for Advanced Simulation (IAS)
+#    Section: Jülich Supercomputing Centre (JSC)
+#   Division: High Performance Computing in Neuroscience
+# Laboratory: Simulation Laboratory Neuroscience
+#       Team: Multi-scale Simulation and Design
+#
+# ------------------------------------------------------------------------------
+import os
+import json
+import time
+import shutil
+import threading
+import concurrent.futures
+
+# Co-Simulator imports
+from EBRAINS_Launcher.common.utils import directory_utils
+
+
+class StageOutManager:
+    """
+        Copies the files written into the (node-local) scratch directory to
+        the results directory in the background, while the co-simulation is
+        still running.
+
+        A file is considered completed, and then staged out, once its size
+        and modification time have not changed for ``settle_time`` seconds.
+        A file modified after being staged out is staged out again.
+
+        A file which could not be copied (e.g. ENOSPC) is logged and
+        recorded in the manifest, the rest is staged out anyway. The scratch
+        directory is removed once everything is staged out.
+
+    Methods:
+    --------
+        start()
+            starts the background stager
+        drain()
+            stages out everything left, waits for it and writes the manifest
+    """
+
+    def __init__(self, scratch_directory, target_directory, logger,
+                 max_workers=4, scan_interval=2.0, settle_time=5.0,
+                 manifest_filename='stage_out_manifest.json'):
+        self.__scratch_directory = scratch_directory
+        self.__target_directory = target_directory
+        self.__logger = logger
+        self.__scan_interval = scan_interval
+        self.__settle_time = settle_time
+        self.__manifest_filename = manifest_filename
+        self.__executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='StageOut')
+        self.__stopping_event = threading.Event()
+        self.__scanner_thread = None
+        # (size, mtime) of the files when seen the last time
+        self.__seen = {}
+        # (size, mtime) of the files when staged out
+        self.__staged = {}
+        self.__pending = {}
+        # manifest entries keyed by source file
+        self.__manifest = {}
+        self.__manifest_lock = threading.Lock()
+
+    def start(self):
+        """starts the background stager"""
+        self.__scanner_thread = threading.Thread(target=self.__scan_periodically,
+                                                 name='StageOutScanner',
+                                                 daemon=True)
+        self.__scanner_thread.start()
+        self.__logger.info(f'staging out {self.__scratch_directory} '
+                           f'to {self.__target_directory}')
+
+    def __scan_periodically(self):
+        while not self.__stopping_event.wait(self.__scan_interval):
+            try:
+                self.__scan(is_draining=False)
+            except OSError as e:
+                # e.g. a file removed while scanning, try again on next scan
+                self.__logger.debug(f'stage out scan: {e}')
+
+    def __scan(self, is_draining):
+        """helper function to submit the completed files to be staged out"""
+        now = time.time()
+        for directory, _, filenames in os.walk(self.__scratch_directory):
+            for filename in filenames:
+                source = os.path.join(directory, filename)
+                try:
+                    stat_result = os.stat(source)
+                except FileNotFoundError:
+                    continue
+                signature = (stat_result.st_size, stat_result.st_mtime)
+                is_settled = self.__seen.get(source) == signature and \
+                    now - stat_result.st_mtime >= self.__settle_time
+                self.__seen[source] = signature
+                if self.__staged.get(source) == signature or \
+                        source in self.__pending:
+                    continue
+                if is_draining or is_settled:
+                    self.__staged[source] = signature
+                    self.__pending[source] = self.__executor.submit(
+                        self.__stage_out, source)
+        # forget about the finished copies
+        for source in [source for source, future in self.__pending.items() if future.done()]:
+            self.__pending.pop(source).result()
+
+    def __stage_out(self, source):
+        """helper function to copy one file, atomically for the readers"""
+        start = time.perf_counter()
+        relative_path = os.path.relpath(source, self.__scratch_directory)
+        destination = os.path.join(self.__target_directory, relative_path)
+        partial_destination = destination + '.part'
+        try:
+            directory_utils.safe_makedir(os.path.dirname(destination))
+            shutil.copy2(source, partial_destination)
+            os.replace(partial_destination, destination)
+        except OSError as e:
+            self.__logger.error(f'{source} could not be staged out: {e}')
+            try:
+                os.remove(partial_destination)
+            except OSError:
+                pass
+            with self.__manifest_lock:
+                self.__manifest[relative_path] = {
+                    'source': source,
+                    'destination': destination,
+                    'error': str(e),
+                    'staged_at': time.time()}
+            return
+        with self.__manifest_lock:
+            self.__manifest[relative_path] = {
+                'source': source,
+                'destination': destination,
+                'bytes': os.path.getsize(destination),
+                'staged_at': time.time(),
+                'elapsed': time.perf_counter() - start}
+
+    def drain(self):
+        """
+        stops the background stager, stages out everything left in the
+        scratch directory, writes the manifest of the staged out files and
+        removes the scratch directory unless a file could not be staged out.
+
+        NOTE it does not raise, it is called while finishing the co-simulation
+        whose return code must not be masked.
+
+        Returns
+        ------
+            manifest_file: str
+                or None if the manifest could not be written
+        """
+        self.__stopping_event.set()
+        if self.__scanner_thread is not None:
+            self.__scanner_thread.join()
+        start = time.perf_counter()
+        try:
+            self.__scan(is_draining=True)
+        except OSError as e:
+            self.__logger.error(f'{self.__scratch_directory} could not be scanned: {e}')
+        for source, future in list(self.__pending.items()):
+            try:
+                future.result()
+            except Exception as e:
+                self.__logger.error(f'{source} could not be staged out: {e}')
+                self.__manifest[os.path.relpath(source, self.__scratch_directory)] = {
+                    'source': source, 'error': str(e)}
+        self.__pending = {}
+        self.__executor.shutdown(wait=True)
+
+        failed_files = [relative_path for relative_path, entry in self.__manifest.items()
+                        if 'error' in entry]
+        manifest_file = os.path.join(self.__target_directory, self.__manifest_filename)
+        try:
+            with open(manifest_file, 'w') as json_file:
+                json.dump({'scratch_directory': self.__scratch_directory,
+                           'target_directory': self.__target_directory,
+                           'failed_files': failed_files,
+                           'files': self.__manifest},
+                          json_file, indent=2)
+        except OSError as e:
+            self.__logger.error(f'{manifest_file} could not be written: {e}')
+            manifest_file = None
+        self.__logger.info(f'stage out drained in {time.perf_counter() - start:.3f}s, '
+                           f'{len(self.__manifest) - len(failed_files)} files '
+                           f'({sum(entry.get("bytes", 0) for entry in self.__manifest.values())} '
+                           f'bytes), manifest: {manifest_file}')
+        if failed_files:
+            self.__logger.error(f'{len(failed_files)} files could not be staged out, they are '
+                                f'left in {self.__scratch_directory}')
+        else:
+            # NOTE e.g. in /dev/shm, i.e. in memory
+            shutil.rmtree(self.__scratch_directory, ignore_errors=True)
+        return manifest_file
@@ -0,0 +1,283 @@
+# ------------------------------------------------------------------------------
+#  Copyright 2020 Forschungszentrum Jülich GmbH and Aix-Marseille Université
+# "Licensed to the Apache Software Foundation (ASF) under one or more contributor
+#  license agreements; and to You under the Apache License, Version 2.0. "
+#
+# Forschungszentrum Jülich
+#  Institute: Institute for Advanced Simulation (IAS)
+#    Section: Jülich Supercomputing Centre (JSC)
+#   Division: High Performance Computing in Neuroscience
+# Laboratory: Simulation Laboratory Neuroscience
+#       Team: Multi-scale Simulation and Design
+#
+# ------------------------------------------------------------------------------
+"""
+Shared-memory status board of the actions.
+
+The Launching Manager (single writer) publishes the state of each action
+into a fixed-layout table in shared memory. Each slot is protected by a
+seqlock, i.e. the writer makes the sequence number odd while writing and
+even afterwards, so that the readers (e.g. the app server or the CLI below)
+take consistent snapshots without any lock and without asking the launcher.
+
+Usage (CLI):
+    python3 status_board.py <name> [--watch <seconds>]
+"""
+import os
+import sys
+import time
+import enum
+import struct
+import argparse
+import threading
+from multiprocessing import shared_memory
+from multiprocessing import resource_tracker
+
+
+# environment variable passing the name of the status board to the children
+STATUS_BOARD_VARIABLE = 'CO_SIM_STATUS_BOARD'
+
+MAGIC = b'COSIMSB1'
+# magic, number of slots
+_HEADER = struct.Struct('<8sI4x')
+# sequence number
+_SEQUENCE = struct.Struct('<Q')
+# action id, phase, PID, start time, last heartbeat, exit code
+_SLOT = struct.Struct('<32sBxxxiddi4x')
+_SLOT_SIZE = _SEQUENCE.size + _SLOT.size
+NO_EXIT_CODE = -(2 ** 31)
+_ACTION_ID_SIZE = 32
+
+
+def _encode_action_id(action_id):
+    """helper function to truncate the action id on a character boundary"""
+    return action_id.encode('utf-8')[:_ACTION_ID_SIZE].decode('utf-8', 'ignore').encode('utf-8')
+
+
+@enum.unique
+class ActionPhase(enum.IntEnum):
+    """phase of an action as published on the status board"""
+    EMPTY = 0
+    PENDING = 1
+    RUNNING = 2
+    FINISHED = 3
+    FAILED = 4
+
+
+class StatusBoardWriter:
+    """
+        Creates the status board and publishes the state of the actions.
+        NOTE there must be only one writer, i.e. one instance, whose methods
+        are serialized by a lock (e.g. the launcher and the heartbeats).
+
+    Methods:
+    --------
+        register(action_id)
+            assigns a slot to the action, in PENDING phase
+        update(action_id, phase=None, pid=None, exit_code=None)
+            publishes the new state of the action
+        heartbeat(action_id)
+            publishes the last heartbeat of the action
+        close()
+            stops the heartbeats and removes the shared memory
+    """
+
+    def __init__(self, n_slots, name=None, heartbeat_interval=1.0):
+        self.__shared_memory = shared_memory.SharedMemory(
+            name=name, create=True, size=_HEADER.size + n_slots * _SLOT_SIZE)
+        self.name = self.__shared_memory.name
+        self.__buffer = self.__shared_memory.buf
+        self.__n_slots = n_slots
+        # local copy of the published state, keyed by action id
+        self.__slots = {}
+        self.__lock = threading.Lock()
+        _HEADER.pack_into(self.__buffer, 0, MAGIC, n_slots)
+        self.__stopping_event = threading.Event()
+        self.__heartbeat_interval = heartbeat_interval
+        self.__heartbeat_thread = threading.Thread(target=self.__beat,
+                                                   name='StatusBoardHeartbeat',
+                                                   daemon=True)
+        self.__heartbeat_thread.start()
+
+    def __publish(self, action_id):
+        """helper function to write one slot under the seqlock"""
+        slot = self.__slots[action_id]
+        offset = _HEADER.size + slot['index'] * _SLOT_SIZE
+        sequence = _SEQUENCE.unpack_from(self.__buffer, offset)[0]
+        # odd: the slot is being written
+        _SEQUENCE.pack_into(self.__buffer, offset, sequence + 1)
+        _SLOT.pack_into(self.__buffer, offset + _SEQUENCE.size,
+                        _encode_action_id(action_id),
+                        slot['phase'], slot['pid'], slot['start_time'],
+                        slot['heartbeat'], slot['exit_code'])
+        # even: the slot is consistent again
+        _SEQUENCE.pack_into(self.__buffer, offset, sequence + 2)
+
+    def register(self, action_id):
+        """assigns a slot to the action, in PENDING phase"""
+        with self.__lock:
+            self.__register(action_id)
+
+    def __register(self, action_id):
+        if action_id in self.__slots:
+            return
+        if len(self.__slots) == self.__n_slots:
+            raise IndexError(f'status board is full ({self.__n_slots} slots)')
+        self.__slots[action_id] = {'index': len(self.__slots),
+                                   'phase': ActionPhase.PENDING,
+                                   'pid': 0,
+                                   'start_time': 0.0,
+                                   'heartbeat': 0.0,
+                                   'exit_code': NO_EXIT_CODE}
+        self.__publish(action_id)
+
+    def update(self, action_id, phase=None, pid=None, exit_code=None):
+        """publishes the new state of the action"""
+        with self.__lock:
+            self.__register(action_id)
+            slot = self.__slots[action_id]
+            now = time.time()
+            if phase is not None:
+                if phase == ActionPhase.RUNNING and slot['phase'] != ActionPhase.RUNNING:
+                    slot['start_time'] = now
+                slot['phase'] = phase
+            if pid is not None:
+                slot['pid'] = pid
+            if exit_code is not None:
+                slot['exit_code'] = exit_code
+            slot['heartbeat'] = now
+            self.__publish(action_id)
+
+    def heartbeat(self, action_id):
+        """publishes the last heartbeat of the action"""
+        with self.__lock:
+            self.__slots[action_id]['heartbeat'] = time.time()
+            self.__publish(action_id)
+
+    def __beat(self):
+        """heartbeats of the running actions whose processes are alive"""
+        while not self.__stopping_event.wait(self.__heartbeat_interval):
+            for action_id, slot in list(self.__slots.items()):
+                if slot['phase'] != ActionPhase.RUNNING or not slot['pid']:
+                    continue
+                try:
+                    os.kill(slot['pid'], 0)
+                except (ProcessLookupError, PermissionError):
+                    continue
+                self.heartbeat(action_id)
+
+    def close(self):
+        """stops the heartbeats and removes the shared memory"""
+        self.__stopping_event.set()
+        self.__heartbeat_thread.join()
+        self.__buffer = None
+        self.__shared_memory.close()
+        self.__shared_memory.unlink()
+
+
+class StatusBoardReader:
+    """
+        Attaches to an existing status board to take lock-free snapshots.
+
+    Methods:
+    --------
+        snapshot()
+            returns the consistent state of all the registered actions
+        close()
+            detaches from the shared memory
+    """
+
+    def __init__(self, name, max_retries=1000):
+        self.__shared_memory = shared_memory.SharedMemory(name=name, create=False)
+        # NOTE the reader must not remove the shared memory at exit, it is
+        # owned by the writer
+        resource_tracker.unregister(self.__shared_memory._name, 'shared_memory')
+        self.__buffer = self.__shared_memory.buf
+        magic, self.__n_slots = _HEADER.unpack_from(self.__buffer, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f'{name} is not a status board')
+        self.__max_retries = max_retries
+
+    def __read_slot(self, index):
+        """helper function to read one slot under the seqlock"""
+        offset = _HEADER.size + index * _SLOT_SIZE
+        for _ in range(self.__max_retries):
+            sequence_before = _SEQUENCE.unpack_from(self.__buffer, offset)[0]
+            if sequence_before % 2:
+                # the writer is writing the slot
+                continue
+            fields = _SLOT.unpack_from(self.__buffer, offset + _SEQUENCE.size)
+            if _SEQUENCE.unpack_from(self.__buffer, offset)[0] == sequence_before:
+                return sequence_before, fields
+        raise TimeoutError(f'slot {index} could not be read consistently')
+
+    def snapshot(self):
+        """
+        Returns
+        ------
+            actions: list
+                one dict per registered action
+        """
+        actions = []
+        for index in range(self.__n_slots):
+            sequence, fields = self.__read_slot(index)
+            action_id, phase, pid, start_time, heartbeat, exit_code = fields
+            if sequence == 0 or phase == ActionPhase.EMPTY:
+                # slots are assigned in order, the rest of them are empty
+                break
+            actions.append({'action_id': action_id.rstrip(b'\0').decode('utf-8'),
+                            'phase': ActionPhase(phase).name,
+                            'pid': pid,
+                            'start_time': start_time,
+                            'last_heartbeat': heartbeat,
+                            'exit_code': None if exit_code == NO_EXIT_CODE else exit_code})
+        return actions
+
+    def close(self):
+        """detaches from the shared memory"""
+        self.__buffer = None
+        self.__shared_memory.close()
+
+
+def print_snapshot(actions):
+    """prints the snapshot as a table"""
+    now = time.time()
+    print(f'{"action":<20} {"phase":<9} {"PID":>8} {"running [s]":>12} '
+          f'{"heartbeat [s ago]":>18} {"exit code":>9}')
+    for action in actions:
+        running = now - action['start_time'] if action['start_time'] else 0.0
+        heartbeat = now - action['last_heartbeat'] if action['last_heartbeat'] else 0.0
+        exit_code = '' if action['exit_code'] is None else action['exit_code']
+        print(f'{action["action_id"]:<20} {action["phase"]:<9} {action["pid"]:>8} '
+              f'{running:>12.1f} {heartbeat:>18.1f} {exit_code:>9}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('name', nargs='?', default=os.environ.get(STATUS_BOARD_VARIABLE),
+                        help=f'name of the status board, default is ${STATUS_BOARD_VARIABLE}')
+    parser.add_argument('--watch', type=float, default=None, metavar='seconds',
+                        help='print the snapshot periodically')
+    args = parser.parse_args(argv)
+    if not args.name:
+        parser.error('the name of the status board is missing')
+
+    reader = StatusBoardReader(args.name)
+    try:
+        while True:
+            print_snapshot(reader.snapshot())
+            if args.watch is None:
+                break
+            time.sleep(args.watch)
+            print()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        reader.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,281 @@
+# ------------------------------------------------------------------------------
+#  Copyright 2020 Forschungszentrum Jülich GmbH and Aix-Marseille Université
+# "Licensed to the Apache Software Foundation (ASF) under one or more contributor
+#  license agreements; and to You under the Apache License, Version 2.0. "
+#
+# Forschungszentrum Jülich
+#  Institute: Institute for Advanced Simulation (IAS)
+#    Section: Jülich Supercomputing Centre (JSC)
+#   Division: High Performance Computing in Neuroscience
+# Laboratory: Simulation Laboratory Neuroscience
+#       Team: Multi-scale Simulation and Design
+#
+# ------------------------------------------------------------------------------
+import os
+import json
+import time
+import enum
+import uuid
+import socket
+import tempfile
+import threading
+import socketserver
+
+
+# path of the Unix domain socket of the steering channel, it is passed down
+# to the children (e.g. the app server) by means of this environment variable
+STEERING_SOCKET_VARIABLE = 'CO_SIM_STEERING_SOCKET'
+
+
+class SteeringCommand(str, enum.Enum):
+    """commands carried by the steering channel"""
+    START = 'START'
+    PAUSE = 'PAUSE'
+    STOP = 'STOP'
+
+
+class _SteeringRequestHandler(socketserver.StreamRequestHandler):
+    """
+    one connection of a client, the requests and replies are JSON lines:
+        {"client": "<id>", "seq": 1, "command": "START"} -> {"seq": 1, "ack": true}
+    the duplicates are detected per client by the server, i.e. across the
+    connections of the client (see ``SteeringServer.handle_request``).
+    """
+
+    def setup(self):
+        super().setup()
+        self.server.connections.add(self.connection)
+
+    def finish(self):
+        self.server.connections.discard(self.connection)
+        super().finish()
+
+    def handle(self):
+        # NOTE a client without ID is deduplicated within this connection only
+        connection_id = f'connection-{id(self)}'
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                seq = int(request['seq'])
+                command = SteeringCommand(request['command'])
+                client = str(request.get('client') or connection_id)
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                self.__reply({'seq': None, 'ack': False, 'error': f'bad request: {e}'})
+                continue
+            reply = self.server.steering_server.handle_request(client, seq, command)
+            try:
+                self.__reply(reply)
+            except OSError:
+                # e.g. the client gave up waiting and resent it on a new connection
+                return
+
+    def __reply(self, reply):
+        self.wfile.write(json.dumps(reply).encode() + b'\n')
+        self.wfile.flush()
+
+
+class _ThreadingUnixStreamServer(socketserver.ThreadingMixIn,
+                                 socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class SteeringServer:
+    """
+        Launcher side of the steering channel, it hands the commands over
+        to the given handler and acknowledges them once handled.
+
+        The handler is called as handler(command) from the thread of the
+        connection, a raised exception is replied as not acknowledged.
+
+    Methods:
+    --------
+        start()
+            starts serving, returns the path of the socket
+        stop()
+    """
+
+    def __init__(self, handler, logger, socket_path=None):
+        self.__handler = handler
+        self.__logger = logger
+        self.__socket_path = socket_path
+        self.__temporary_directory = None
+        self.__server = None
+        self.__thread = None
+        self.__lock = threading.Lock()
+        # last sequence number and reply keyed by client
+        self.__last_replies = {}
+
+    @property
+    def socket_path(self):
+        return self.__socket_path
+
+    def handle_request(self, client, seq, command):
+        """
+        hands the command of the client over to the handler, one command at
+        a time. A request with an already handled sequence number (e.g.
+        resent by the client on a new connection after a timeout) is
+        acknowledged again without being handled.
+
+        Returns
+        ------
+            reply: dict
+        """
+        with self.__lock:
+            last_seq, last_reply = self.__last_replies.get(client, (0, None))
+            if seq <= last_seq:
+                # NOTE a duplicate, e.g. the reply was lost
+                return (dict(last_reply, seq=seq) if seq == last_seq
+                        else {'seq': seq, 'ack': False, 'error': 'out of sequence'})
+            reply = self.__handle_command(seq, command)
+            self.__last_replies[client] = (seq, reply)
+            return reply
+
+    def __handle_command(self, seq, command):
+        """helper function to hand the command over to the handler"""
+        start = time.perf_counter()
+        try:
+            self.__handler(command)
+        except Exception as e:
+            self.__logger.error(f'steering command {command.value} (seq={seq}) failed: {e}')
+            return {'seq': seq, 'ack': False, 'error': str(e)}
+        self.__logger.info(f'steering command {command.value} (seq={seq}) is handled '
+                           f'in {(time.perf_counter() - start) * 1000:.3f}ms')
+        return {'seq': seq, 'ack': True}
+
+    def start(self):
+        if self.__socket_path is None:
+            # NOTE the path of a Unix domain socket is limited to ~100 bytes
+            self.__temporary_directory = tempfile.mkdtemp(prefix='cosim_steering_')
+            self.__socket_path = os.path.join(self.__temporary_directory, 'steering.sock')
+        self.__server = _ThreadingUnixStreamServer(self.__socket_path,
+                                                   _SteeringRequestHandler)
+        self.__server.steering_server = self
+        self.__server.connections = set()
+        self.__thread = threading.Thread(target=self.__server.serve_forever,
+                                         name='SteeringServer', daemon=True)
+        self.__thread.start()
+        self.__logger.debug(f'steering channel: {self.__socket_path}')
+        return self.__socket_path
+
+    def stop(self):
+        if self.__server is None:
+            return
+        self.__server.shutdown()
+        # close the connections of the clients as well
+        for connection in list(self.__server.connections):
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self.__server.server_close()
+        self.__thread.join()
+        self.__server = None
+        try:
+            os.unlink(self.__socket_path)
+            if self.__temporary_directory is not None:
+                os.rmdir(self.__temporary_directory)
+        except OSError:
+            pass
+
+
+class SteeringClient:
+    """
+        Steering side of the channel e.g. the app server, it sends the
+        commands in sequence and waits for their acknowledgments.
+
+    Methods:
+    --------
+        send(command)
+            returns whether the command is acknowledged and the round trip time
+        report()
+            statistics of the round trip times
+    """
+
+    def __init__(self, socket_path=None, timeout=5.0, retries=1):
+        self.__socket_path = socket_path or os.environ.get(STEERING_SOCKET_VARIABLE)
+        self.__timeout = timeout
+        self.__retries = retries
+        self.__socket = None
+        self.__reader = None
+        # NOTE the sequence numbers are scoped by the client ID, since the
+        # commands may be resent on a new connection
+        self.__client_id = uuid.uuid4().hex
+        self.__seq = 0
+        self.__round_trip_times = []
+        self.__lock = threading.Lock()
+
+    @property
+    def is_available(self):
+        return bool(self.__socket_path)
+
+    def __connect(self):
+        """helper function to (re)connect to the launcher"""
+        self.close()
+        self.__socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.__socket.settimeout(self.__timeout)
+        try:
+            self.__socket.connect(self.__socket_path)
+        except OSError:
+            self.close()
+            raise
+        self.__reader = self.__socket.makefile('rb')
+
+    def send(self, command):
+        """
+        sends the command, it is resent with the same sequence number (on
+        a new connection) if the acknowledgment does not arrive in time.
+
+        Raises ``OSError`` exception if the launcher cannot be reached.
+
+        Returns
+        ------
+            (ack, round_trip_time, reply): tuple
+        """
+        command = SteeringCommand(command)
+        with self.__lock:
+            self.__seq += 1
+            request = json.dumps({'client': self.__client_id, 'seq': self.__seq,
+                                  'command': command.value}).encode() + b'\n'
+            for attempt in range(self.__retries + 1):
+                try:
+                    if self.__socket is None:
+                        self.__connect()
+                    start = time.perf_counter()
+                    self.__socket.sendall(request)
+                    while True:
+                        line = self.__reader.readline()
+                        if not line:
+                            raise ConnectionError('steering channel is closed')
+                        reply = json.loads(line)
+                        # skip the replies to the requests given up before
+                        if reply.get('seq') == self.__seq:
+                            break
+                    round_trip_time = time.perf_counter() - start
+                    self.__round_trip_times.append(round_trip_time)
+                    return bool(reply.get('ack')), round_trip_time, reply
+                except (OSError, ValueError):
+                    self.close()
+                    if attempt == self.__retries:
+                        raise
+
+    def report(self):
+        """
+        Returns
+        ------
+            report: dict
+                number of commands and the mean and maximum round trip times
+        """
+        with self.__lock:
+            round_trip_times = list(self.__round_trip_times)
+        return {'commands': len(round_trip_times),
+                'mean_rtt': sum(round_trip_times) / len(round_trip_times)
+                if round_trip_times else 0.0,
+                'max_rtt': max(round_trip_times, default=0.0)}
+
+    def close(self):
+        if self.__reader is not None:
+            self.__reader.close()
+            self.__reader = None
+        if self.__socket is not None:
+            self.__socket.close()
+            self.__socket = None
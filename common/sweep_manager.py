@@ -0,0 +1,333 @@
+# ------------------------------------------------------------------------------
+#  Copyright 2020 Forschungszentrum Jülich GmbH and Aix-Marseille Université
+# "Licensed to the Apache Software Foundation (ASF) under one or more contributor
+#  license agreements; and to You under the Apache License, Version 2.0. "
+#
+# Forschungszentrum Jülich
+#  Institute: Institute for Advanced Simulation (IAS)
+#    Section: Jülich Supercomputing Centre (JSC)
+#   Division: High Performance Computing in Neuroscience
+# Laboratory: Simulation Laboratory Neuroscience
+#       Team: Multi-scale Simulation and Design
+#
+# ------------------------------------------------------------------------------
+import os
+import json
+import random
+import itertools
+import multiprocessing
+import concurrent.futures
+import xml.etree.ElementTree as ElementTree
+
+# Co-Simulator imports
+from EBRAINS_Launcher.common import args
+from EBRAINS_Launcher.common.batch_manager import run_action_plan
+from EBRAINS_Launcher.common.batch_manager import warm_up_configurations_manager
+from EBRAINS_Launcher.common.utils import hostlist_utils
+from EBRAINS_ConfigManager.workflow_configurations_manager.xml_parsers import enums
+
+
+# NOTE the sweep specification is a JSON file such as
+# {
+#   "action": "action_004",                 # action whose sci-params are swept
+#   "sci_params_xml": "/path/to/sci_params.xml",  # sci-params to start from
+#   "design": "grid",                       # grid | random
+#   "samples": 100,                         # random design only
+#   "seed": 0,                              # random design only
+#   "nodes_per_variant": 1,                 # HPC only
+#   "parameters": {
+#       # ElementTree path (relative to the root element) -> values
+#       "parameters/simulation/simulation_time": [1000, 2000],
+#       # random design: either a list to choose from or a range
+#       "parameters/simulation/noise": {"min": 0.1, "max": 0.5}
+#   }
+# }
+SWEEP_DESIGN_GRID = 'grid'
+SWEEP_DESIGN_RANDOM = 'random'
+
+
+def load_sweep_specification(sweep_specification_file):
+    """
+    Loads and validates the sweep specification JSON file.
+
+    Raises ``ValueError`` exception if the specification is inconsistent.
+
+    Returns
+    ------
+        sweep_specification: dict
+    """
+    with open(sweep_specification_file) as json_file:
+        sweep_specification = json.load(json_file)
+
+    for key in ('action', 'sci_params_xml', 'parameters'):
+        if key not in sweep_specification:
+            raise ValueError(f'<{key}> is missing in {sweep_specification_file}')
+
+    sweep_specification.setdefault('design', SWEEP_DESIGN_GRID)
+    sweep_specification.setdefault('nodes_per_variant', 1)
+    if sweep_specification['design'] == SWEEP_DESIGN_GRID:
+        for path, values in sweep_specification['parameters'].items():
+            if not isinstance(values, list) or not values:
+                raise ValueError(f'grid design expects a list of values for <{path}>')
+    elif sweep_specification['design'] == SWEEP_DESIGN_RANDOM:
+        if 'samples' not in sweep_specification:
+            raise ValueError('random design expects the number of <samples>')
+    else:
+        raise ValueError(f'unknown design: <{sweep_specification["design"]}>')
+
+    return sweep_specification
+
+
+def expand_sweep(sweep_specification):
+    """
+    Lazily expands the sweep specification into its variants.
+
+    Yields
+    ------
+        assignments: dict
+            the value of each swept parameter keyed by its path
+    """
+    paths = list(sweep_specification['parameters'])
+    if sweep_specification['design'] == SWEEP_DESIGN_GRID:
+        for values in itertools.product(*sweep_specification['parameters'].values()):
+            yield dict(zip(paths, values))
+        return
+
+    # Case, random design
+    random_generator = random.Random(sweep_specification.get('seed'))
+    for _ in range(sweep_specification['samples']):
+        assignments = {}
+        for path, values in sweep_specification['parameters'].items():
+            if isinstance(values, dict):
+                assignments[path] = random_generator.uniform(values['min'], values['max'])
+            else:
+                assignments[path] = random_generator.choice(values)
+        yield assignments
+
+
+def materialize_variant(sci_params_xml, assignments, target_xml):
+    """
+    Writes the sci-params XML file of a variant, i.e. a copy of the given
+    sci-params XML file where the swept parameters are replaced.
+
+    Raises ``KeyError`` exception if a parameter path is not found.
+    """
+    element_tree = ElementTree.parse(sci_params_xml)
+    root = element_tree.getroot()
+    for path, value in assignments.items():
+        element = root.find(path)
+        if element is None:
+            raise KeyError(f'{path} is not found in {sci_params_xml}')
+        element.text = str(value)
+    element_tree.write(target_xml)
+    return target_xml
+
+
+def allocation_slots(nodes_per_variant, max_workers):
+    """
+    Splits the SLURM allocation into slots where the variants are carried out
+    concurrently, each one restricted to its own subset of nodes.
+    Locally (no SLURM allocation), there are ``max_workers`` slots.
+
+    Returns
+    ------
+        slots: list
+            environment variables to be set for each slot
+    """
+    if 'SLURM_NODELIST' not in os.environ:
+        return [{} for _ in range(max_workers)]
+
+    hostnames = hostlist_utils.expand_nodelist(os.environ['SLURM_NODELIST'])
+    slots = []
+    for first in range(0, len(hostnames) - nodes_per_variant + 1, nodes_per_variant):
+        slot_hostnames = hostnames[first:first + nodes_per_variant]
+        slots.append({'SLURM_NODELIST': hostlist_utils.compress_nodelist(slot_hostnames),
+                      'SLURM_NNODES': str(len(slot_hostnames))})
+    return slots
+
+
+class SweepManager:
+    """
+        Class expanding the sci-params of one action into a parameter sweep
+        and carrying out the variants concurrently on the allocation,
+        one variant per slot of nodes.
+
+    Methods:
+    --------
+        run()
+            Entry point of the parameter sweep
+    """
+
+    def __init__(self, action_plan=None, global_settings=None,
+                 sweep_specification_file=None, max_workers=1, argv=None):
+        self.__action_plan = action_plan
+        self.__global_settings = global_settings
+        self.__sweep_specification_file = sweep_specification_file
+        self.__max_workers = max_workers
+        # command line to be parsed if the action plan is not given,
+        # sys.argv by default
+        self.__argv = argv
+        self.__sweep_specification = {}
+        self.__configurations_manager = None
+        self.__logger_settings = {}
+        self.__logger = None
+        self.__sweep_directory = None
+        # summary of the variants keyed by variant index
+        self.__sweep_index = {}
+
+    def __variant_jobs(self):
+        """
+        helper generator to lazily materialize the variants as jobs to be
+        carried out
+        """
+        for index, assignments in enumerate(expand_sweep(self.__sweep_specification)):
+            variant_directory = os.path.join(self.__sweep_directory, f'variant_{index:05d}')
+            os.makedirs(variant_directory, exist_ok=True)
+            variant_xml = materialize_variant(
+                self.__sweep_specification['sci_params_xml'],
+                assignments,
+                os.path.join(variant_directory, 'sci_params.xml'))
+            self.__sweep_index[index] = {'parameters': assignments,
+                                         'sci_params_xml': variant_xml,
+                                         'output_directory': variant_directory,
+                                         'return_code': None}
+            yield index, {'action_plan': self.__action_plan,
+                          'output_directory': variant_directory,
+                          'sci_params_overrides': {
+                              self.__sweep_specification['action']: variant_xml}}
+
+    def __write_sweep_index(self):
+        """helper function to dump the summary of the variants"""
+        sweep_index_file = os.path.join(self.__sweep_directory, 'sweep_index.json')
+        with open(sweep_index_file, 'w') as json_file:
+            json.dump({'sweep': self.__sweep_specification,
+                       'variants': self.__sweep_index},
+                      json_file, indent=2, default=str)
+        self.__logger.info(f'sweep index: {sweep_index_file}')
+
+    def __carry_out_variants(self, slots):
+        """
+        helper function to keep each slot of the allocation busy with one
+        variant, materializing the next variant only when a slot is free.
+        """
+        free_slots = list(range(len(slots)))
+        running = {}
+        variant_jobs = self.__variant_jobs()
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=len(slots),
+                mp_context=multiprocessing.get_context('fork')) as executor:
+            while True:
+                # fill up the free slots
+                while free_slots:
+                    try:
+                        index, job = next(variant_jobs)
+                    except StopIteration:
+                        break
+                    slot = free_slots.pop()
+                    # NOTE set for this variant only, run_action_plan
+                    # restores the environment of the worker afterwards
+                    job['environment'] = slots[slot]
+                    future = executor.submit(run_action_plan,
+                                             job,
+                                             self.__global_settings,
+                                             self.__configurations_manager,
+                                             self.__logger_settings)
+                    running[future] = (index, slot)
+                    self.__logger.info(f'variant {index} started on slot {slot}: '
+                                       f'{self.__sweep_index[index]["parameters"]}')
+                if not running:
+                    # all variants are carried out
+                    break
+                done, _ = concurrent.futures.wait(
+                    running, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    index, slot = running.pop(future)
+                    free_slots.append(slot)
+                    try:
+                        return_code = future.result()
+                    except Exception as e:
+                        self.__logger.exception(f'variant {index} got the exception: {e}')
+                        return_code = enums.CoSimulatorReturnCodes.NOT_OK
+                    self.__sweep_index[index]['return_code'] = return_code
+                    self.__logger.info(f'variant {index} finished with {return_code}')
+
+    def run(self):
+        """
+            Entry point of the parameter sweep
+        :return:
+            OK: all the variants finished properly
+            LAUNCHER_ERROR: at least one variant finished with error
+            PARAMETER_ERROR: wrong command-line arguments or sweep specification
+        """
+        ########
+        # STEP 1 - Checking command line parameters and sweep specification
+        ########
+        if self.__action_plan is None or self.__sweep_specification_file is None:
+            try:
+                sweep_args = args.get_parsed_sweep_CLI_arguments(self.__argv)
+            except SystemExit:
+                # argument parser has reported some issue with the arguments
+                return enums.CoSimulatorReturnCodes.PARAMETER_ERROR
+            self.__action_plan = sweep_args.action_plan
+            self.__global_settings = sweep_args.global_settings
+            self.__sweep_specification_file = sweep_args.sweep
+            self.__max_workers = sweep_args.max_workers
+
+        ########
+        # STEP 2 - Setting Up the (shared) Configuration Manager
+        ########
+        self.__configurations_manager, output_directory, self.__logger_settings = \
+            warm_up_configurations_manager(self.__global_settings)
+        self.__logger = self.__configurations_manager.load_log_configurations(
+            name=__name__, log_configurations=self.__logger_settings)
+
+        try:
+            self.__sweep_specification = load_sweep_specification(self.__sweep_specification_file)
+        except (OSError, ValueError) as e:
+            self.__logger.error(f'wrong sweep specification: {e}')
+            return enums.CoSimulatorReturnCodes.PARAMETER_ERROR
+
+        ########
+        # STEP 3 - Packing the variants onto the allocation
+        ########
+        slots = allocation_slots(self.__sweep_specification['nodes_per_variant'],
+                                 self.__max_workers)
+        if not slots:
+            self.__logger.error(f'not enough nodes for '
+                                f'{self.__sweep_specification["nodes_per_variant"]} nodes per variant')
+            return enums.CoSimulatorReturnCodes.PARAMETER_ERROR
+        self.__sweep_directory = os.path.join(output_directory, 'sweep')
+        os.makedirs(self.__sweep_directory, exist_ok=True)
+        self.__logger.info(f'Sweep STEP 3 done, {len(slots)} variants run concurrently')
+
+        ########
+        # STEP 4 - Carrying out the variants
+        ########
+        try:
+            self.__carry_out_variants(slots)
+        except (OSError, KeyError, ElementTree.ParseError) as e:
+            self.__logger.error(f'variant could not be materialized: {e}')
+            return enums.CoSimulatorReturnCodes.PARAMETER_ERROR
+        finally:
+            self.__write_sweep_index()
+
+        failed_variants = [index for index, variant in self.__sweep_index.items()
+                           if variant['return_code'] != enums.CoSimulatorReturnCodes.OK]
+        if failed_variants:
+            self.__logger.error(f'variants finished with error: {failed_variants}')
+            return enums.CoSimulatorReturnCodes.LAUNCHER_ERROR
+
+        self.__logger.info('END: all variants finished properly')
+        return enums.CoSimulatorReturnCodes.OK
+
+
+def main(argv=None):
+    """
+    Entry point of the parameter sweep on the command line, see __main__.py
+
+    Returns
+    ------
+        exit_code: int
+            the value of the CoSimulatorReturnCodes returned by SweepManager.run
+    """
+    return SweepManager(argv=argv).run().value
@@ -0,0 +1,91 @@
+# -----------------------------------------------------------------------------
+#  Copyright 2020 Forschungszentrum Jülich GmbH
+# "Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements; and to You under the Apache License,
+# Version 2.0. "
+#
+# Forschungszentrum Jülich
+#  Institute: Institute for Advanced Simulation (IAS)
+#    Section: Jülich Supercomputing Centre (JSC)
+#   Division: High Performance Computing in Neuroscience
+# Laboratory: Simulation Laboratory Neuroscience
+#       Team: Multi-scale Simulation and Design
+# -----------------------------------------------------------------------------
+import os
+import csv
+import json
+import threading
+
+
+ACCOUNTING_FILENAME = 'actions_accounting'
+
+# columns of the accounting table, in order
+FIELDS = ('action_xml_id', 'event_action_xml_id', 'pid', 'returncode',
+          'elapsed_s', 'cpu_s', 'user_cpu_s', 'system_cpu_s', 'max_rss_kib',
+          'voluntary_context_switches', 'involuntary_context_switches',
+          'block_input_ops', 'block_output_ops')
+
+
+def accounting_record(rusage):
+    """returns the accounting columns taken from the rusage"""
+    if rusage is None:
+        return {}
+    return {'cpu_s': round(rusage.ru_utime + rusage.ru_stime, 6),
+            'user_cpu_s': round(rusage.ru_utime, 6),
+            'system_cpu_s': round(rusage.ru_stime, 6),
+            # NOTE kibibytes on Linux
+            'max_rss_kib': rusage.ru_maxrss,
+            'voluntary_context_switches': rusage.ru_nvcsw,
+            'involuntary_context_switches': rusage.ru_nivcsw,
+            'block_input_ops': rusage.ru_inblock,
+            'block_output_ops': rusage.ru_oublock}
+
+
+class AccountingTable:
+    """
+        Resource usage of the actions, one row per action.
+
+    Methods:
+    --------
+        record(action_xml_id, event_action_xml_id, pid, returncode, elapsed, rusage)
+            adds the row of the finished action
+        write(directory)
+            writes the table sorted by CPU time (descending) as CSV and JSON
+    """
+
+    def __init__(self):
+        self.__rows = []
+        self.__lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.__rows)
+
+    def record(self, action_xml_id, event_action_xml_id, pid, returncode,
+               elapsed, rusage):
+        row = dict.fromkeys(FIELDS)
+        row.update({'action_xml_id': action_xml_id,
+                    'event_action_xml_id': event_action_xml_id,
+                    'pid': pid,
+                    'returncode': returncode,
+                    'elapsed_s': round(elapsed, 6)})
+        row.update(accounting_record(rusage))
+        with self.__lock:
+            self.__rows.append(row)
+
+    def write(self, directory):
+        """
+        Returns
+        ------
+            (csv_file, json_file): tuple
+        """
+        with self.__lock:
+            rows = sorted(self.__rows, key=lambda row: row['cpu_s'] or 0.0, reverse=True)
+        csv_file = os.path.join(directory, f'{ACCOUNTING_FILENAME}.csv')
+        with open(csv_file, 'w', newline='') as output_file:
+            writer = csv.DictWriter(output_file, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+        json_file = os.path.join(directory, f'{ACCOUNTING_FILENAME}.json')
+        with open(json_file, 'w') as output_file:
+            json.dump(rows, output_file, indent=2)
+        return csv_file, json_file
@@ -0,0 +1,208 @@
+# -----------------------------------------------------------------------------
+#  Copyright 2020 Forschungszentrum Jülich GmbH
+# "Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements; and to You under the Apache License,
+# Version 2.0. "
+#
+# Forschungszentrum Jülich
+#  Institute: Institute for Advanced Simulation (IAS)
+#    Section: Jülich Supercomputing Centre (JSC)
+#   Division: High Performance Computing in Neuroscience
+# Laboratory: Simulation Laboratory Neuroscience
+#       Team: Multi-scale Simulation and Design
+# -----------------------------------------------------------------------------
+"""
+Bytecode cache of the Python actions and services.
+
+The scripts and packages are precompiled once into a cache, which is then
+copied onto each node. The children are pointed at the node-local copy by
+means of the PYTHONPYCACHEPREFIX environment variable, i.e. they neither
+stat nor read the __pycache__ directories on the shared file system.
+
+NOTE once PYTHONPYCACHEPREFIX is set, the __pycache__ directories are not
+used at all, hence the modules imported by the children (the standard
+library included) are cached as well by importing them once (see warm_up).
+"""
+import os
+import sys
+import time
+import hashlib
+import subprocess
+import importlib.util
+
+
+PYCACHE_PREFIX_VARIABLE = 'PYTHONPYCACHEPREFIX'
+# written into the cache once it is built, a node-local copy carrying the
+# same stamp is up-to-date (see cache_digest)
+STAMP_FILENAME = '.cosim_bytecode_cache'
+
+# run on each node, it copies the cache unless the copy is up-to-date
+_POPULATE_SCRIPT = """
+import os, sys, shutil
+source, target, stamp = sys.argv[1:4]
+with open(os.path.join(source, stamp)) as f:
+    build = f.read()
+try:
+    with open(os.path.join(target, stamp)) as f:
+        if f.read() == build:
+            sys.exit(0)
+except OSError:
+    pass
+# NOTE the stamp is copied last, i.e. once the copy is complete
+shutil.copytree(source, target, dirs_exist_ok=True, ignore=shutil.ignore_patterns(stamp))
+shutil.copy(os.path.join(source, stamp), target)
+"""
+
+# run by the interpreter of the children, it prints the import time
+_IMPORT_TIME_SCRIPT = """
+import sys, time, importlib
+start = time.perf_counter()
+for name in sys.argv[1:]:
+    try:
+        importlib.import_module(name)
+    except Exception:
+        pass
+print(time.perf_counter() - start)
+"""
+
+
+def package_directories(names):
+    """
+    returns the directories of the given (top-level) packages, found without
+    importing them, the ones which cannot be found are left out.
+    """
+    directories = []
+    for name in names:
+        try:
+            spec = importlib.util.find_spec(name)
+        except (ImportError, ValueError):
+            continue
+        if spec is not None and spec.submodule_search_locations:
+            directories.extend(spec.submodule_search_locations)
+    return directories
+
+
+def precompile(scripts, directories, cache_directory, interpreter='python3',
+               timeout=600.0):
+    """
+    compiles the scripts, the modules next to them and the packages in the
+    given directories into the cache, by the interpreter of the children
+    (the bytecode is specific to the Python version).
+
+    Returns
+    ------
+        n_files: int
+            number of .pyc files in the cache
+    """
+    os.makedirs(cache_directory, exist_ok=True)
+    environment = dict(os.environ, **{PYCACHE_PREFIX_VARIABLE: cache_directory})
+    # NOTE the directories of the scripts are not walked down too deep, they
+    # could be e.g. the home directory
+    script_directories = sorted({os.path.dirname(os.path.abspath(script))
+                                 for script in scripts})
+    runs = [['-r', '2', *script_directories]] if script_directories else []
+    if directories:
+        runs.append(list(directories))
+    for arguments in runs:
+        # NOTE a failing file (e.g. a syntax error) is reported by the child
+        # when it is run, it does not fail the cache
+        subprocess.run([interpreter, '-m', 'compileall', '-q', '-j', '0', *arguments],
+                       env=environment, stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL, timeout=timeout)
+    return sum(filename.endswith('.pyc')
+               for _, _, filenames in os.walk(cache_directory) for filename in filenames)
+
+
+def import_time(modules, pycache_prefix=None, interpreter='python3', timeout=120.0):
+    """
+    measures the time to import the modules in a new interpreter, with the
+    given cache or with the __pycache__ directories if there is none.
+
+    Returns
+    ------
+        seconds: float
+            or None if it could not be measured
+    """
+    environment = dict(os.environ)
+    environment.pop(PYCACHE_PREFIX_VARIABLE, None)
+    if pycache_prefix is not None:
+        environment[PYCACHE_PREFIX_VARIABLE] = pycache_prefix
+        # NOTE the modules missing from the cache are added to it
+        environment.pop('PYTHONDONTWRITEBYTECODE', None)
+    try:
+        completed = subprocess.run([interpreter, '-c', _IMPORT_TIME_SCRIPT, *modules],
+                                   env=environment, capture_output=True,
+                                   timeout=timeout, check=True)
+        return float(completed.stdout.decode().strip().splitlines()[-1])
+    except (OSError, subprocess.SubprocessError, ValueError, IndexError):
+        return None
+
+
+def cache_digest(cache_directory):
+    """
+    returns the digest of the .pyc files of the cache (paths, sizes and
+    mtimes), i.e. it changes only if a module is compiled (again), e.g. for
+    another interpreter version (the cpython-XY tag) or a modified source.
+    """
+    digest = hashlib.sha256()
+    for directory, _, filenames in sorted(os.walk(cache_directory)):
+        for filename in sorted(filenames):
+            if not filename.endswith('.pyc'):
+                continue
+            path = os.path.join(directory, filename)
+            try:
+                status = os.stat(path)
+            except OSError:
+                continue
+            digest.update(f'{os.path.relpath(path, cache_directory)}\0'
+                          f'{status.st_size}\0{status.st_mtime_ns}\n'.encode())
+    return digest.hexdigest()
+
+
+def warm_up(modules, cache_directory, interpreter='python3', timeout=120.0):
+    """
+    imports the modules once with the cache, to cache all the modules they
+    import, then stamps the cache as built (see cache_digest), i.e. the
+    copies on the nodes are kept as long as nothing is compiled again.
+
+    Returns
+    ------
+        seconds: float
+            time to import them, i.e. including the compiling
+    """
+    seconds = import_time(modules, cache_directory, interpreter, timeout)
+    with open(os.path.join(cache_directory, STAMP_FILENAME), 'w') as stamp:
+        stamp.write(cache_digest(cache_directory))
+    return seconds
+
+
+def populate_command(cache_directory, node_local_directory, n_nodes=None):
+    """returns the command to copy the cache onto each node, by srun on HPC systems"""
+    command = ['python3', '-c', _POPULATE_SCRIPT,
+               cache_directory, node_local_directory, STAMP_FILENAME]
+    if n_nodes is None:
+        return [sys.executable] + command[1:]
+    # NOTE --overlap lets it run next to the steps already running
+    return ['srun', f'--nodes={n_nodes}', f'--ntasks={n_nodes}',
+            '--ntasks-per-node=1', '--overlap'] + command
+
+
+def populate(cache_directory, node_local_directory, n_nodes=None, timeout=600.0):
+    """
+    copies the cache onto each node (once, see STAMP_FILENAME), there is
+    nothing to copy if the cache is already node-local.
+
+    Raises ``subprocess.SubprocessError`` exception if it failed on a node.
+
+    Returns
+    ------
+        seconds: float
+    """
+    start = time.perf_counter()
+    if n_nodes is None and \
+            os.path.realpath(cache_directory) == os.path.realpath(node_local_directory):
+        return 0.0
+    subprocess.run(populate_command(cache_directory, node_local_directory, n_nodes),
+                   stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                   timeout=timeout, check=True)
+    return time.perf_counter() - start
@@ -12,12 +12,16 @@
 #       Team: Multi-scale Simulation and Design
 # -----------------------------------------------------------------------------
 import os
-import re
 
 from EBRAINS_RichEndpoint.application_companion.common_enums import SERVICE_COMPONENT_CATEGORY
 from EBRAINS_RichEndpoint.application_companion.common_enums import Response
 from EBRAINS_ConfigManager.workflow_configurations_manager.xml_parsers import variables
 from EBRAINS_ConfigManager.workflow_configurations_manager.xml_parsers import constants
+from EBRAINS_Launcher.common.utils import profiling_utils
+from EBRAINS_Launcher.common.utils import throttle_utils
+from EBRAINS_Launcher.common.utils import hostlist_utils
+from EBRAINS_Launcher.common.utils import node_health_utils
+from EBRAINS_Launcher.common import zygote
 
 
 # TODO setup XML files for the settings
@@ -29,7 +33,15 @@ def deployment_command(logger, is_execution_environment_hpc, service,
     """
     helper function to get the command to deploy the service locally or
     on HPC systems.
+
+    NOTE it waits for a launch token first if the launches are paced (see
+    throttle_utils), since the service is started right after.
     """
+    waited = throttle_utils.get_launch_throttle().acquire(
+        node=target_nodelist_from_xml or default_cosim_nodelist_for_service)
+    if waited > 0:
+        logger.debug(f"{service} waited {waited:.3f}s for a launch token")
+
     # Case a, service is to be deployed on compute nodes (HPC)
     # then, prepare srun command
     if is_execution_environment_hpc:
@@ -44,6 +56,19 @@ def deployment_command(logger, is_execution_environment_hpc, service,
         return command_to_deploy_on_local_system(logger, args, service)
 
 
+def python_command(service, args):
+    """
+    returns the command to run the Python service, by the zygote of the node
+    if the zygotes are enabled (see zygote), which falls back to a cold
+    'python3 <service>' if there is no zygote on the node.
+    """
+    # NOTE a profiled service is started cold, to be run under cProfile
+    if os.environ.get(zygote.ZYGOTE_DIRECTORY_VARIABLE) and \
+            profiling_utils.profiles_directory() is None:
+        return zygote.client_command(service, args)
+    return ["python3", f"{service}", *args]
+
+
 def command_to_deploy_on_hpc_systems(logger, args, service,
                                      target_nodelist_from_xml,
                                      default_cosim_nodelist_for_service,):
@@ -60,10 +85,10 @@ def command_to_deploy_on_hpc_systems(logger, args, service,
     # command with target nodelist
     logger.debug(f"running command:{command}")
     # append the service specific arguments
-    command.extend(["python3", f"{service}"])
-    for arg in args[0]:
-        command.append(arg)
+    command.extend(python_command(service, args[0]))
     srun_command_with_args = default_srun_command + command
+    # the service is started under cProfile if profiling is enabled
+    srun_command_with_args = profiling_utils.profiled_command(srun_command_with_args)
     logger.debug(f"srun command with arguments:{srun_command_with_args}")
     return srun_command_with_args
 
@@ -72,10 +97,9 @@ def command_to_deploy_on_local_system(logger, args, service):
     command = []
     logger.debug(f"preparing command for {service} to deploy locally")
     # append the service arguments required to instantiate and run it
-    command.append("python3")
-    command.append(service)
-    for arg in args[0]:
-        command.append(arg)
+    command.extend(python_command(service, args[0]))
+    # the service is started under cProfile if profiling is enabled
+    command = profiling_utils.profiled_command(command)
     logger.debug(f"command with arguments:{command}")
     return command
 
@@ -117,10 +141,10 @@ def is_salloc(logger, n_nodes, node_range_length):
         logger.error('SLURM_NODELIST environment variable has not '
                      'been set yet, use "salloc"')
         return Response.ERROR
-    elif node_range_length == 1 and node_range_length != n_nodes:
+    elif node_range_length != n_nodes:
         # There is no match between SLURM_NNODES and SLURM_NODELIST
         logger.error('SLURM_NODELIST does not match with '
-                     'SLURM_NODELIST, it might be "salloc" failed')
+                     'SLURM_NNODES, it might be "salloc" failed')
         return Response.ERROR
 
     # otherwise, all is well and salloc is successful
@@ -129,11 +153,16 @@ def is_salloc(logger, n_nodes, node_range_length):
 
 # NOTE this function is adapted from
 # EBRAINS_ConfigManager/...variables_manager.py -> __creates_co_sim_vars_from_slurm_env_vars()
-def cosim_slurm_nodes_mapping(logger):
+def cosim_slurm_nodes_mapping(logger, exclude_unhealthy_nodes=True):
     """
         Populates the CO_SIM_* variables from the SLURM_* environment variables
         IMPORTANT: It is assumed that salloc has been executed and the resources
                     haven assigned properly (end-user task)
+
+        The unhealthy nodes are left out if exclude_unhealthy_nodes is set,
+        i.e. CO_SIM_SLURM_NODE_000, CO_SIM_SLURM_NODE_001, ... are the
+        healthy nodes (see node_health_utils, the nodes are probed once per
+        allocation).
     :return
         node id
     """
@@ -141,9 +170,6 @@ def cosim_slurm_nodes_mapping(logger):
     # No. of requested HPC nodes
     try:
         n_nodes = int(os.environ['SLURM_NNODES'])
-        cosim_slurm_nodes[variables.CO_SIM_SLURM_NNODES] = \
-            {constants.CO_SIM_VARIABLE_DESCRIPTION: 'SLURM_NNODES',
-                constants.CO_SIM_VARIABLE_VALUE: n_nodes}
     except KeyError:
         logger.exception('SLURM_NNODES environment variable has not been set yet, use "salloc"')
         return Response.ERROR
@@ -151,38 +177,28 @@ def cosim_slurm_nodes_mapping(logger):
     # Since SLURM_NNODES is set, meaning SLURM_NODELIST must be set as well,
     # e.g. SLURM_NODELIST=jsfc056       -> 1 Node
     #      SLURM_NODELIST=jsfc[056-057] -> 2 Nodes
-    slurm_node_list_prefix_and_range = re.split('\[|\]', os.environ['SLURM_NODELIST'])
-    node_range_length = len(slurm_node_list_prefix_and_range)
+    hostnames = hostlist_utils.expand_nodelist(os.environ.get('SLURM_NODELIST', ''))
 
     # check if salloc is successful
-    if is_salloc(logger, n_nodes, node_range_length) == Response.ERROR:
+    if is_salloc(logger, n_nodes, len(hostnames)) == Response.ERROR:
         # Case a: salloc is not successful
         return Response.ERROR
 
     # Case b: salloc is successful
-    if node_range_length == 1:
-        # only one HPC node is being used
-        #
-        # This is a wrong assignment: cosim_slurm_nodes['CO_SIM_SLURM_NODE_000'] = slurm_node_list_prefix_and_range[0]
-        #
-        # cosim_slurm_nodes['CO_SIM_SLURM_NODE_000'] = \
-        #     {constants.CO_SIM_VARIABLE_DESCRIPTION: 'SLURM compute node hostname',
-        #      constants.CO_SIM_VARIABLE_VALUE: slurm_node_list_prefix_and_range[0] }
-        cosim_slurm_nodes['CO_SIM_SLURM_NODE_000'] = slurm_node_list_prefix_and_range[0]
-    else:
-        # two or more HPC nodes have been allocated
-        hpc_nodes_name_prefix = slurm_node_list_prefix_and_range[0]
-        hpc_nodes_name_range = slurm_node_list_prefix_and_range[1]
-        nodes_name_suffix_list = re.split(r'-', hpc_nodes_name_range)
-        first_node_name_suffix = nodes_name_suffix_list[0]
-        last_node_name_suffix = nodes_name_suffix_list[1]
-
-        n_correlative = 0
-        for curr_n_node_name_suffix in range(int(first_node_name_suffix), int(last_node_name_suffix) + 1):
-            co_sim_slurm_node_variable_name = f'CO_SIM_SLURM_NODE_{n_correlative:0>3d}'
-            cosim_slurm_nodes[co_sim_slurm_node_variable_name] =\
-                f'{hpc_nodes_name_prefix}{curr_n_node_name_suffix:0>3d}'
-
-            n_correlative += 1
+    if exclude_unhealthy_nodes:
+        healthy_hostnames = node_health_utils.healthy_nodes(hostnames, logger)
+        if not healthy_hostnames:
+            logger.error('none of the allocated nodes is healthy')
+            return Response.ERROR
+        if len(healthy_hostnames) < len(hostnames):
+            logger.warning(f'{len(hostnames) - len(healthy_hostnames)} unhealthy nodes '
+                           f'are excluded, {len(healthy_hostnames)} nodes are used')
+        hostnames = healthy_hostnames
+
+    cosim_slurm_nodes[variables.CO_SIM_SLURM_NNODES] = \
+        {constants.CO_SIM_VARIABLE_DESCRIPTION: 'SLURM_NNODES',
+            constants.CO_SIM_VARIABLE_VALUE: len(hostnames)}
+    for n_correlative, hostname in enumerate(hostnames):
+        cosim_slurm_nodes[f'CO_SIM_SLURM_NODE_{n_correlative:0>3d}'] = hostname
 
     return cosim_slurm_nodes
@@ -12,7 +12,8 @@
 #       Team: Multi-scale Simulation and Design
 # -----------------------------------------------------------------------------
 
-from functools import reduce
+from collections.abc import Mapping
+from functools import lru_cache, reduce
 import operator
 
 
@@ -45,14 +46,7 @@ def set_in_dictionary(dictionary, key_list, new_value):
       TypeError: 'str' object does not support item assignment
      """
 
-    # get the nested sub_dictionary for the specified depth
-    nested_sub_dictionary = get_from_dictionary(dictionary, key_list[:-1])
-    try:
-        if nested_sub_dictionary[key_list[-1]]:
-            # Case: if the specified key exists
-            nested_sub_dictionary[key_list[-1]] = new_value
-    except (KeyError, TypeError, IndexError) as e:
-        raise e
+    compile_path(key_list).set(dictionary, new_value)
 
 
 def get_from_dictionary(dictionary, key_list):
@@ -74,7 +68,213 @@ def get_from_dictionary(dictionary, key_list):
     -------
     Returns the sub_dictionary matches with ``key_list``."""
 
-    try:
-        return reduce(operator.getitem, key_list, dictionary)
-    except (KeyError, TypeError, IndexError) as e:
-        raise e
+    # NOTE faster than compile_path(key_list).get(dictionary), which pays
+    # for the cache lookup on each call
+    return reduce(operator.getitem, key_list, dictionary)
+
+
+def _check_key_exists(node, key):
+    """helper function to raise as the lookup of a missing key would, the
+    key of a sequence is an index"""
+    if isinstance(node, Mapping):
+        if key not in node:
+            raise KeyError(key)
+    elif not -len(node) <= key < len(node):
+        raise IndexError(f'index {key} is out of range')
+
+
+class PathAccessor:
+    """Pre-compiled accessor for a nested path, see ``compile_path``.
+
+    Raises ``KeyError``, ``TypeError`` and ``IndexError`` exceptions as
+    ``get_from_dictionary`` and ``set_in_dictionary`` do.
+    """
+    __slots__ = ('key_path', '_parent_keys', '_last_key')
+
+    def __init__(self, key_path):
+        self.key_path = key_path
+        self._parent_keys = key_path[:-1]
+        self._last_key = key_path[-1] if key_path else None
+
+    def get(self, dictionary):
+        """returns the value for the path"""
+        for key in self.key_path:
+            dictionary = dictionary[key]
+        return dictionary
+
+    def set(self, dictionary, new_value):
+        """replaces the value for the path, the last key must already exist"""
+        for key in self._parent_keys:
+            dictionary = dictionary[key]
+        _check_key_exists(dictionary, self._last_key)
+        dictionary[self._last_key] = new_value
+
+
+@lru_cache(maxsize=1024)
+def _compile_key_path(key_path):
+    return PathAccessor(key_path)
+
+
+def compile_path(key_list):
+    """Returns the cached, pre-compiled accessor for the nested path.
+
+    Examples of usage:
+    >>> filename = compile_path(['handlers', 'info_file', 'filename'])
+    >>> filename.get(sample_dictionary)
+    'default_logs.log'
+    >>> filename.set(sample_dictionary, 'my_logs.log')
+
+    Parameters
+    ----------
+    key_list : list
+        the nested path, its keys must be hashable
+
+    Returns
+    -------
+    Returns the PathAccessor for the ``key_list``."""
+    return _compile_key_path(tuple(key_list))
+
+
+def _paths_to_tree(updates):
+    """helper function to merge the updated paths into a tree of keys,
+    where the leaves are wrapped into a (single element) tuple.
+
+    Raises ``KeyError`` exception if an updated path is nested into another
+    one, whatever their order."""
+    tree = {}
+    for key_list, new_value in updates.items():
+        if not key_list:
+            raise KeyError('empty path')
+        node = tree
+        for key in key_list[:-1]:
+            node = node.setdefault(key, {})
+            if isinstance(node, tuple):
+                raise KeyError(f'{key_list} is nested into an updated path')
+        if key_list[-1] in node:
+            raise KeyError(f'{key_list} has updated paths nested into it')
+        node[key_list[-1]] = (new_value,)
+    return tree
+
+
+def patch_dictionary(dictionary, updates):
+    """Replaces the values of several nested paths of the dictionary in one
+    traversal, where the common parents are visited only once.
+
+    Raises the same exceptions as ``set_in_dictionary``, where the
+    dictionary could be partially patched.
+
+    Examples of usage:
+    >>> patch_dictionary(sample_dictionary,
+    ...                  {('handlers', 'info_file', 'filename'): 'my_logs.log',
+    ...                   ('handlers', 'console', 'level'): 'DEBUG'})
+
+    Parameters
+    ----------
+    dictionary : dict
+        nested data structure to be patched
+
+    updates : dict
+        new values keyed by their nested path (tuple)
+    """
+    def patch(node, tree):
+        for key, subtree in tree.items():
+            if isinstance(subtree, tuple):
+                _check_key_exists(node, key)
+                node[key] = subtree[0]
+            else:
+                patch(node[key], subtree)
+
+    patch(dictionary, _paths_to_tree(updates))
+
+
+def patched_copy(dictionary, updates):
+    """Returns a copy-on-write variant of the dictionary with the nested
+    paths replaced, without modifying nor deep-copying the dictionary.
+    Only the dictionaries along the updated paths are copied, the rest of
+    the sub-dictionaries are shared with the original one, therefore the
+    variant must be treated as read-only (or patched again this way).
+
+    Raises the same exceptions as ``set_in_dictionary``.
+
+    Parameters
+    ----------
+    dictionary : dict
+        nested data structure, the base of the variant
+
+    updates : dict
+        new values keyed by their nested path (tuple)
+
+    Returns
+    -------
+    Returns the patched variant of the dictionary."""
+    def copy_on_write(node, tree):
+        node_copy = node.copy()
+        for key, subtree in tree.items():
+            if isinstance(subtree, tuple):
+                _check_key_exists(node_copy, key)
+                node_copy[key] = subtree[0]
+            else:
+                node_copy[key] = copy_on_write(node[key], subtree)
+        return node_copy
+
+    return copy_on_write(dictionary, _paths_to_tree(updates))
+
+
+def _check_paths_exist(node, tree):
+    """helper function to raise as ``patched_copy`` would if an updated path
+    (its last key included) is not found in the dictionary"""
+    for key, subtree in tree.items():
+        _check_key_exists(node, key)
+        if not isinstance(subtree, tuple):
+            _check_paths_exist(node[key], subtree)
+
+
+class DictionaryOverlay(Mapping):
+    """Read-only, copy-on-write view of a nested dictionary with some of its
+    nested paths replaced. The base dictionary is neither modified nor
+    copied, e.g. to keep per action variants of the log settings.
+
+    Raises the same exceptions as ``patched_copy`` when it is created.
+
+    Examples of usage:
+    >>> overlay = DictionaryOverlay(sample_dictionary,
+    ...                             {('handlers', 'info_file', 'filename'): 'action_004.log'})
+    >>> get_from_dictionary(overlay, ['handlers', 'info_file', 'filename'])
+    'action_004.log'
+    >>> overlay.to_dict()  # e.g. to be passed to logging.config.dictConfig
+    """
+
+    def __init__(self, base, updates=None, _tree=None):
+        self.__base = base
+        if _tree is None:
+            _tree = _paths_to_tree(updates or {})
+            # NOTE the nested overlays get an already checked subtree
+            _check_paths_exist(base, _tree)
+        self.__tree = _tree
+
+    def __getitem__(self, key):
+        if key not in self.__tree:
+            return self.__base[key]
+        subtree = self.__tree[key]
+        if isinstance(subtree, tuple):
+            return subtree[0]
+        return DictionaryOverlay(self.__base[key], _tree=subtree)
+
+    def __iter__(self):
+        return iter(self.__base)
+
+    def __len__(self):
+        return len(self.__base)
+
+    def to_dict(self):
+        """materializes the overlay (copying only the updated paths)"""
+        def materialize(node, tree):
+            node_copy = dict(node)
+            for key, subtree in tree.items():
+                if isinstance(subtree, tuple):
+                    node_copy[key] = subtree[0]
+                else:
+                    node_copy[key] = materialize(node[key], subtree)
+            return node_copy
+
+        return materialize(self.__base, self.__tree)
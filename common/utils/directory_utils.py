@@ -13,7 +13,9 @@
 # -----------------------------------------------------------------------------
 
 import os
+import time
 import errno
+import concurrent.futures
 
 
 def safe_makedir(target_directory):
@@ -44,5 +46,84 @@ def safe_makedir(target_directory):
             # Just re-raise the error for now.
             raise e
 
-        return target_directory
+    return target_directory
+
+
+def _existing_ancestor(directory):
+    """helper function to find the deepest existing ancestor directory"""
+    while not os.path.isdir(directory):
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            break
+        directory = parent
+    return directory
+
+
+def _mkdir(target_directory):
+    """helper function to create one directory, its parent must exist.
+
+    Returns True if the directory is created, False if it already exists."""
+    try:
+        os.mkdir(target_directory)
+        return True
+    except FileExistsError:
+        if os.path.isdir(target_directory):
+            # The directory already exists.
+            return False
+        # there exists some file with the same name as the target directory
+        raise
+
+
+def provision_directories(target_directories, max_workers=16):
+    """Creates a whole set of directories at once.
+
+    Meant for parallel file systems where every mkdir is a metadata round
+    trip: the directories and their parents are deduplicated, so that each
+    directory is created (or found existing) only once, and the directories
+    of the same depth are created in parallel, level by level.
+
+    Raises ``OSError`` exception if a directory could not be created e.g.
+    there exists some file with the same name.
+
+    Parameters
+    ----------
+    target_directories : iterable
+        The Names for the target directories
+
+    max_workers : int
+        maximum number of directories created at the same time
+
+    Returns
+    -------
+    report: dict
+        {'created': int, 'existing': int, 'elapsed': float (seconds)}
+    """
+    start = time.perf_counter()
+    target_directories = {os.path.abspath(target_directory)
+                          for target_directory in target_directories}
+    report = {'created': 0, 'existing': 0, 'elapsed': 0.0}
+    if not target_directories:
+        return report
+
+    # everything below the deepest existing common ancestor is to be created,
+    # it is the only place where the existence is checked up front
+    common_ancestor = _existing_ancestor(os.path.commonpath(target_directories))
+    if common_ancestor in target_directories:
+        # e.g. the only target directory exists already
+        report['existing'] += 1
+    directories_by_depth = {}
+    for target_directory in target_directories:
+        directory = target_directory
+        while directory != common_ancestor and \
+                os.path.dirname(directory) != directory:
+            directories_by_depth.setdefault(directory.count(os.sep), set()).add(directory)
+            directory = os.path.dirname(directory)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for depth in sorted(directories_by_depth):
+            for is_created in executor.map(_mkdir, sorted(directories_by_depth[depth])):
+                report['created' if is_created else 'existing'] += 1
+
+    report['elapsed'] = time.perf_counter() - start
+    return report
 
@@ -0,0 +1,106 @@
+# -----------------------------------------------------------------------------
+#  Copyright 2020 Forschungszentrum Jülich GmbH
+# "Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements; and to You under the Apache License,
+# Version 2.0. "
+#
+# Forschungszentrum Jülich
+#  Institute: Institute for Advanced Simulation (IAS)
+#    Section: Jülich Supercomputing Centre (JSC)
+#   Division: High Performance Computing in Neuroscience
+# Laboratory: Simulation Laboratory Neuroscience
+#       Team: Multi-scale Simulation and Design
+# -----------------------------------------------------------------------------
+import re
+
+
+def expand_nodelist(nodelist):
+    """Expands a SLURM nodelist into the list of hostnames.
+
+    Examples of usage:
+    >>> expand_nodelist('jsfc056')
+    ['jsfc056']
+    >>> expand_nodelist('jsfc[056-058,060],login01')
+    ['jsfc056', 'jsfc057', 'jsfc058', 'jsfc060', 'login01']
+
+    Parameters
+    ----------
+    nodelist : str
+        SLURM nodelist e.g. the value of SLURM_NODELIST
+
+    Returns
+    -------
+    hostnames: list
+        hostnames in the same order as in the nodelist
+    """
+    hostnames = []
+    # split on the commas which are not inside the brackets
+    for entry in re.findall(r'[^,\[]+(?:\[[^\]]*\])?[^,]*', nodelist):
+        match = re.match(r'^([^\[]*)\[([^\]]*)\](.*)$', entry)
+        if match is None:
+            hostnames.append(entry)
+            continue
+        prefix, node_ranges, suffix = match.groups()
+        for node_range in node_ranges.split(','):
+            first, _, last = node_range.partition('-')
+            last = last or first
+            # keep the zero padding of the range e.g. 056 -> 3 digits
+            width = len(first)
+            for number in range(int(first), int(last) + 1):
+                hostnames.append(f'{prefix}{number:0>{width}d}{suffix}')
+    return hostnames
+
+
+def compress_nodelist(hostnames):
+    """Compresses a list of hostnames into a SLURM nodelist, it is the
+    counterpart of ``expand_nodelist``.
+
+    Examples of usage:
+    >>> compress_nodelist(['jsfc056', 'jsfc057', 'jsfc058', 'jsfc060'])
+    'jsfc[056-058,060]'
+
+    Parameters
+    ----------
+    hostnames : list
+        hostnames to be compressed
+
+    Returns
+    -------
+    nodelist: str
+        SLURM nodelist
+    """
+    # group the numbered hostnames by prefix and width of the number,
+    # keeping the order in which the prefixes are found
+    groups = {}
+    for hostname in hostnames:
+        match = re.match(r'^(.*?)(\d+)$', hostname)
+        if match is None:
+            groups.setdefault((hostname, None), [])
+            continue
+        prefix, number = match.groups()
+        groups.setdefault((prefix, len(number)), []).append(int(number))
+
+    entries = []
+    for (prefix, width), numbers in groups.items():
+        if width is None:
+            entries.append(prefix)
+            continue
+        if len(numbers) == 1:
+            entries.append(f'{prefix}{numbers[0]:0>{width}d}')
+            continue
+        # collapse the consecutive numbers into ranges
+        node_ranges = []
+        numbers = sorted(set(numbers))
+        first = last = numbers[0]
+        for number in numbers[1:] + [None]:
+            if number is not None and number == last + 1:
+                last = number
+                continue
+            if first == last:
+                node_ranges.append(f'{first:0>{width}d}')
+            else:
+                node_ranges.append(f'{first:0>{width}d}-{last:0>{width}d}')
+            if number is not None:
+                first = last = number
+        entries.append(f'{prefix}[{",".join(node_ranges)}]')
+    return ','.join(entries)
@@ -0,0 +1,154 @@
+# -----------------------------------------------------------------------------
+#  Copyright 2020 Forschungszentrum Jülich GmbH
+# "Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements; and to You under the Apache License,
+# Version 2.0. "
+#
+# Forschungszentrum Jülich
+#  Institute: Institute for Advanced Simulation (IAS)
+#    Section: Jülich Supercomputing Centre (JSC)
+#   Division: High Performance Computing in Neuroscience
+# Laboratory: Simulation Laboratory Neuroscience
+#       Team: Multi-scale Simulation and Design
+# -----------------------------------------------------------------------------
+import os
+import sys
+import json
+import tempfile
+import subprocess
+import concurrent.futures
+
+
+# directory of the cached probe results, default is the temporary directory.
+# NOTE it is set to the (shared) output directory by the MS Manager, i.e. the
+# results are shared by the launcher and its children on the other nodes
+NODE_HEALTH_CACHE_DIRECTORY_VARIABLE = 'CO_SIM_NODE_HEALTH_CACHE_DIR'
+
+# default thresholds of a healthy node
+MIN_AVAILABLE_MEMORY_MB = 1024
+MIN_SCRATCH_SPACE_MB = 1024
+MAX_LOAD_PER_CPU = 2.0
+PROBE_TIMEOUT = 20.0
+
+# run on the probed node, it prints the health metrics of the node as JSON.
+# NOTE the load is one of the whole node, so are the CPUs, not only the ones
+# of the probe step (--ntasks=1)
+_PROBE_SCRIPT = """
+import os, json, shutil, socket
+meminfo = dict(line.split(':', 1) for line in open('/proc/meminfo'))
+scratch = os.environ.get('TMPDIR') or '/tmp'
+print(json.dumps({'hostname': socket.gethostname(),
+                  'available_memory_mb': int(meminfo['MemAvailable'].split()[0]) // 1024,
+                  'scratch': scratch,
+                  'scratch_space_mb': shutil.disk_usage(scratch).free // 2**20,
+                  'load': os.getloadavg()[0],
+                  'cpus': os.cpu_count()}))
+"""
+
+
+def probe_command(hostname, is_slurm):
+    """returns the command to probe the node, by means of srun within an allocation"""
+    command = [sys.executable if not is_slurm else 'python3', '-c', _PROBE_SCRIPT]
+    if not is_slurm:
+        return command
+    # NOTE --overlap lets the probe run next to the steps already running
+    return ['srun', '--nodes=1', '--ntasks=1', '--overlap',
+            f'--nodelist={hostname}'] + command
+
+
+def probe_node(hostname, is_slurm=True, timeout=PROBE_TIMEOUT,
+               min_available_memory_mb=MIN_AVAILABLE_MEMORY_MB,
+               min_scratch_space_mb=MIN_SCRATCH_SPACE_MB,
+               max_load_per_cpu=MAX_LOAD_PER_CPU):
+    """
+    probes the node for responsiveness, available memory, scratch space
+    and load.
+
+    Returns
+    ------
+        result: dict
+            is_healthy, reasons (why it is not healthy) and the metrics
+    """
+    try:
+        completed = subprocess.run(probe_command(hostname, is_slurm), capture_output=True,
+                                   timeout=timeout, check=True)
+        metrics = json.loads(completed.stdout.decode().strip().splitlines()[-1])
+    except subprocess.TimeoutExpired:
+        return {'is_healthy': False, 'reasons': [f'not responding within {timeout}s']}
+    except subprocess.CalledProcessError as e:
+        error = e.stderr.decode(errors='replace').strip().splitlines()
+        return {'is_healthy': False,
+                'reasons': [f'probe failed: {error[-1] if error else e.returncode}']}
+    except (OSError, ValueError, IndexError) as e:
+        return {'is_healthy': False, 'reasons': [f'probe failed: {e}']}
+
+    reasons = []
+    if metrics['available_memory_mb'] < min_available_memory_mb:
+        reasons.append(f"{metrics['available_memory_mb']}MB of memory available")
+    if metrics['scratch_space_mb'] < min_scratch_space_mb:
+        reasons.append(f"{metrics['scratch_space_mb']}MB free in {metrics['scratch']}")
+    if metrics['load'] > max_load_per_cpu * metrics['cpus']:
+        reasons.append(f"load {metrics['load']:.1f} on {metrics['cpus']} CPUs")
+    return {'is_healthy': not reasons, 'reasons': reasons, 'metrics': metrics}
+
+
+def cache_file(job_id):
+    """returns the file where the probe results of the allocation are cached"""
+    directory = os.environ.get(NODE_HEALTH_CACHE_DIRECTORY_VARIABLE) or tempfile.gettempdir()
+    return os.path.join(directory, f'cosim_node_health.{job_id}.json')
+
+
+def _load_cache(job_id):
+    try:
+        with open(cache_file(job_id)) as json_file:
+            return json.load(json_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _store_cache(job_id, results):
+    """helper function to write the cache atomically, it is best effort"""
+    target = cache_file(job_id)
+    try:
+        with tempfile.NamedTemporaryFile('w', dir=os.path.dirname(target),
+                                         delete=False) as json_file:
+            json.dump(results, json_file, indent=2)
+        os.replace(json_file.name, target)
+    except OSError:
+        pass
+
+
+def probe_nodes(hostnames, logger, is_slurm=True, max_workers=32, **thresholds):
+    """
+    probes the nodes in parallel. The results are cached for the lifetime
+    of the allocation (keyed by SLURM_JOB_ID), i.e. a node is probed once.
+
+    Returns
+    ------
+        results: dict
+            result of probe_node keyed by hostname
+    """
+    job_id = os.environ.get('SLURM_JOB_ID') or os.environ.get('SLURM_JOBID')
+    results = _load_cache(job_id) if job_id else {}
+    to_be_probed = [hostname for hostname in hostnames if hostname not in results]
+    if to_be_probed:
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=min(max_workers, len(to_be_probed)),
+                thread_name_prefix='NodeHealthProbe') as executor:
+            for hostname, result in zip(to_be_probed, executor.map(
+                    lambda hostname: probe_node(hostname, is_slurm, **thresholds),
+                    to_be_probed)):
+                results[hostname] = result
+        if job_id:
+            _store_cache(job_id, results)
+    for hostname in hostnames:
+        if not results[hostname]['is_healthy']:
+            logger.warning(f'node {hostname} is unhealthy: '
+                           f"{', '.join(results[hostname]['reasons'])}")
+    return {hostname: results[hostname] for hostname in hostnames}
+
+
+def healthy_nodes(hostnames, logger, **kwargs):
+    """returns the healthy nodes in the given order, see probe_nodes"""
+    results = probe_nodes(hostnames, logger, **kwargs)
+    return [hostname for hostname in hostnames if results[hostname]['is_healthy']]
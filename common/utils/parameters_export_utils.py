@@ -0,0 +1,96 @@
+# -----------------------------------------------------------------------------
+#  Copyright 2020 Forschungszentrum Jülich GmbH
+# "Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements; and to You under the Apache License,
+# Version 2.0. "
+#
+# Forschungszentrum Jülich
+#  Institute: Institute for Advanced Simulation (IAS)
+#    Section: Jülich Supercomputing Centre (JSC)
+#   Division: High Performance Computing in Neuroscience
+# Laboratory: Simulation Laboratory Neuroscience
+#       Team: Multi-scale Simulation and Design
+# -----------------------------------------------------------------------------
+import os
+import json
+import tempfile
+
+
+def _fsync_directory(directory):
+    """helper function to persist the rename in the directory entry"""
+    directory_fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(directory_fd)
+    finally:
+        os.close(directory_fd)
+
+
+def _current_umask():
+    """helper function to read the umask, without changing it if possible
+    (os.umask sets it, which races with the other threads)"""
+    try:
+        with open('/proc/self/status') as status_file:
+            for line in status_file:
+                if line.startswith('Umask:'):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError):
+        pass
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return umask
+
+
+def write_atomically(target_file, write, mode='w'):
+    """Writes into a temporary file next to the target file, which is then
+    flushed, fsync'ed and renamed into the target file, so that the target
+    file is either the old one or the complete new one, never truncated.
+
+    Parameters
+    ----------
+    target_file : str
+        path and filename of the file to be written
+
+    write : callable
+        called as write(file_object) to write the content
+
+    mode : str
+        'w' for text or 'wb' for binary content
+    """
+    directory = os.path.dirname(os.path.abspath(target_file))
+    fd, temporary_file = tempfile.mkstemp(
+        dir=directory, prefix=f'.{os.path.basename(target_file)}.', suffix='.tmp')
+    try:
+        # NOTE mkstemp creates it 0600, the target gets the mode of a file
+        # created by open() instead, e.g. readable by the group
+        os.fchmod(fd, 0o666 & ~_current_umask())
+        with os.fdopen(fd, mode) as file_object:
+            write(file_object)
+            file_object.flush()
+            os.fsync(file_object.fileno())
+        os.replace(temporary_file, target_file)
+    except BaseException:
+        os.unlink(temporary_file)
+        raise
+    _fsync_directory(directory)
+
+
+def write_json(parameters, target_file, chunk_size=1 << 16):
+    """Streams the parameters as JSON, i.e. the encoded chunks are written as
+    they are produced instead of building the whole document in memory.
+    The file is written atomically (see ``write_atomically``).
+
+    Raises ``OSError`` and ``TypeError`` (not serializable) exceptions.
+    """
+    def write(file_object):
+        buffer = []
+        buffered = 0
+        for chunk in json.JSONEncoder().iterencode(parameters):
+            buffer.append(chunk)
+            buffered += len(chunk)
+            if buffered >= chunk_size:
+                file_object.write(''.join(buffer))
+                buffer = []
+                buffered = 0
+        file_object.write(''.join(buffer))
+
+    write_atomically(target_file, write)
@@ -0,0 +1,247 @@
+# -----------------------------------------------------------------------------
+#  Copyright 2020 Forschungszentrum Jülich GmbH
+# "Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements; and to You under the Apache License,
+# Version 2.0. "
+#
+# Forschungszentrum Jülich
+#  Institute: Institute for Advanced Simulation (IAS)
+#    Section: Jülich Supercomputing Centre (JSC)
+#   Division: High Performance Computing in Neuroscience
+# Laboratory: Simulation Laboratory Neuroscience
+#       Team: Multi-scale Simulation and Design
+# -----------------------------------------------------------------------------
+"""
+Opt-in profiling of the launcher and the Python actions and services.
+
+The profiles directory is passed down to the children by means of the
+CO_SIM_PROFILE_DIR environment variable, the Python children are then
+started under cProfile (see ``profiled_command``).
+
+Usage (summary of the profiles):
+    python3 profiling_utils.py <profiles directory> [--top 20] [--sort cumulative]
+"""
+import io
+import os
+import re
+import sys
+import pstats
+import cProfile
+import argparse
+import itertools
+import tracemalloc
+
+
+PROFILE_DIRECTORY_VARIABLE = 'CO_SIM_PROFILE_DIR'
+PROFILE_MEMORY_VARIABLE = 'CO_SIM_PROFILE_MEMORY'
+SUMMARY_FILENAME = 'profiles_summary.txt'
+
+_PYTHON_INTERPRETER = re.compile(r'^python(\d+(\.\d+)?)?$')
+# interpreter options taking a value, e.g. -W error
+_PYTHON_OPTIONS_WITH_VALUE = ('-W', '-X', '-Q')
+# the profiled child names its profile after its rank and PID, since one
+# command line may start many tasks, e.g. srun -n 4 python3 ...
+_PROFILED_CHILD_SCRIPT = (
+    'import os, sys, cProfile; '
+    'sys.argv[1:1] = ["-o", "%s-%s-%d.prof" % ({prefix!r}, '
+    'os.environ.get("SLURM_PROCID", "0"), os.getpid())]; '
+    'cProfile.main()')
+
+# the active profiles of this process, the innermost one is the last one
+_active_profiles = []
+# numbering of the profiled children started by this process
+_children_counter = itertools.count()
+
+
+def profiles_directory():
+    """returns the profiles directory if profiling is enabled, None otherwise"""
+    return os.environ.get(PROFILE_DIRECTORY_VARIABLE) or None
+
+
+def enable_profiling(directory, trace_memory=False):
+    """
+    enables the profiling of this process and of its children, which write
+    their profiles into the given directory.
+
+    Returns
+    ------
+        directory: str
+            absolute path of the profiles directory
+    """
+    directory = os.path.abspath(directory)
+    os.makedirs(directory, exist_ok=True)
+    os.environ[PROFILE_DIRECTORY_VARIABLE] = directory
+    if trace_memory:
+        os.environ[PROFILE_MEMORY_VARIABLE] = '1'
+    return directory
+
+
+class Profile:
+    """
+        cProfile (and optionally tracemalloc) profile of a part of the
+        process, dumped into <profiles directory>/<name>.<PID>.prof once
+        stopped. It does nothing unless profiling is enabled.
+
+        Profiles can be nested, e.g. the phases of the Launching Manager
+        within the run of the MS Manager, the outer one is then paused
+        while the inner one is running, i.e. each phase is accounted once.
+
+    Methods:
+    --------
+        start()
+        stop()
+            stops the profile and dumps it
+    """
+
+    def __init__(self, name):
+        self.__name = name
+        self.__directory = profiles_directory()
+        self.__profiler = None
+        self.__is_tracing_memory = False
+
+    def start(self):
+        if self.__directory is None:
+            return
+        if _active_profiles:
+            # NOTE only one profiler can be active at a time
+            _active_profiles[-1].disable()
+        self.__profiler = cProfile.Profile()
+        _active_profiles.append(self.__profiler)
+        if os.environ.get(PROFILE_MEMORY_VARIABLE) and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.__is_tracing_memory = True
+        self.__profiler.enable()
+
+    def stop(self):
+        if self.__profiler is None:
+            return None
+        self.__profiler.disable()
+        _active_profiles.remove(self.__profiler)
+        if _active_profiles:
+            _active_profiles[-1].enable()
+        profile_file = os.path.join(self.__directory, f'{self.__name}.{os.getpid()}.prof')
+        self.__profiler.dump_stats(profile_file)
+        self.__profiler = None
+        if self.__is_tracing_memory:
+            self.__dump_memory_statistics()
+        return profile_file
+
+    def __dump_memory_statistics(self, top_n=30):
+        """helper function to write the top memory allocations"""
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.__is_tracing_memory = False
+        memory_file = os.path.join(self.__directory, f'{self.__name}.{os.getpid()}.memory.txt')
+        with open(memory_file, 'w') as text_file:
+            text_file.write(f'peak traced memory: {peak} bytes\n')
+            for statistic in snapshot.statistics('lineno')[:top_n]:
+                text_file.write(f'{statistic}\n')
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+        return False
+
+
+def profiled_command(command):
+    """
+    returns the command to start a Python child under cProfile, e.g.
+    ['srun', ..., 'python3', 'service.py', ...] becomes
+    ['srun', ..., 'python3', '-c', <cProfile wrapper>, 'service.py', ...].
+    Each task writes <profiles directory>/<script>.<N>-<rank>-<PID>.prof, i.e.
+    the ranks started by the same command line do not overwrite each other.
+    The command is returned as it is, if profiling is not enabled or the
+    child is not a Python one.
+    """
+    directory = profiles_directory()
+    if directory is None:
+        return command
+    command = list(command)
+    for index, argument in enumerate(command):
+        if _PYTHON_INTERPRETER.match(os.path.basename(str(argument))):
+            break
+    else:
+        return command
+
+    # skip the options of the interpreter up to the script or -m module
+    index += 1
+    while index < len(command):
+        argument = str(command[index])
+        if argument in ('-m', '-c') or not argument.startswith('-'):
+            break
+        index += 2 if argument in _PYTHON_OPTIONS_WITH_VALUE else 1
+    # NOTE a -c child is either profiled already or cannot be profiled
+    if (index >= len(command) or command[index] == '-c'
+            or command[index:index + 2] == ['-m', 'cProfile']):
+        return command
+
+    target = str(command[index + 1] if command[index] == '-m' else command[index])
+    stem = os.path.splitext(os.path.basename(target))[0] or 'python'
+    profile_prefix = os.path.join(
+        directory, f'{stem}.{os.getpid()}-{next(_children_counter)}')
+    return (command[:index]
+            + ['-c', _PROFILED_CHILD_SCRIPT.format(prefix=profile_prefix)]
+            + command[index:])
+
+
+def summarize_profiles(directory, top_n=20, sort_key='cumulative'):
+    """
+    merges the profiles written by each process and writes the top-N
+    hotspots per process into <directory>/profiles_summary.txt.
+
+    NOTE the process is taken from the filename, i.e. <name>.<process>.prof
+
+    Returns
+    ------
+        summary_file: str
+    """
+    profiles_by_process = {}
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith('.prof'):
+            continue
+        name, _, process = filename[:-len('.prof')].rpartition('.')
+        profiles_by_process.setdefault(process, []).append(
+            (name, os.path.join(directory, filename)))
+
+    summary_file = os.path.join(directory, SUMMARY_FILENAME)
+    with open(summary_file, 'w') as text_file:
+        for process, profiles in profiles_by_process.items():
+            names = ', '.join(name for name, _ in profiles)
+            text_file.write(f'{"=" * 79}\nprocess {process}: {names}\n{"=" * 79}\n')
+            stream = io.StringIO()
+            try:
+                statistics = pstats.Stats(*[profile_file for _, profile_file in profiles],
+                                          stream=stream)
+            except (OSError, TypeError, EOFError) as e:
+                # e.g. a child killed while writing its profile
+                text_file.write(f'profiles cannot be read: {e}\n\n')
+                continue
+            statistics.strip_dirs().sort_stats(sort_key).print_stats(top_n)
+            text_file.write(stream.getvalue())
+    return summary_file
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('directory', nargs='?', default=profiles_directory(),
+                        help=f'profiles directory, default is ${PROFILE_DIRECTORY_VARIABLE}')
+    parser.add_argument('--top', type=int, default=20,
+                        help='number of hotspots per process')
+    parser.add_argument('--sort', default='cumulative',
+                        help='sort key of the hotspots e.g. cumulative, tottime, ncalls')
+    args = parser.parse_args(argv)
+    if not args.directory:
+        parser.error('the profiles directory is missing')
+
+    with open(summarize_profiles(args.directory, args.top, args.sort)) as text_file:
+        print(text_file.read())
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
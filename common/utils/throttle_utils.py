@@ -0,0 +1,210 @@
+# -----------------------------------------------------------------------------
+#  Copyright 2020 Forschungszentrum Jülich GmbH
+# "Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements; and to You under the Apache License,
+# Version 2.0. "
+#
+# Forschungszentrum Jülich
+#  Institute: Institute for Advanced Simulation (IAS)
+#    Section: Jülich Supercomputing Centre (JSC)
+#   Division: High Performance Computing in Neuroscience
+# Laboratory: Simulation Laboratory Neuroscience
+#       Team: Multi-scale Simulation and Design
+# -----------------------------------------------------------------------------
+import os
+import time
+import random
+import threading
+
+
+# launch throttle settings, i.e. the CO_SIM_LAUNCH_* parameters of the action
+# plan, which are passed down to the children as environment variables
+LAUNCH_RATE = 'CO_SIM_LAUNCH_RATE'        # launches per second, 0 means unlimited
+LAUNCH_BURST = 'CO_SIM_LAUNCH_BURST'      # launches allowed at once
+LAUNCH_STAGGER = 'CO_SIM_LAUNCH_STAGGER'  # seconds between the first launches on each node
+LAUNCH_JITTER = 'CO_SIM_LAUNCH_JITTER'    # maximum random delay in seconds
+LAUNCH_SETTINGS = (LAUNCH_RATE, LAUNCH_BURST, LAUNCH_STAGGER, LAUNCH_JITTER)
+
+
+class TokenBucket:
+    """
+        Token bucket, i.e. up to ``burst`` acquisitions at once and then
+        ``rate`` acquisitions per second on average.
+    """
+
+    def __init__(self, rate, burst=1, clock=time.monotonic):
+        self.__rate = float(rate)
+        self.__burst = max(float(burst), 1.0)
+        self.__clock = clock
+        self.__tokens = self.__burst
+        self.__last_refill = clock()
+        self.__lock = threading.Lock()
+
+    def reserve(self):
+        """
+        takes one token, possibly borrowed from the future.
+
+        Returns
+        ------
+            delay: float
+                seconds to wait before the token is really available
+        """
+        with self.__lock:
+            now = self.__clock()
+            self.__tokens = min(self.__burst,
+                                self.__tokens + (now - self.__last_refill) * self.__rate)
+            self.__last_refill = now
+            self.__tokens -= 1
+            if self.__tokens >= 0:
+                return 0.0
+            # NOTE the waiters queue up in order, i.e. the debt is shared
+            return -self.__tokens / self.__rate
+
+
+class LaunchThrottle:
+    """
+        Paces the launches by means of a token bucket, optionally staggering
+        the first launches on each node and adding some random jitter, so
+        that e.g. slurmctld and the shared file system are not flooded.
+
+    Methods:
+    --------
+        acquire(node=None)
+            waits until the launch is allowed, returns the waited seconds
+        report()
+            statistics of the waits
+    """
+
+    def __init__(self, rate=0.0, burst=1, stagger=0.0, jitter=0.0,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.__bucket = TokenBucket(rate, burst, clock) if rate > 0 else None
+        self.__stagger = stagger
+        self.__jitter = jitter
+        self.__clock = clock
+        self.__sleep = sleep
+        # time of the first launch, the staggering is relative to it
+        self.__start = None
+        # order of the first launch on each node
+        self.__nodes = {}
+        self.__lock = threading.Lock()
+        self.__waits = []
+
+    @property
+    def is_enabled(self):
+        return self.__bucket is not None or self.__stagger > 0 or self.__jitter > 0
+
+    def acquire(self, node=None):
+        """
+        waits until the launch is allowed.
+
+        Parameters
+        ----------
+            node: str
+                node where the launch happens, if staggering per node
+
+        Returns
+        ------
+            waited: float
+                seconds waited for the launch
+        """
+        if not self.is_enabled:
+            return 0.0
+        start = self.__clock()
+        delay = self.__bucket.reserve() if self.__bucket is not None else 0.0
+        if self.__stagger > 0 and node is not None:
+            with self.__lock:
+                if self.__start is None:
+                    self.__start = start
+                node_index = self.__nodes.setdefault(node, len(self.__nodes))
+            not_before = self.__start + node_index * self.__stagger
+            delay = max(delay, not_before - start)
+        if self.__jitter > 0:
+            delay += random.uniform(0, self.__jitter)
+        if delay > 0:
+            self.__sleep(delay)
+        waited = self.__clock() - start
+        with self.__lock:
+            self.__waits.append(waited)
+        return waited
+
+    def report(self):
+        """
+        Returns
+        ------
+            report: dict
+                number of launches and the total, mean and maximum waits
+        """
+        with self.__lock:
+            waits = list(self.__waits)
+        return {'launches': len(waits),
+                'total_wait': sum(waits),
+                'mean_wait': sum(waits) / len(waits) if waits else 0.0,
+                'max_wait': max(waits, default=0.0)}
+
+
+def launch_settings_from_parameters(parameters_dict):
+    """
+    returns the launch throttle settings found in the parameters of the
+    action plan, as strings keyed by the CO_SIM_LAUNCH_* names.
+
+    Raises ``ValueError`` exception if a setting is not a number.
+    """
+    settings = {}
+    for name in LAUNCH_SETTINGS:
+        value = parameters_dict.get(name)
+        if value in (None, ''):
+            continue
+        if float(value) < 0:
+            raise ValueError(f'{name} must not be negative: {value}')
+        settings[name] = str(value)
+    return settings
+
+
+def launch_throttle_from_settings(settings):
+    """returns the LaunchThrottle for the CO_SIM_LAUNCH_* settings"""
+    rate = float(settings.get(LAUNCH_RATE) or 0)
+    return LaunchThrottle(rate=rate,
+                          # by default, one second worth of launches at once
+                          burst=float(settings.get(LAUNCH_BURST) or max(rate, 1)),
+                          stagger=float(settings.get(LAUNCH_STAGGER) or 0),
+                          jitter=float(settings.get(LAUNCH_JITTER) or 0))
+
+
+_launch_throttle = None
+_launch_throttle_lock = threading.Lock()
+
+
+def get_launch_throttle():
+    """
+    returns the launch throttle of this process, set up from the
+    CO_SIM_LAUNCH_* environment variables on the first call.
+
+    NOTE each process paces its own launches
+    """
+    global _launch_throttle
+    with _launch_throttle_lock:
+        if _launch_throttle is None:
+            try:
+                _launch_throttle = launch_throttle_from_settings(os.environ)
+            except ValueError:
+                # wrong settings, the launches are not paced
+                _launch_throttle = LaunchThrottle()
+        return _launch_throttle
+
+
+def configure_launch_throttle(settings):
+    """
+    sets up the launch throttle of this process for the CO_SIM_LAUNCH_*
+    settings, which are exported to the children as well.
+
+    Returns
+    ------
+        launch_throttle: LaunchThrottle
+    """
+    global _launch_throttle
+    for name in LAUNCH_SETTINGS:
+        os.environ.pop(name, None)
+    os.environ.update(settings)
+    with _launch_throttle_lock:
+        _launch_throttle = launch_throttle_from_settings(settings)
+        return _launch_throttle
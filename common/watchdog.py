@@ -0,0 +1,253 @@
+# ------------------------------------------------------------------------------
+#  Copyright 2020 Forschungszentrum Jülich GmbH and Aix-Marseille Université
+# "Licensed to the Apache Software Foundation (ASF) under one or more contributor
+#  license agreements; and to You under the Apache License, Version 2.0. "
+#
+# Forschungszentrum Jülich
+#  Institute: Institute for Advanced Simulation (IAS)
+#    Section: Jülich Supercomputing Centre (JSC)
+#   Division: High Performance Computing in Neuroscience
+# Laboratory: Simulation Laboratory Neuroscience
+#       Team: Multi-scale Simulation and Design
+#
+# ------------------------------------------------------------------------------
+import os
+import time
+import heapq
+import signal
+import itertools
+import threading
+
+
+def _read_stat(pid):
+    """
+    helper function which returns the parent PID and the start time (clock
+    ticks since boot) of the process, read from /proc, or None if it is gone
+    """
+    try:
+        with open(f'/proc/{pid}/stat') as stat_file:
+            # NOTE the command name could contain spaces, skip it
+            fields = stat_file.read().rpartition(')')[2].split()
+        return int(fields[1]), int(fields[19])
+    except (OSError, ValueError, IndexError):
+        # e.g. the process is gone meanwhile
+        return None
+
+
+def descendants(pid):
+    """
+    returns the descendants of the process, read from /proc
+
+    Returns
+    ------
+        processes: list
+            (PID, start time) of the children first, then of their children
+            and so on, the start time tells a reused PID apart
+    """
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        stat = _read_stat(entry)
+        if stat is None:
+            continue
+        ppid, start_time = stat
+        children.setdefault(ppid, []).append((int(entry), start_time))
+    processes = []
+    parents = [pid]
+    while parents:
+        for child in children.get(parents.pop(0), []):
+            processes.append(child)
+            parents.append(child[0])
+    return processes
+
+
+def process_target(process):
+    """
+    returns the target to signal the process, anything with a
+    send_signal method e.g. a SpawnedProcess or a Popen object
+    """
+    def send_signal(signal_number):
+        process.send_signal(signal_number)
+    return send_signal
+
+
+def new_descendants_target(pid=None):
+    """
+    returns the target to signal the descendants of the process (this one
+    by default) started from now on, i.e. the processes of the action when
+    it is started by someone else e.g. the spawners or the RichEndpoint
+    launcher.
+    """
+    pid = os.getpid() if pid is None else pid
+    known_processes = set(descendants(pid))
+
+    def send_signal(signal_number):
+        for descendant in descendants(pid):
+            if descendant in known_processes:
+                continue
+            descendant_pid, start_time = descendant
+            stat = _read_stat(descendant_pid)
+            if stat is None or stat[1] != start_time:
+                # gone meanwhile, the PID could be reused by someone else
+                continue
+            try:
+                os.kill(descendant_pid, signal_number)
+            except ProcessLookupError:
+                pass
+    return send_signal
+
+
+class Watch:
+    """
+        Walltime limit of an action (or event) being watched, cancel it once
+        the action finished. timed_out is set once the deadline has passed.
+
+        reason is set if the action is to be terminated right away (see
+        Watchdog.terminate), e.g. its output shows it is broken.
+    """
+    __slots__ = ('name', 'timeout', 'target', 'reason', 'timed_out', 'is_cancelled')
+
+    def __init__(self, name, timeout, target, reason=None):
+        self.name = name
+        self.timeout = timeout
+        self.target = target
+        self.reason = reason
+        self.timed_out = False
+        self.is_cancelled = False
+
+    def cancel(self):
+        self.is_cancelled = True
+
+
+class Watchdog:
+    """
+        Enforces the walltime limits of the actions and events from one
+        thread, which sleeps until the nearest deadline whatever the number
+        of watches.
+
+        Once its deadline has passed, the target of the watch is terminated
+        (SIGTERM), then killed (SIGKILL) if the watch is not cancelled within
+        ``grace_period`` seconds, i.e. the action has not finished yet.
+
+    Methods:
+    --------
+        watch(name, timeout, target)
+            starts watching, returns the Watch to be cancelled
+        terminate(name, target, reason)
+            terminates right away, then kills if needed
+        stop()
+    """
+
+    def __init__(self, logger, grace_period=5.0):
+        self.__logger = logger
+        self.__grace_period = grace_period
+        # (deadline, order, signal_number, watch)
+        self.__deadlines = []
+        self.__order = itertools.count()
+        self.__condition = threading.Condition()
+        self.__thread = None
+        self.__is_stopped = False
+
+    def watch(self, name, timeout, target):
+        """
+        Parameters
+        ----------
+            name: str
+                e.g. the action XML ID, for the logs
+            timeout: float
+                seconds, None means no limit
+            target: callable
+                called as target(signal_number), see process_target and
+                new_descendants_target
+
+        Returns
+        ------
+            watch: Watch
+        """
+        watch = Watch(name, timeout, target)
+        if timeout is None:
+            return watch
+        self.__push(watch)
+        return watch
+
+    def terminate(self, name, target, reason):
+        """
+        terminates the target right away and kills it after the grace
+        period, unless the returned watch is cancelled meanwhile.
+
+        Returns
+        ------
+            watch: Watch
+        """
+        watch = Watch(name, 0, target, reason)
+        self.__push(watch)
+        return watch
+
+    def __push(self, watch):
+        """helper function to add the deadline of the watch"""
+        with self.__condition:
+            if self.__thread is None:
+                self.__is_stopped = False
+                self.__thread = threading.Thread(target=self.__run, name='Watchdog',
+                                                 daemon=True)
+                self.__thread.start()
+            heapq.heappush(self.__deadlines, (time.monotonic() + watch.timeout,
+                                              next(self.__order), signal.SIGTERM, watch))
+            self.__condition.notify()
+
+    def __run(self):
+        with self.__condition:
+            while not self.__is_stopped:
+                if not self.__deadlines:
+                    self.__condition.wait()
+                    continue
+                deadline, _, signal_number, watch = self.__deadlines[0]
+                if watch.is_cancelled:
+                    heapq.heappop(self.__deadlines)
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining > 0:
+                    self.__condition.wait(remaining)
+                    continue
+                heapq.heappop(self.__deadlines)
+                self.__expire(watch, signal_number)
+                # NOTE outside the lock, the target could take a while (e.g.
+                # scanning /proc) and the watches are not to wait for it
+                self.__condition.release()
+                try:
+                    self.__signal(watch, signal_number)
+                finally:
+                    self.__condition.acquire()
+
+    def __expire(self, watch, signal_number):
+        """helper function to escalate the watch once the deadline has passed"""
+        if signal_number == signal.SIGTERM:
+            if watch.reason is None:
+                watch.timed_out = True
+                self.__logger.error(f'<{watch.name}> timed out after {watch.timeout}s, '
+                                    'terminating it')
+            else:
+                self.__logger.error(f'<{watch.name}> {watch.reason}, terminating it')
+            # escalate unless it finished meanwhile
+            heapq.heappush(self.__deadlines, (time.monotonic() + self.__grace_period,
+                                              next(self.__order), signal.SIGKILL, watch))
+        else:
+            self.__logger.error(f'<{watch.name}> is still running {self.__grace_period}s '
+                                'after being terminated, killing it')
+
+    def __signal(self, watch, signal_number):
+        """helper function to signal the target of the watch"""
+        try:
+            watch.target(signal_number)
+        except OSError as e:
+            self.__logger.error(f'<{watch.name}> could not be signalled: {e}')
+
+    def stop(self):
+        with self.__condition:
+            self.__is_stopped = True
+            self.__deadlines.clear()
+            self.__condition.notify()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
@@ -0,0 +1,408 @@
+# ------------------------------------------------------------------------------
+#  Copyright 2020 Forschungszentrum Jülich GmbH and Aix-Marseille Université
+# "Licensed to the Apache Software Foundation (ASF) under one or more contributor
+#  license agreements; and to You under the Apache License, Version 2.0. "
+#
+# Forschungszentrum Jülich
+#  Institute: Institute for Advanced Simulation (IAS)
+#    Section: Jülich Supercomputing Centre (JSC)
+#   Division: High Performance Computing in Neuroscience
+# Laboratory: Simulation Laboratory Neuroscience
+#       Team: Multi-scale Simulation and Design
+#
+# ------------------------------------------------------------------------------
+"""
+Per-node zygote, which preloads the (heavy) modules of the Python services
+once and forks each service on request, instead of starting each one by a
+cold 'python3 <service>'.
+
+A service is started by the client, a tiny process taking the place of the
+service: it hands its stdin/stdout/stderr over to the zygote, which forks
+the service with them, then the client forwards the signals to the service
+and exits with its return code. If there is no zygote on the node, the
+client starts the service the usual way.
+
+NOTE the environment read while importing the preloaded modules (e.g.
+OMP_NUM_THREADS by numpy) is the one of the zygote.
+
+NOTE the service runs within the job step of the zygote (srun --overlap
+--cpu-bind=none), not within the one of its client. The CPU affinity of the
+client is applied to the service, but its CPU time and memory are accounted
+to the step of the zygotes (e.g. by sacct), and the cgroup limits of the
+client step (e.g. --mem) do not apply to it.
+
+Usage:
+    python3 zygote.py serve [--preload numpy zmq ...]
+    python3 zygote.py client -- <service.py> [args]
+"""
+import os
+import sys
+import json
+import signal
+import socket
+import struct
+
+
+# directory of the sockets of the zygotes (one per node), it is passed down
+# to the children by means of this environment variable
+ZYGOTE_DIRECTORY_VARIABLE = 'CO_SIM_ZYGOTE_DIR'
+# modules preloaded by default, the missing ones are skipped
+DEFAULT_PRELOADED_MODULES = ('EBRAINS_RichEndpoint', 'EBRAINS_ConfigManager', 'numpy', 'zmq')
+READY_MESSAGE = 'ZYGOTE READY'
+
+
+def node_name():
+    """name of this node, as given by SLURM within a job step"""
+    return os.environ.get('SLURMD_NODENAME') or socket.gethostname()
+
+
+def socket_path(directory=None, node=None):
+    """returns the path of the socket of the zygote on the node"""
+    directory = directory or os.environ.get(ZYGOTE_DIRECTORY_VARIABLE)
+    return os.path.join(directory, f'zygote.{node or node_name()}.sock')
+
+
+def client_command(service, args):
+    """
+    returns the command to start the service by the zygote (client), it is
+    to be used in place of ['python3', service, *args].
+    """
+    return ['python3', os.path.abspath(__file__), 'client', '--', service, *args]
+
+
+def _send_message(connection, message):
+    data = json.dumps(message).encode()
+    connection.sendall(struct.pack('!I', len(data)) + data)
+
+
+def _receive_message(connection):
+    """returns the message, None if the connection is closed"""
+    header = _receive_exactly(connection, 4)
+    if header is None:
+        return None
+    data = _receive_exactly(connection, struct.unpack('!I', header)[0])
+    return None if data is None else json.loads(data)
+
+
+def _receive_exactly(connection, size):
+    data = b''
+    while len(data) < size:
+        chunk = connection.recv(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+##########
+# client
+##########
+def run_client(argv):
+    """
+    starts the service by the zygote of this node, or the usual way if there
+    is none, and returns the return code of the service.
+    """
+    try:
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.connect(socket_path())
+    except (OSError, TypeError):
+        # no zygote on this node, start the service the usual way
+        os.execvp(sys.executable, [sys.executable, *argv])
+
+    # hand the standard streams over, then the service to be forked
+    socket.send_fds(connection, [b'F'], [0, 1, 2])
+    # NOTE the CPUs bound to the step of the client, the zygote is not bound
+    _send_message(connection, {'argv': argv, 'env': dict(os.environ), 'cwd': os.getcwd(),
+                               'affinity': sorted(os.sched_getaffinity(0))})
+    reply = _receive_message(connection)
+    if reply is None or 'pid' not in reply:
+        print(f'zygote: the service could not be started: {reply}', file=sys.stderr)
+        return 1
+    pid = reply['pid']
+
+    def forward_signal(signal_number, _):
+        try:
+            os.kill(pid, signal_number)
+        except ProcessLookupError:
+            pass
+
+    for signal_number in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP,
+                          signal.SIGUSR1, signal.SIGUSR2):
+        signal.signal(signal_number, forward_signal)
+    reply = _receive_message(connection)
+    if reply is None:
+        print(f'zygote: lost track of the service (PID={pid})', file=sys.stderr)
+        return 1
+    returncode = reply['returncode']
+    if returncode < 0:
+        # killed by a signal, the same is reported to the caller
+        signal.signal(-returncode, signal.SIG_DFL)
+        os.kill(os.getpid(), -returncode)
+    return returncode
+
+
+##########
+# zygote
+##########
+def _run_service(request, fds, closed_fds):
+    """runs the service in the forked child, never returns"""
+    returncode = 1
+    try:
+        for fd in closed_fds:
+            os.close(fd)
+        for target_fd, fd in enumerate(fds):
+            os.dup2(fd, target_fd)
+            os.close(fd)
+        if request.get('affinity'):
+            try:
+                os.sched_setaffinity(0, request['affinity'])
+            except OSError as e:
+                print(f'zygote: the CPU affinity of the client is not applied: {e}',
+                      file=sys.stderr)
+        os.chdir(request['cwd'])
+        os.environ.clear()
+        os.environ.update(request['env'])
+        service = request['argv'][0]
+        sys.argv = list(request['argv'])
+        # as by 'python3 <service>'
+        sys.path[0] = os.path.dirname(os.path.abspath(service))
+        import random
+        import runpy
+        random.seed()
+        runpy.run_path(service, run_name='__main__')
+        returncode = 0
+    except SystemExit as e:
+        returncode = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        if not isinstance(e.code, (int, type(None))):
+            print(e.code, file=sys.stderr)
+    except BaseException:
+        import traceback
+        traceback.print_exc()
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(returncode)
+
+
+def serve(preloaded_modules=DEFAULT_PRELOADED_MODULES, directory=None):
+    """
+    preloads the modules and serves the requests until SIGTERM/SIGINT.
+    """
+    import selectors
+    import importlib
+
+    for module in preloaded_modules:
+        try:
+            importlib.import_module(module)
+        except ImportError as e:
+            print(f'zygote: {module} is not preloaded: {e}', file=sys.stderr)
+
+    path = socket_path(directory)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if os.path.exists(path):
+        os.unlink(path)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen(128)
+
+    # SIGCHLD wakes up the selector to reap the services
+    wakeup_reader, wakeup_writer = os.pipe()
+    os.set_blocking(wakeup_reader, False)
+    os.set_blocking(wakeup_writer, False)
+    signal.set_wakeup_fd(wakeup_writer)
+    signal.signal(signal.SIGCHLD, lambda *_: None)
+    is_stopped = []
+    for signal_number in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signal_number, lambda *_: is_stopped.append(True))
+
+    selector = selectors.DefaultSelector()
+    selector.register(listener, selectors.EVENT_READ, 'accept')
+    selector.register(wakeup_reader, selectors.EVENT_READ, 'reap')
+    # client connection of each running service
+    connections = {}
+    # NOTE one write, the zygotes of the nodes share the output of srun
+    os.write(sys.stdout.fileno(), f'{READY_MESSAGE} {node_name()} {path}\n'.encode())
+
+    while not is_stopped:
+        for key, _ in selector.select():
+            if key.data == 'accept':
+                try:
+                    connection, _ = listener.accept()
+                    connection.settimeout(10)
+                    _, fds, _, _ = socket.recv_fds(connection, 1, 3)
+                    request = _receive_message(connection)
+                except OSError as e:
+                    print(f'zygote: bad request: {e}', file=sys.stderr)
+                    continue
+                if request is None or len(fds) != 3:
+                    connection.close()
+                    for fd in fds:
+                        os.close(fd)
+                    continue
+                pid = os.fork()
+                if pid == 0:
+                    signal.set_wakeup_fd(-1)
+                    for signal_number in (signal.SIGCHLD, signal.SIGTERM, signal.SIGINT):
+                        signal.signal(signal_number, signal.SIG_DFL)
+                    closed_fds = [listener.fileno(), wakeup_reader, wakeup_writer,
+                                  selector.fileno(), connection.fileno(),
+                                  *(other.fileno() for other in connections.values()
+                                    if other is not None)]
+                    _run_service(request, fds, closed_fds)
+                for fd in fds:
+                    os.close(fd)
+                _send_message(connection, {'pid': pid})
+                connections[pid] = connection
+                selector.register(connection, selectors.EVENT_READ, pid)
+            elif key.data == 'reap':
+                try:
+                    while os.read(wakeup_reader, 512):
+                        pass
+                except BlockingIOError:
+                    pass
+                while connections:
+                    try:
+                        pid, status = os.waitpid(-1, os.WNOHANG)
+                    except ChildProcessError:
+                        break
+                    if pid == 0:
+                        break
+                    # NOTE None if the client has gone already
+                    connection = connections.pop(pid, None)
+                    if connection is not None:
+                        selector.unregister(connection)
+                        try:
+                            _send_message(connection,
+                                          {'returncode': os.waitstatus_to_exitcode(status)})
+                        except OSError:
+                            pass
+                        connection.close()
+            else:
+                # the client has gone, so does its service
+                try:
+                    os.kill(key.data, signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+                selector.unregister(key.fileobj)
+                key.fileobj.close()
+                connections[key.data] = None
+
+    listener.close()
+    os.unlink(path)
+    return 0
+
+
+class Zygotes:
+    """
+        Zygotes started by the launcher, one per node of the allocation by
+        means of srun (or one locally).
+
+    Methods:
+    --------
+        start(timeout)
+            starts the zygotes, returns the number of the ready ones
+        stop()
+    """
+
+    def __init__(self, directory, logger, n_nodes=None,
+                 preloaded_modules=DEFAULT_PRELOADED_MODULES):
+        self.__directory = directory
+        self.__logger = logger
+        # None means locally
+        self.__n_nodes = n_nodes
+        self.__preloaded_modules = preloaded_modules
+        self.__process = None
+
+    def __command(self):
+        command = [sys.executable if self.__n_nodes is None else 'python3',
+                   os.path.abspath(__file__), 'serve', '--directory', self.__directory,
+                   '--preload', *self.__preloaded_modules]
+        if self.__n_nodes is None:
+            return command
+        # NOTE --overlap lets the services be started next to the zygotes
+        return ['srun', f'--nodes={self.__n_nodes}', f'--ntasks={self.__n_nodes}',
+                '--ntasks-per-node=1', '--overlap', '--cpu-bind=none'] + command
+
+    def start(self, timeout=60.0):
+        """
+        starts the zygotes and waits until they are ready.
+
+        Raises ``OSError`` exception if they could not be started.
+
+        Returns
+        ------
+            n_ready: int
+        """
+        import time
+        import selectors
+        import subprocess
+
+        self.__process = subprocess.Popen(self.__command(), stdout=subprocess.PIPE,
+                                          stdin=subprocess.DEVNULL)
+        n_expected = self.__n_nodes or 1
+        n_ready = 0
+        output = ''
+        deadline = time.monotonic() + timeout
+        with selectors.DefaultSelector() as selector:
+            selector.register(self.__process.stdout, selectors.EVENT_READ)
+            while n_ready < n_expected and time.monotonic() < deadline:
+                if not selector.select(timeout=deadline - time.monotonic()):
+                    break
+                # NOTE unbuffered read, the selector does not see a buffer
+                chunk = os.read(self.__process.stdout.fileno(), 65536)
+                if not chunk:
+                    # the zygotes are gone e.g. srun failed
+                    break
+                *lines, output = (output + chunk.decode(errors='replace')).split('\n')
+                for line in lines:
+                    if line.startswith(READY_MESSAGE):
+                        n_ready += 1
+                        self.__logger.debug(f'zygote: {line}')
+        if n_ready < n_expected:
+            self.__logger.warning(f'{n_ready} of {n_expected} zygotes are ready, the services '
+                                  'are started the usual way on the other nodes')
+        return n_ready
+
+    def stop(self):
+        if self.__process is None:
+            return
+        import subprocess
+        self.__process.terminate()
+        try:
+            self.__process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.__process.kill()
+            self.__process.wait()
+        self.__process.stdout.close()
+        self.__process = None
+        try:
+            # NOTE only the directory on this node, it is left empty by the zygote
+            os.rmdir(self.__directory)
+        except OSError:
+            pass
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ['client']:
+        service_argv = argv[2:] if argv[1:2] == ['--'] else argv[1:]
+        return run_client(service_argv)
+
+    import argparse
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('mode', choices=['serve'])
+    parser.add_argument('--preload', nargs='*', default=list(DEFAULT_PRELOADED_MODULES),
+                        help='modules to be preloaded')
+    parser.add_argument('--directory', default=os.environ.get(ZYGOTE_DIRECTORY_VARIABLE),
+                        help=f'directory of the sockets, default is ${ZYGOTE_DIRECTORY_VARIABLE}')
+    args = parser.parse_args(argv)
+    if not args.directory:
+        parser.error('the directory of the sockets is missing')
+    return serve(args.preload, args.directory)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
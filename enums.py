@@ -26,6 +26,9 @@ class ActionReturnCodes(enum.Enum):
     OS_ERROR_EXCEPTION = 10
     VALUE_ERROR_EXCEPTION = 20
 
+    # the action was terminated, its walltime limit was exceeded
+    TIMEOUT = 30
+
 
 @enum.unique
 class ArrangerReturnCodes(enum.Enum):
@@ -61,6 +64,9 @@ class CoSimulatorReturnCodes(enum.Enum):
     # Returns related to the Launcher component
     LAUNCHER_ERROR = 50
 
+    # Returns reporting the preflight found errors, no action is carried out
+    PREFLIGHT_ERROR = 60
+
     # Returns code related to command-line parameters
     PARAMETER_ERROR = 105
 
@@ -12,16 +12,42 @@
 #
 # ------------------------------------------------------------------------------
 import os
+import time
+import queue
+import tempfile
+import threading
 import multiprocessing
 import pickle
 import base64
+import subprocess
 
 # Co-Simulator's imports
 from EBRAINS_Launcher.common.utils.common_utils import strtobool
+from EBRAINS_Launcher.common.utils import networking_utils
+from EBRAINS_Launcher.common.utils import profiling_utils
+from EBRAINS_Launcher.common.utils import throttle_utils
+from EBRAINS_Launcher.common.utils import bytecode_utils
+from EBRAINS_Launcher.common.utils.accounting_utils import AccountingTable
+from EBRAINS_Launcher.common.log_collector import LogCollector
+from EBRAINS_Launcher.common.log_collector import redirect_log_settings
+from EBRAINS_Launcher.common.log_collector import tag_log_settings
+from EBRAINS_Launcher.common import spawn_backends
+from EBRAINS_Launcher.common import status_board
+from EBRAINS_Launcher.common import metrics
+from EBRAINS_Launcher.common import asyncio_backend
+from EBRAINS_Launcher.common import zygote
+from EBRAINS_Launcher.common import preflight
+from EBRAINS_Launcher.common import watchdog
+from EBRAINS_Launcher.common import output_rules
+from EBRAINS_Launcher.enums import ActionReturnCodes
+from EBRAINS_Launcher.common.action_plan_model import ActionPlan
+from EBRAINS_Launcher.common.steering_channel import SteeringServer, SteeringCommand
+from EBRAINS_Launcher.common.steering_channel import STEERING_SOCKET_VARIABLE
 
 from EBRAINS_ConfigManager.workflow_configurations_manager.xml_parsers import constants
 from EBRAINS_ConfigManager.workflow_configurations_manager.xml_parsers import enums
 from EBRAINS_ConfigManager.workflow_configurations_manager.xml_parsers.variables import CO_SIM_EXECUTION_ENVIRONMENT
+from EBRAINS_ConfigManager.global_configurations_manager.xml_parsers.default_directories_enum import DefaultDirectories
 from EBRAINS_RichEndpoint.launcher import Launcher
 from EBRAINS_RichEndpoint.launcher_hpc import LauncherHPC
 from EBRAINS_RichEndpoint.application_companion.common_enums import Response
@@ -71,53 +97,176 @@ class LaunchingManager(object):
         # Co-Sim nodes arrangement for deploying
         self.__services_deployment_dict = services_deployment_dict
         #
-        # Mapped action plan, actions grouped by events
-        self.__launching_strategy_dict = {}
-        # the number of spawner to be started
-        self.__maximum_number_actions_found = 0
+        # Mapped action plan, actions grouped by events, built once the
+        # launching strategy is mapped out and read-only afterwards
+        self.__action_plan = None
+        # configurations_manager and log_settings appended to the Popen args
+        # of the CONCURRENT actions, encoded once for all of them unless the
+        # log settings are tagged with each action (log collector)
+        self.__encoded_dependencies = None
         # Joinable queue to trigger spawning actions processes
         self.__actions_to_be_carried_out_jq = multiprocessing.JoinableQueue()
-        # Queue where the actions return codes will be placed
+        # Queue where the actions return codes will be placed by the spawners
         self.__actions_return_codes_q = multiprocessing.Queue()
+        # number of actions sent to the spawners whose return code is not
+        # received yet, e.g. the wait was interrupted
+        self.__n_actions_sent_to_spawners = 0
+        # return codes of the actions carried out within this process (e.g.
+        # by the asyncio backend), put from any thread
+        self.__actions_return_codes = queue.SimpleQueue()
         self.__launching_manager_PID = os.getpid()
         self.__stopping_event = multiprocessing.Event()
         self.__is_execution_environment_hpc = False  # by default the running environment is considered "Local"
         # flag whether the steering is interactive
         self.__is_interactive =  is_interactive
+        # steering channel served in interactive mode, the launches are held
+        # while the steering is paused
+        self.__steering_server = None
+        self.__is_steering_resumed = threading.Event()
+        self.__is_steering_resumed.set()
 
-        # set the defulat settings for resource usage monitoring
-        self.__is_monitoring_enabled = False
-        # overwirte the default settings from XML configurations
-        try:
-            self.__is_monitoring_enabled = strtobool(self.__action_plan_parameters_dict.get("CO_SIM_ENABLE_MONITORING"))
-        except Exception as e:
-            # This could happen when the value is not set in XML file properly
-            # Now, fall back to default settings
-            self.__log_exception(
-                exception=e,
-                message="resource usage monitoring settings could not be set from XML")
-            # self.__logger.critical("resource usage monitoring settings could not be set from XML")
-            # self.__logger.exception(f"got the exception: {e}")
-            self.__logger.critical("falling back to default settings")
+        # resource usage monitoring, disabled by default
+        self.__is_monitoring_enabled = self.__setting_from_xml(
+            "CO_SIM_ENABLE_MONITORING", strtobool, False,
+            "resource usage monitoring settings")
 
         self.__logger.debug("is resource usage monitoring enabled: "
                             f"{self.__is_monitoring_enabled}")
 
-        # set the defulat settings for REST service
-        self.__is_app_server_enabled = False
-        # overwirte the default settings from XML configurations
+        # REST service, disabled by default
+        self.__is_app_server_enabled = self.__setting_from_xml(
+            "CO_SIM_ENABLE_REST_APP_SERVER", strtobool, False,
+            "App Server en/disable settings")
+
+        self.__logger.debug("is app server enabled: "
+                            f"{self.__is_app_server_enabled}")
+
+        # centralized log collection, disabled by default
+        self.__log_collector = None
+        self.__is_log_collector_enabled = self.__setting_from_xml(
+            "CO_SIM_ENABLE_LOG_COLLECTOR", strtobool, False, "log collector settings")
+
+        self.__logger.debug("is log collector enabled: "
+                            f"{self.__is_log_collector_enabled}")
+
+        # by default, the SEQUENTIAL actions are performed by the spawner
+        # processes, unless a spawn backend is set which starts the actions
+        # straight from the Launching Manager
+        self.__spawn_backend = self.__setting_from_xml(
+            "CO_SIM_SPAWN_BACKEND", spawn_backends.get_spawn_backend, None, "spawn backend")
+
+        self.__logger.debug("spawn backend: "
+                            f"{self.__spawn_backend.name if self.__spawn_backend else 'spawners'}")
+
+        # shared-memory status board where the state of the actions is
+        # published, it is created when the action plan is carried out
+        self.__status_board = None
+
+        # launcher internals exposed in the Prometheus text format, served
+        # only if a port is set (0 means any free port)
+        self.__create_metrics()
+        self.__metrics_server = None
+        self.__metrics_port = self.__setting_from_xml(
+            "CO_SIM_METRICS_PORT", int, None, "metrics port")
+
+        self.__logger.debug(f"metrics port: {self.__metrics_port}")
+
+        # resource usage of the actions reaped by the Launching Manager
+        self.__accounting_table = AccountingTable()
+
+        # by default, the actions are launched as fast as possible, unless
+        # the CO_SIM_LAUNCH_* parameters set a launch throttle
+        launch_settings = {}
         try:
-            self.__is_app_server_enabled = strtobool(self.__action_plan_parameters_dict.get("CO_SIM_ENABLE_REST_APP_SERVER"))
+            launch_settings = throttle_utils.launch_settings_from_parameters(
+                self.__action_plan_parameters_dict)
         except Exception as e:
             # This could happen when the value is not set in XML file properly
             # Now, fall back to default settings
             self.__log_exception(
                 exception=e,
-                message="App Server en/disable settings could not be set from XML")
+                message="launch throttle settings could not be set from XML")
             self.__logger.critical("falling back to default settings")
-
-        self.__logger.debug("is app server enabled: "
-                            f"{self.__is_app_server_enabled}")
+        # NOTE the settings are passed down to the services deployment as well
+        self.__launch_throttle = throttle_utils.configure_launch_throttle(launch_settings)
+
+        self.__logger.debug(f"launch throttle settings: {launch_settings}")
+
+        # by default, the actions run without walltime limit unless they (or
+        # their events) declare one by <action_timeout>, CO_SIM_ACTION_TIMEOUT
+        # sets the limit of the actions which do not declare one
+        self.__default_action_timeout = self.__setting_from_xml(
+            "CO_SIM_ACTION_TIMEOUT", float, None, "timeout settings")
+        self.__timeout_grace_period = self.__setting_from_xml(
+            "CO_SIM_TIMEOUT_GRACE_PERIOD", float, 5.0, "timeout grace period")
+        # one thread enforcing the walltime limits, it is started on the first
+        # limit to be watched
+        self.__watchdog = watchdog.Watchdog(self.__logger,
+                                            grace_period=self.__timeout_grace_period)
+
+        self.__logger.debug(f"default action timeout: {self.__default_action_timeout}")
+
+        # by default, the output of the actions is only logged, unless
+        # CO_SIM_OUTPUT_RULES sets the rules (a JSON file, or 'default') to
+        # look for the fatal errors in it
+        self.__output_rule_engine = self.__setting_from_xml(
+            "CO_SIM_OUTPUT_RULES",
+            lambda rules: output_rules.OutputRuleEngine(
+                output_rules.DEFAULT_RULES if rules.lower() == 'default'
+                else output_rules.load_rules(rules)),
+            None, "output rules")
+        # processes of the running actions started by the spawn backend
+        self.__running_processes = {}
+
+        self.__logger.debug("output rules: "
+                            f"{self.__output_rule_engine.rules if self.__output_rule_engine else None}")
+
+        # by default, the action plan is carried out by the spawners and the
+        # RichEndpoint launcher, unless the asyncio backend is set which
+        # carries out the whole launching strategy from within this process
+        self.__launching_backend = None
+        if self.__action_plan_parameters_dict.get("CO_SIM_LAUNCHING_BACKEND") == \
+                asyncio_backend.ASYNCIO:
+            try:
+                max_concurrent_actions = self.__action_plan_parameters_dict.get(
+                    "CO_SIM_MAX_CONCURRENT_ACTIONS")
+                self.__launching_backend = asyncio_backend.AsyncioLaunchingBackend(
+                    logger=self.__logger,
+                    max_concurrent_actions=int(max_concurrent_actions)
+                    if max_concurrent_actions else None,
+                    grace_period=self.__timeout_grace_period,
+                    on_state=lambda action_xml_id, phase, **kwargs:
+                    self.__publish_action_state(
+                        action_xml_id, status_board.ActionPhase[phase], **kwargs),
+                    on_output=self.__log_action_output,
+                    before_spawn=self.__wait_for_launch_token)
+            except Exception as e:
+                # This could happen when the value is not set in XML file properly
+                # or the Python version is too old
+                # Now, fall back to default settings
+                self.__log_exception(
+                    exception=e,
+                    message="launching backend could not be set from XML")
+                self.__logger.critical("falling back to default settings")
+
+        # by default, the services are started by a cold 'python3 <service>',
+        # unless the zygotes are enabled which fork them with the modules
+        # already loaded
+        self.__zygotes = None
+        self.__is_zygote_enabled = self.__setting_from_xml(
+            "CO_SIM_ENABLE_ZYGOTE", strtobool, False, "zygote settings")
+
+        self.__logger.debug(f"is zygote enabled: {self.__is_zygote_enabled}")
+
+        # by default, the children read the bytecode from the __pycache__
+        # directories next to the sources (e.g. on the shared file system)
+        self.__is_bytecode_cache_enabled = self.__setting_from_xml(
+            "CO_SIM_ENABLE_BYTECODE_CACHE", strtobool, False, "bytecode cache settings")
+
+        self.__logger.debug(f"is bytecode cache enabled: {self.__is_bytecode_cache_enabled}")
+
+        self.__logger.debug("launching backend: "
+                            f"{asyncio_backend.ASYNCIO if self.__launching_backend else 'spawners'}")
 
         self.__logger.debug('Launching Manager is initialized.')
 
@@ -125,7 +274,292 @@ class LaunchingManager(object):
         """logs the custom message and the exception with traceback"""
         self.__logger.critical(message)
         self.__logger.exception(f"got the exception: {exception}")
+
+    def __setting_from_xml(self, name, convert, default, description):
+        """
+        helper function which returns the CO_SIM_* parameter of the action
+        plan converted by convert (e.g. strtobool, int), or the default
+        settings if it is not set or it could not be converted.
+        """
+        value = self.__action_plan_parameters_dict.get(name)
+        if not value:
+            return default
+        try:
+            return convert(value)
+        except Exception as e:
+            # This could happen when the value is not set in XML file properly
+            # Now, fall back to default settings
+            self.__log_exception(
+                exception=e,
+                message=f"{description} could not be set from XML")
+            self.__logger.critical("falling back to default settings")
+            return default
     
+    def __create_metrics(self):
+        """helper function to register the metrics of the launcher"""
+        self.__metrics_registry = metrics.MetricsRegistry()
+        registry = self.__metrics_registry
+        self.__actions_spawned = registry.counter(
+            'cosim_actions_spawned_total', 'actions started')
+        self.__actions_finished = registry.counter(
+            'cosim_actions_finished_total', 'actions finished successfully')
+        self.__actions_failed = registry.counter(
+            'cosim_actions_failed_total', 'actions finished with error')
+        self.__actions_failed_to_start = registry.counter(
+            'cosim_actions_failed_to_start_total',
+            'actions failed before running, e.g. they could not be spawned')
+        # XML IDs of the actions published as RUNNING and not finished yet
+        self.__running_action_ids = set()
+        registry.gauge(
+            'cosim_actions_running', 'actions currently running',
+            function=lambda: len(self.__running_action_ids))
+        self.__spawn_latency = registry.histogram(
+            'cosim_spawn_latency_seconds', 'time to spawn an action')
+        self.__event_barrier_wait = registry.histogram(
+            'cosim_event_barrier_wait_seconds',
+            'time waiting for the actions owned by an event')
+        self.__spawner_pool_utilization = registry.gauge(
+            'cosim_spawner_pool_utilization', 'fraction of the spawners performing an action')
+        self.__output_bytes = registry.counter(
+            'cosim_action_output_bytes_total', 'bytes written by the actions to stdout/stderr')
+        self.__time_to_all_running = registry.histogram(
+            'cosim_time_to_all_running_seconds',
+            'time from the start of a CONCURRENT event until all its actions are running')
+        self.__launch_token_wait = registry.histogram(
+            'cosim_launch_token_wait_seconds', 'time an action waited for a launch token')
+        self.__steering_commands = registry.counter(
+            'cosim_steering_commands_total', 'steering commands handled')
+        self.__actions_timed_out = registry.counter(
+            'cosim_actions_timed_out_total', 'actions terminated due to a timeout')
+        self.__output_rule_matches = registry.counter(
+            'cosim_output_rule_matches_total', 'output rules matching the output of an action')
+        registry.gauge('cosim_launcher_resident_memory_bytes',
+                       'resident set size of the Launching Manager',
+                       function=metrics.resident_set_size)
+
+    def __start_metrics_server(self):
+        """
+        helper function to serve the metrics, its URL is passed down to the
+        children (e.g. the app server) by means of the CO_SIM_METRICS_URL
+        environment variable.
+        """
+        try:
+            self.__metrics_server = metrics.MetricsServer(self.__metrics_registry,
+                                                          port=self.__metrics_port)
+            metrics_url = self.__metrics_server.start()
+        except OSError as e:
+            self.__log_exception(exception=e,
+                                 message="metrics server could not be started")
+            self.__metrics_server = None
+            return
+        os.environ[metrics.METRICS_URL_VARIABLE] = metrics_url
+        self.__logger.info(f'metrics: {metrics_url}')
+
+    def __start_zygotes(self):
+        """
+        helper function to start the zygotes (one per node), the directory of
+        their sockets is passed down to the services deployment by means of
+        the CO_SIM_ZYGOTE_DIR environment variable.
+        """
+        n_nodes = None
+        if self.__action_plan_variables_dict[CO_SIM_EXECUTION_ENVIRONMENT].upper() != "LOCAL":
+            n_nodes = int(os.environ.get('SLURM_NNODES', 1))
+        # NOTE node-local directory, the same path on each node
+        directory = os.path.join(tempfile.gettempdir(), f'cosim_zygote_{os.getpid()}')
+        self.__zygotes = zygote.Zygotes(directory, self.__logger, n_nodes=n_nodes)
+        try:
+            start = time.perf_counter()
+            n_ready = self.__zygotes.start()
+        except OSError as e:
+            self.__log_exception(exception=e,
+                                 message="zygotes could not be started")
+            self.__zygotes = None
+            return
+        os.environ[zygote.ZYGOTE_DIRECTORY_VARIABLE] = directory
+        self.__logger.info(f'{n_ready} zygotes are ready in '
+                           f'{time.perf_counter() - start:.3f}s: {directory}')
+
+    def __prepare_bytecode_cache(self):
+        """
+        helper function to precompile the Python actions and services into a
+        bytecode cache copied onto each node, which is passed down to the
+        children by means of the PYTHONPYCACHEPREFIX environment variable.
+        """
+        if self.__action_plan_variables_dict[CO_SIM_EXECUTION_ENVIRONMENT].upper() != "LOCAL":
+            n_nodes = int(os.environ.get('SLURM_NNODES', 1))
+            # NOTE built once on the shared file system, then copied onto the nodes
+            cache_directory = os.path.join(
+                self._configurations_manager.get_directory(DefaultDirectories.OUTPUT),
+                'bytecode_cache')
+            node_local_directory = os.path.join(
+                tempfile.gettempdir(), f"cosim_pycache_{os.environ.get('SLURM_JOB_ID', os.getpid())}")
+        else:
+            n_nodes = None
+            # NOTE kept across the runs, only the modified sources are compiled again
+            cache_directory = node_local_directory = os.path.join(
+                tempfile.gettempdir(), f'cosim_pycache_{os.getuid()}')
+        scripts = [demand['script'] for demand in
+                   map(preflight.action_demand, self.__actions_popen_args_dict.values())
+                   if demand['script']]
+        # the packages of the services and the modules they import
+        modules = [*zygote.DEFAULT_PRELOADED_MODULES, 'EBRAINS_Launcher']
+        try:
+            start = time.perf_counter()
+            n_files = bytecode_utils.precompile(
+                scripts, bytecode_utils.package_directories(modules), cache_directory)
+            bytecode_utils.warm_up(modules, cache_directory)
+            precompiling_time = time.perf_counter() - start
+            populating_time = bytecode_utils.populate(cache_directory, node_local_directory,
+                                                      n_nodes)
+        except (OSError, subprocess.SubprocessError) as e:
+            self.__log_exception(exception=e,
+                                 message="bytecode cache could not be prepared")
+            return
+        self.__logger.info(f'bytecode cache: {n_files} modules are precompiled in '
+                           f'{precompiling_time:.3f}s and copied onto the nodes in '
+                           f'{populating_time:.3f}s: {node_local_directory}')
+        # import time saved per child, from the __pycache__ directories vs
+        # from the node-local cache
+        uncached = bytecode_utils.import_time(modules)
+        cached = bytecode_utils.import_time(modules, node_local_directory)
+        if uncached is not None and cached is not None:
+            self.__logger.info(f'import time of {", ".join(modules)}: {uncached:.3f}s '
+                               f'without and {cached:.3f}s with the bytecode cache, '
+                               f'{uncached - cached:.3f}s saved per child')
+        os.environ[bytecode_utils.PYCACHE_PREFIX_VARIABLE] = node_local_directory
+
+    def __start_steering_server(self):
+        """
+        helper function to serve the steering channel, its socket is passed
+        down to the children (e.g. the app server) by means of the
+        CO_SIM_STEERING_SOCKET environment variable.
+        """
+        self.__steering_server = SteeringServer(handler=self.__handle_steering_command,
+                                                logger=self.__logger)
+        try:
+            socket_path = self.__steering_server.start()
+        except OSError as e:
+            self.__log_exception(exception=e,
+                                 message="steering channel could not be started")
+            self.__steering_server = None
+            return
+        os.environ[STEERING_SOCKET_VARIABLE] = socket_path
+        self.__logger.info(f'steering channel: {socket_path}')
+
+    def __stop_action_plan(self):
+        """helper function to stop the action plan, no more actions are carried out"""
+        self.__stopping_event.set()
+        if self.__launching_backend is not None:
+            self.__launching_backend.stop()
+        # release the launches held by a pause, they are not carried out
+        self.__is_steering_resumed.set()
+
+    def __handle_steering_command(self, command):
+        """helper function to carry out the command received by the steering channel"""
+        self.__steering_commands.labels(command=command.value).inc()
+        if command == SteeringCommand.STOP:
+            self.__stop_action_plan()
+        elif self.__stopping_event.is_set():
+            raise RuntimeError('the action plan is stopped')
+        elif command == SteeringCommand.PAUSE:
+            self.__is_steering_resumed.clear()
+        elif command == SteeringCommand.START:
+            # NOTE it resumes the launches held by a pause, the simulation
+            # itself is started by the signal sent via PIPE by the app server
+            self.__is_steering_resumed.set()
+
+    def __wait_for_launch_token(self, action_xml_id):
+        """helper function to pace the launches as per launch throttle"""
+        if not self.__is_steering_resumed.is_set():
+            self.__logger.info(f'<{action_xml_id}> is held until the steering is resumed')
+            self.__is_steering_resumed.wait()
+        waited = self.__launch_throttle.acquire()
+        self.__launch_token_wait.observe(waited)
+        if waited > 0:
+            self.__logger.debug(f'<{action_xml_id}> waited {waited:.3f}s for a launch token')
+
+    def __log_action_output(self, action_xml_id, stream_name, chunk):
+        """helper function to log the output of the action line by line"""
+        self.__output_bytes.labels(action=action_xml_id).inc(len(chunk))
+        for line in chunk.decode(errors='replace').splitlines():
+            self.__logger.info(f'<{action_xml_id}> {stream_name}: {line}')
+        if self.__output_rule_engine is not None:
+            for rule in self.__output_rule_engine.scan(action_xml_id, stream_name, chunk):
+                self.__apply_output_rule(action_xml_id, stream_name, rule)
+
+    def __apply_output_rule(self, action_xml_id, stream_name, rule):
+        """helper function to carry out the action of the rule matching the output"""
+        self.__output_rule_matches.labels(rule=rule.name).inc()
+        self.__logger.warning(f'<{action_xml_id}> {stream_name} matches the output rule '
+                              f'{rule.name}: {rule.action.value}')
+        if rule.action == output_rules.RuleAction.ABORT_PLAN:
+            self.__logger.critical(f'the action plan is aborted, <{action_xml_id}> '
+                                   f'matches the output rule {rule.name}')
+            self.__stop_action_plan()
+            self.__terminate_action(action_xml_id, f'matches the output rule {rule.name}')
+        elif rule.action == output_rules.RuleAction.KILL_ACTION:
+            self.__terminate_action(action_xml_id, f'matches the output rule {rule.name}')
+
+    def __terminate_action(self, action_xml_id, reason):
+        """helper function to terminate the running action, then to kill it"""
+        if self.__launching_backend is not None:
+            self.__launching_backend.terminate(action_xml_id)
+        elif action_xml_id in self.__running_processes:
+            self.__watchdog.terminate(
+                action_xml_id,
+                watchdog.process_target(self.__running_processes[action_xml_id]),
+                reason)
+
+    def __publish_action_state(self, action_xml_id, phase, pid=None, exit_code=None):
+        """helper function to publish the state of the action, if possible"""
+        # NOTE the counters are appended to without locking, see metrics
+        if phase == status_board.ActionPhase.RUNNING:
+            self.__running_action_ids.add(action_xml_id)
+            self.__actions_spawned.inc()
+        elif phase == status_board.ActionPhase.FINISHED:
+            self.__running_action_ids.discard(action_xml_id)
+            self.__actions_finished.inc()
+        elif phase == status_board.ActionPhase.FAILED:
+            if action_xml_id in self.__running_action_ids:
+                self.__running_action_ids.discard(action_xml_id)
+                self.__actions_failed.inc()
+            else:
+                # e.g. it could not be spawned, it was never counted as running
+                self.__actions_failed_to_start.inc()
+        if phase in (status_board.ActionPhase.FINISHED, status_board.ActionPhase.FAILED) and \
+                self.__output_rule_engine is not None:
+            self.__output_rule_engine.forget(action_xml_id)
+        if self.__status_board is None:
+            return
+        try:
+            self.__status_board.update(action_xml_id, phase, pid=pid, exit_code=exit_code)
+        except Exception as e:
+            # the status board is informative only, do not stop the plan
+            self.__logger.debug(f'state of <{action_xml_id}> could not be published: {e}')
+
+    def __action_timeout(self, action):
+        """helper function to get the walltime limit of the action, None if there is none"""
+        return action.timeout if action.timeout is not None else self.__default_action_timeout
+
+    def __watch(self, name, timeout, process=None):
+        """
+        helper function to watch the walltime limit of an action or event,
+        the process is terminated once it is exceeded, or the processes
+        started from now on if it is not given (e.g. by the spawners).
+        """
+        if timeout is None:
+            return self.__watchdog.watch(name, None, None)
+        target = watchdog.process_target(process) if process is not None \
+            else watchdog.new_descendants_target()
+        return self.__watchdog.watch(name, timeout, target)
+
+    def __record_timeout(self, action_xml_id, exit_code=None):
+        """helper function to account an action terminated due to a timeout"""
+        self.__actions_timed_out.inc()
+        self.__actions_return_codes.put(ActionReturnCodes.TIMEOUT)
+        self.__publish_action_state(action_xml_id, status_board.ActionPhase.FAILED,
+                                    exit_code=exit_code)
+
     def __get_expected_action_launch_method(self, action_event):
         """
         helper function which returns the relative launching method
@@ -144,7 +578,7 @@ class LaunchingManager(object):
 
     def __check_actions_grouping(self):
         """
-            Goes through the launching strategy dictionary in order to check
+            Goes through the events of the action plan in order to check
             whether the actions associated to the waiting events have the
             proper action type, i.e. SEQUENTIAL or CONCURRENT
 
@@ -160,10 +594,9 @@ class LaunchingManager(object):
         """
         self.__logger.debug('Validating the grouping of action and launching'
                             'methods')
-        for key, value in self.__launching_strategy_dict.items():
-            action_xml_id = key  # e.g. action_010 taken from XML <action_010>
-            action_event = value['action_event']  # SEQUENTIAL or CONCURRENT
-            actions_list = value['actions_list']  # e.g.[action_006,action_008]
+        for event in self.__action_plan.events:
+            action_xml_id = event.event_action_xml_id  # e.g. action_010 taken from XML <action_010>
+            action_event = event.action_event  # SEQUENTIAL or CONCURRENT
             expected_action_launch_method = ''
 
             # get action event launching method type
@@ -176,9 +609,8 @@ class LaunchingManager(object):
                 return enums.LauncherReturnCodes.XML_ERROR
 
             # validate the grouping of actions and their launching method types
-            for current_action in actions_list:
-                if self.__action_plan_dict[current_action]['action_launch_method'] \
-                        == expected_action_launch_method:
+            for current_action in event.actions:
+                if current_action.launch_method == expected_action_launch_method:
                     # NOTE: here could be placed additional code to grab
                     # information associated to the current_action
                     # notwithstanding, it has been preferred to keep each
@@ -188,7 +620,7 @@ class LaunchingManager(object):
                     # action is associated with a wrong launching method type
                     self.__logger.error(
                         f'<{action_xml_id}> method {action_event} '
-                        f'expects <{current_action}> having the '
+                        f'expects <{current_action.action_xml_id}> having the '
                         f'{expected_action_launch_method} launching method.')
                     return enums.LauncherReturnCodes.ACTIONS_GROUPING_ERROR
 
@@ -197,7 +629,7 @@ class LaunchingManager(object):
 
     def __gather_action_xml_filenames(self):
         """
-        Goes through the launching strategy dictionary in order to gather the
+        Goes through the events of the action plan in order to gather the
         XML filenames from the action plan XML file.
 
         :return:
@@ -208,18 +640,13 @@ class LaunchingManager(object):
             from the section <action_xml>
         """
         self.__logger.debug('Gathering action XML file names.')
-        try:
-            for _, value in self.__launching_strategy_dict.items():
-                actions_list = value['actions_list']  # e.g. [action_006,...]
-
-                for current_action in actions_list:
-                    self.__actions_xml_filenames_dict[current_action] = \
-                        {'action_xml':
-                             self.__action_plan_dict[current_action]['action_xml']}
-        except KeyError:
-            # XML file name is not found in action_plan_dict
-            self.__logger.error('Error in gathering action XML file names.')
-            return enums.LauncherReturnCodes.GATHERING_XML_FILENAMES_ERROR
+        for current_action in self.__action_plan.actions:
+            if current_action.action_xml is None:
+                # XML file name is not found in action_plan_dict
+                self.__logger.error('Error in gathering action XML file names.')
+                return enums.LauncherReturnCodes.GATHERING_XML_FILENAMES_ERROR
+            self.__actions_xml_filenames_dict[current_action.action_xml_id] = \
+                {'action_xml': current_action.action_xml}
 
         # otherwise, XML file names are gatheres from the action plan XML file
         self.__logger.debug('action XML file names are gathered.')
@@ -238,8 +665,9 @@ class LaunchingManager(object):
             of actions XML_ERROR: The <action_plan> section contains some
             erroneous entries.
         """
+        # (event_action_xml_id, action_event, actions_list) in order
+        grouping = []
         actions_list = []
-        actions_counter = 0
 
         # looking for the events and grouping the actions based on them.
         # e.g. {'action_type': 'CO_SIM_EVENT',
@@ -254,55 +682,48 @@ class LaunchingManager(object):
             if value['action_type'] == constants.CO_SIM_ACTION:
                 # accumulating the actions before finding an event action type
                 actions_list.append(key)
-
-                # counting the number the actions associated to the event
-                # to establish the number of spawner processes
-                # to be created later
-                actions_counter += 1
             elif value['action_type'] == constants.CO_SIM_EVENT:
                 # an event has been found (meaning, a graph node)
                 # related to actions (task to be spawned),
                 # it must be SEQUENTIAL or CONCURRENT
-                self.__launching_strategy_dict[key] = \
-                    {'action_event': value['action_event'],
-                     'actions_list': actions_list, }
+                grouping.append((key, value['action_event'], actions_list))
                 actions_list = []
-                actions_counter = 0
             else:
                 self.__logger.error(f"wrong <action_type> found:"
                                     f"{value['action_type']}")
                 return enums.LauncherReturnCodes.XML_ERROR
 
-            if actions_counter > self.__maximum_number_actions_found:
-                # keeping the maximum number of actions associated to one event
-                # in order to use it as number of spawner process to be
-                # initiated
-                self.__maximum_number_actions_found = actions_counter
-
-            self.__logger.debug(f'Maximum number of actions: '
-                                f'{self.__maximum_number_actions_found}')
-
-        if self.__launching_strategy_dict and actions_list:
+        if grouping and actions_list:
             self.__logger.error('<action_plan> must be ended with a'
                                 ' CO_SIM_EVENT element')
             return enums.LauncherReturnCodes.MAPPING_OUT_ERROR
 
-        # at this point __launching_strategy_dict contains the actions
-        # grouped by events
+        # build the model once, the actions grouped by events are only read
+        # from now on
+        try:
+            self.__action_plan = ActionPlan(grouping,
+                                            self.__action_plan_dict,
+                                            self.__actions_popen_args_dict,
+                                            self.__actions_sci_params_dict)
+        except ValueError as e:
+            # e.g. a wrong <action_timeout>
+            self.__logger.error(f'wrong action plan: {e}')
+            return enums.LauncherReturnCodes.XML_ERROR
+        # the maximum number of actions associated to one event is used as
+        # number of spawner process to be initiated
+        self.__logger.debug(f'Maximum number of actions: '
+                            f'{self.__action_plan.maximum_number_actions}')
         return enums.LauncherReturnCodes.LAUNCHER_OK
 
-    def __perform_sequential_actions(self, actions_list, event_action_xml_id):
+    def __perform_sequential_actions(self, event):
         '''
         helper function for performing the SEQUENTIAL actions
 
         Parameters
         ----------
 
-        actions_list : list
-            list of (SEQUENTIAL) actions to be performed
-
-        event_action_xml_id: str
-            XML tag of the action event
+        event : Event
+            the action event owning the (SEQUENTIAL) actions to be performed
 
         Returns
         ------
@@ -312,7 +733,10 @@ class LaunchingManager(object):
            found to spawn the process
         '''
         self.__logger.info(f'Sequentially processing of actions owned by the '
-                           f'event <{event_action_xml_id}>')
+                           f'event <{event.event_action_xml_id}>')
+        if self.__spawn_backend is not None:
+            return self.__perform_sequential_actions_by_backend(event)
+
         # start spawner processes to perform SEQUENTIAL actions
         if self.__start_spawner_processes() == \
                 enums.LauncherReturnCodes.LAUNCHER_NOT_OK:
@@ -321,33 +745,61 @@ class LaunchingManager(object):
             return enums.LauncherReturnCodes.LAUNCHER_NOT_OK
 
         # processes are started, now perform SEQUENTIAL actions
-        for action_xml_id in actions_list:
-            action_popen_args_list = []
-            try:
-                # get action (Popen args) to be performed
-                action_popen_args_list = \
-                    self.__actions_popen_args_dict[action_xml_id]
-            except KeyError:
+        # NOTE the processes started from now on are the ones of the actions
+        event_watch = self.__watch(event.event_action_xml_id, event.timeout)
+        for action in event.actions:
+            action_xml_id = action.action_xml_id
+            # get action (Popen args) to be performed
+            if action.popen_args is None:
                 self.__logger.error(f'There are no Popen args to spawn'
                                     f'<{action_xml_id}>')
+                event_watch.cancel()
                 return enums.LauncherReturnCodes.LAUNCHER_NOT_OK
 
             # Popen args are found
+            self.__wait_for_launch_token(action_xml_id)
+            if self.__stopping_event.is_set():
+                # e.g. stopped by the steering
+                self.__logger.critical(f'the action plan is stopped, <{action_xml_id}> '
+                                       'is not carried out')
+                break
+            if event_watch.timed_out:
+                self.__logger.critical(f'the event <{event.event_action_xml_id}> timed out, '
+                                       f'<{action_xml_id}> is not carried out')
+                break
+            self.__publish_action_state(action_xml_id, status_board.ActionPhase.RUNNING)
+            self.__spawner_pool_utilization.set(1 / len(self.__spawners))
+            action_watch = self.__watch(action_xml_id, self.__action_timeout(action))
             try:
                 # sending action to spawner process to perform it
+                self.__n_actions_sent_to_spawners += 1
                 self.__actions_to_be_carried_out_jq.put(Action(
-                    event_action_xml_id=event_action_xml_id,
+                    event_action_xml_id=event.event_action_xml_id,
                     action_xml_id=action_xml_id,
-                    action_popen_args_list=action_popen_args_list,
+                    action_popen_args_list=profiling_utils.profiled_command(
+                        list(action.popen_args)),
                     logger=self.__logger))
                 # SEQUENTIAL effect
                 # waiting until the Task has finished (task by task)
                 self.__actions_to_be_carried_out_jq.join()
+                return_code = self.__receive_spawner_return_code(action_xml_id)
+                if action_watch.timed_out or event_watch.timed_out:
+                    self.__record_timeout(action_xml_id)
+                else:
+                    self.__publish_action_state(
+                        action_xml_id,
+                        status_board.ActionPhase.FINISHED
+                        if return_code == ActionReturnCodes.OK
+                        else status_board.ActionPhase.FAILED)
             except KeyboardInterrupt:
                 self.__logger.critical('Caught KeyboardInterrupt! '
                                        'Setting stop event')
                 # TODO: rather handle it with signal manager
                 self.__stopping_event.set()
+            finally:
+                action_watch.cancel()
+                self.__spawner_pool_utilization.set(0)
+        event_watch.cancel()
 
         # All sequential actions have been performed,
         # stop the spawner processes
@@ -357,25 +809,148 @@ class LaunchingManager(object):
             # a more specific error is already logged
             return enums.LauncherReturnCodes.LAUNCHER_NOT_OK
 
+        if event_watch.timed_out:
+            # the rest of the actions are not carried out
+            return enums.LauncherReturnCodes.LAUNCHER_NOT_OK
+
         # The processes are stopped after performing all SEQUENTIAL actions
         return enums.LauncherReturnCodes.LAUNCHER_OK
 
-    def __action_identifiers(self):
-        goal = self.__action_plan_dict[action_xml_id]['action_goal']
-        label = self.__action_plan_dict[action_xml_id]['action_label']
+    def __perform_sequential_actions_by_backend(self, event):
+        '''
+        helper function for performing the SEQUENTIAL actions straight by
+        the spawn backend, i.e. without the intermediate spawner processes
+
+        Parameters
+        ----------
+
+        event : Event
+            the action event owning the (SEQUENTIAL) actions to be performed
+
+        Returns
+        ------
+           LAUNCHER_OK: All the SEQUENTIAL actions are performed
+
+           LAUNCHER_NOT_OK: Something went wrong such as no Popen args are
+           found to spawn the process, or the event timed out
+        '''
+        event_watch = self.__watch(event.event_action_xml_id, event.timeout)
+        for action in event.actions:
+            action_xml_id = action.action_xml_id
+            # get action (Popen args) to be performed
+            if action.popen_args is None:
+                self.__logger.error(f'There are no Popen args to spawn'
+                                    f'<{action_xml_id}>')
+                event_watch.cancel()
+                return enums.LauncherReturnCodes.LAUNCHER_NOT_OK
+
+            def log_output(stream_name, chunk, action_xml_id=action_xml_id):
+                self.__log_action_output(action_xml_id, stream_name, chunk)
+
+            self.__wait_for_launch_token(action_xml_id)
+            if self.__stopping_event.is_set():
+                # e.g. stopped by the steering
+                self.__logger.critical(f'the action plan is stopped, <{action_xml_id}> '
+                                       'is not carried out')
+                break
+            if event_watch.timed_out:
+                self.__logger.critical(f'the event <{event.event_action_xml_id}> timed out, '
+                                       f'<{action_xml_id}> is not carried out')
+                break
+            try:
+                spawn_start = time.perf_counter()
+                spawned_process = self.__spawn_backend.spawn(
+                    profiling_utils.profiled_command(action.popen_args))
+                self.__spawn_latency.observe(time.perf_counter() - spawn_start)
+                self.__logger.debug(f'<{action_xml_id}> is spawned by '
+                                    f'{self.__spawn_backend.name}, '
+                                    f'PID={spawned_process.pid}')
+                self.__publish_action_state(action_xml_id, status_board.ActionPhase.RUNNING,
+                                            pid=spawned_process.pid)
+                action_watch = self.__watch(action_xml_id, self.__action_timeout(action),
+                                            spawned_process)
+                self.__running_processes[action_xml_id] = spawned_process
+                try:
+                    # SEQUENTIAL effect
+                    # waiting until the action has finished (action by action)
+                    returncode = spawn_backends.communicate(spawned_process, log_output)
+                finally:
+                    action_watch.cancel()
+                    self.__running_processes.pop(action_xml_id, None)
+            except OSError as e:
+                self.__log_exception(exception=e,
+                                     message=f'<{action_xml_id}> could not be spawned')
+                self.__actions_return_codes.put(ActionReturnCodes.OS_ERROR_EXCEPTION)
+                self.__publish_action_state(action_xml_id, status_board.ActionPhase.FAILED)
+                continue
+            except KeyboardInterrupt:
+                self.__logger.critical('Caught KeyboardInterrupt! '
+                                       'Setting stop event')
+                self.__stopping_event.set()
+                event_watch.cancel()
+                return enums.LauncherReturnCodes.LAUNCHER_NOT_OK
+
+            self.__logger.info(f'<{action_xml_id}> finished, return code: {returncode}')
+            self.__accounting_table.record(action_xml_id=action_xml_id,
+                                           event_action_xml_id=event.event_action_xml_id,
+                                           pid=spawned_process.pid,
+                                           returncode=returncode,
+                                           elapsed=time.perf_counter() - spawn_start,
+                                           rusage=spawned_process.rusage)
+            if action_watch.timed_out or event_watch.timed_out:
+                self.__record_timeout(action_xml_id, exit_code=returncode)
+                continue
+            self.__publish_action_state(
+                action_xml_id,
+                status_board.ActionPhase.FINISHED if returncode == 0
+                else status_board.ActionPhase.FAILED,
+                exit_code=returncode)
+            self.__actions_return_codes.put(
+                ActionReturnCodes.OK if returncode == 0
+                else ActionReturnCodes.NOT_OK)
+
+        event_watch.cancel()
+        if event_watch.timed_out:
+            # the rest of the actions are not carried out
+            return enums.LauncherReturnCodes.LAUNCHER_NOT_OK
+        return enums.LauncherReturnCodes.LAUNCHER_OK
+
+    def __concurrent_action_popen_args(self, action):
+        '''
+        helper function which returns the Popen args of the CONCURRENT action
+        with the configurations_manager and log_settings appended, to Inject
+        Dependencies to have uniform log settings and centralized location
+        for output directories.
 
-    def __perform_concurrent_actions(self, actions_list, event_action_xml_id):
+        NOTE a new list is returned, the Popen args of the action are kept
+
+        Raises ``KeyError`` exception if the action has no Popen args.
+        '''
+        if action.popen_args is None:
+            raise KeyError(action.action_xml_id)
+        if self.__encoded_dependencies is None:
+            # NOTE the log settings are final once the plan is carried out
+            self.__encoded_dependencies = (
+                base64.b64encode(pickle.dumps(self._configurations_manager)),
+                base64.b64encode(pickle.dumps(self._logger_settings)))
+        encoded_configurations_manager, encoded_log_settings = self.__encoded_dependencies
+        if self.__log_collector is not None:
+            # the collector writes the records of the action into its own file
+            encoded_log_settings = base64.b64encode(pickle.dumps(
+                tag_log_settings(self._logger_settings, action.action_xml_id)))
+        return [*action.popen_args, encoded_configurations_manager, encoded_log_settings,
+                action.sci_params_xml_file]
+
+    def __perform_concurrent_actions(self, event):
         '''
         helper function for performing the CONCURRENT actions
 
         Parameters
         ----------
 
-        actions_list : list
-            list of (CONCURRENT) actions to be performed
-
-        event_action_xml_id: str
-            XML tag of the action event e.g. action_004, etc
+        event : Event
+            the action event owning the (CONCURRENT) actions to be performed
+            e.g. action_004, etc
 
         Returns
         ------
@@ -389,27 +964,12 @@ class LaunchingManager(object):
         # gather all concurrent actions to be performed
         self.__logger.debug('populating the list of CONCURRENT actions to be'
                             ' performed')
-        for action_xml_id in actions_list:
-            action_popen_args_list = []
+        preparation_start = time.perf_counter()
+        for action in event.actions:
+            action_xml_id = action.action_xml_id
             try:
-                # get action specific identifiers such as goal, label etc.
-                goal = self.__action_plan_dict[action_xml_id]['action_goal']
-                label = self.__action_plan_dict[action_xml_id]['action_label']
-
                 # get action (Popen args) to be performed
-                action_popen_args_list = \
-                    self.__actions_popen_args_dict[action_xml_id]
-
-                # append configurations_manager and log_settings to Inject
-                # Dependencies to have uniform log settings and centralized
-                # location for output directories
-                action_popen_args_list.append(
-                    base64.b64encode(
-                        pickle.dumps(self._configurations_manager)))
-                action_popen_args_list.append(
-                    base64.b64encode(
-                        pickle.dumps(self._logger_settings)))
-                action_popen_args_list.append(self.__actions_sci_params_dict[action_xml_id])
+                action_popen_args_list = self.__concurrent_action_popen_args(action)
             except KeyError:
                 self.__logger.error(f'There are no Popen args to spawn'
                                     f'<{action_xml_id}>')
@@ -418,10 +978,14 @@ class LaunchingManager(object):
             # actions (Popen args) are found
             self.__logger.debug(f'appending action: {action_popen_args_list}')
             concurrent_actions_list.append(
-                {'action': action_popen_args_list,
+                {'action': profiling_utils.profiled_command(action_popen_args_list),
                  'action-id': action_xml_id,
-                 'action-goal': goal,
-                 'action-label':label})
+                 'action-goal': action.goal,
+                 'action-label': action.label})
+
+        self.__logger.info(f'{len(concurrent_actions_list)} CONCURRENT actions owned by '
+                           f'the event <{event.event_action_xml_id}> are prepared in '
+                           f'{time.perf_counter() - preparation_start:.6f}s')
 
         # initialize launcher to perform concurrent actions
         if self.__action_plan_variables_dict[CO_SIM_EXECUTION_ENVIRONMENT].upper() != "LOCAL":
@@ -440,10 +1004,34 @@ class LaunchingManager(object):
         # perform concurrent actions
         self.__logger.debug(f'performing CONCURRENT actions: '
                             f'{concurrent_actions_list}')
-        if concurrent_actions_launcher.launch(concurrent_actions_list) == \
-                Response.OK:
+        for action in event.actions:
+            self.__publish_action_state(action.action_xml_id, status_board.ActionPhase.RUNNING)
+        # NOTE the actions are started by the RichEndpoint launcher, i.e. they
+        # are told apart from each other only by it, hence their timeouts are
+        # enforced as a whole: the event cannot outlast the longest one
+        timeouts = [self.__action_timeout(action) for action in event.actions]
+        if None not in timeouts and timeouts:
+            timeouts = [max(timeouts)]
+        else:
+            timeouts = []
+        if event.timeout is not None:
+            timeouts.append(event.timeout)
+        event_watch = self.__watch(event.event_action_xml_id, min(timeouts, default=None))
+        try:
+            response = concurrent_actions_launcher.launch(concurrent_actions_list)
+        finally:
+            event_watch.cancel()
+        if event_watch.timed_out:
+            for action in event.actions:
+                self.__record_timeout(action.action_xml_id)
+            return enums.LauncherReturnCodes.LAUNCHER_NOT_OK
+        if response == Response.OK:
+            for action in event.actions:
+                self.__publish_action_state(action.action_xml_id, status_board.ActionPhase.FINISHED)
             return enums.LauncherReturnCodes.LAUNCHER_OK
         else:
+            for action in event.actions:
+                self.__publish_action_state(action.action_xml_id, status_board.ActionPhase.FAILED)
             return enums.LauncherReturnCodes.LAUNCHER_NOT_OK
 
     def __start_spawner_processes(self):
@@ -457,7 +1045,7 @@ class LaunchingManager(object):
             returned_codes=self.__actions_return_codes_q,
             logger=self.__logger,
             stopping_event=self.__stopping_event)
-            for _ in range(self.__maximum_number_actions_found)]
+            for _ in range(self.__action_plan.maximum_number_actions)]
 
         # start spawner processes
         self.__logger.debug('starting the spawners.')
@@ -510,19 +1098,17 @@ class LaunchingManager(object):
             constants.CO_SIM_WAIT_FOR_CONCURRENT_ACTIONS: \
                 self.__perform_concurrent_actions}
 
-        # retrieve the actions from launching_strategy_dict to perform them
-        for key, value in self.__launching_strategy_dict.items():
-            # i. get the event
-            event_action_xml_id = key
-            # ii. get the event defining the spawning strategy
-            action_event = value['action_event']
-            # iii. get the list of actions owned by the event
-            actions_list = value['actions_list']
-            # iv. perform the actions
-            if not action_execution_choices[action_event](
-                    actions_list,
-                    event_action_xml_id) == \
-                   enums.LauncherReturnCodes.LAUNCHER_OK:
+        # retrieve the events from the action plan to perform their actions
+        for event in self.__action_plan.events:
+            # perform the actions, the event is the barrier
+            barrier_start = time.perf_counter()
+            return_code = action_execution_choices[event.action_event](event)
+            self.__event_barrier_wait.observe(time.perf_counter() - barrier_start)
+            if self.__stopping_event.is_set():
+                self.__logger.critical('the action plan is stopped after the event '
+                                       f'<{event.event_action_xml_id}>')
+                return enums.LauncherReturnCodes.LAUNCHER_NOT_OK
+            if not return_code == enums.LauncherReturnCodes.LAUNCHER_OK:
                 # something went wrong while performing actions,
                 # more specific errors are already logged
                 return enums.LauncherReturnCodes.LAUNCHER_NOT_OK
@@ -530,6 +1116,94 @@ class LaunchingManager(object):
         # otherwise, all actions are performed successfully
         return enums.LauncherReturnCodes.LAUNCHER_OK
 
+    def __perform_spawning_strategy_by_asyncio(self):
+        """
+        Performs the (SEQUENTIAL and CONCURRENT) actions as per launching
+        strategy by the asyncio backend, i.e. as subprocesses of the
+        Launching Manager waited for by one event loop.
+
+        :return:
+            LAUNCHER_OK: all the events are carried out
+
+            LAUNCHER_NOT_OK: Something went wrong such as no Popen args are
+            found, or an event was stopped
+        """
+        launch_methods = {
+            constants.CO_SIM_WAIT_FOR_SEQUENTIAL_ACTIONS: asyncio_backend.SEQUENTIAL,
+            constants.CO_SIM_WAIT_FOR_CONCURRENT_ACTIONS: asyncio_backend.CONCURRENT}
+        events = []
+        for event in self.__action_plan.events:
+            launch_method = launch_methods[event.action_event]
+            actions = []
+            for action in event.actions:
+                if action.popen_args is None:
+                    self.__logger.error(f'There are no Popen args to spawn'
+                                        f'<{action.action_xml_id}>')
+                    return enums.LauncherReturnCodes.LAUNCHER_NOT_OK
+                if launch_method == asyncio_backend.CONCURRENT:
+                    action_popen_args_list = self.__concurrent_action_popen_args(action)
+                else:
+                    action_popen_args_list = action.popen_args
+                actions.append((action.action_xml_id,
+                                profiling_utils.profiled_command(action_popen_args_list)))
+            events.append((event.event_action_xml_id, launch_method, actions))
+
+        timeouts = {action.action_xml_id: self.__action_timeout(action)
+                    for action in self.__action_plan.actions
+                    if self.__action_timeout(action) is not None}
+        event_timeouts = {event.event_action_xml_id: event.timeout
+                          for event in self.__action_plan.events
+                          if event.timeout is not None}
+
+        if self.__stopping_event.is_set():
+            return enums.LauncherReturnCodes.LAUNCHER_NOT_OK
+        is_completed, returncodes = self.__launching_backend.run(events, timeouts,
+                                                                 event_timeouts)
+        timed_out = self.__launching_backend.timed_out
+        for spawn_latency in self.__launching_backend.spawn_latencies:
+            self.__spawn_latency.observe(spawn_latency)
+        for time_to_all_running in self.__launching_backend.times_to_all_running.values():
+            self.__time_to_all_running.observe(time_to_all_running)
+        for action_xml_id, returncode in returncodes.items():
+            if action_xml_id in timed_out:
+                # NOTE its state is already published by the backend
+                self.__actions_timed_out.inc()
+                self.__actions_return_codes.put(ActionReturnCodes.TIMEOUT)
+            elif returncode is None:
+                self.__actions_return_codes.put(ActionReturnCodes.OS_ERROR_EXCEPTION)
+            else:
+                self.__actions_return_codes.put(
+                    ActionReturnCodes.OK if returncode == 0
+                    else ActionReturnCodes.NOT_OK)
+
+        if not is_completed:
+            return enums.LauncherReturnCodes.LAUNCHER_NOT_OK
+        return enums.LauncherReturnCodes.LAUNCHER_OK
+
+    def __start_log_collector(self):
+        """
+        helper function to start the log collector and to point the logging
+        settings passed down to the spawners and actions to it.
+        """
+        if self.__action_plan_variables_dict[CO_SIM_EXECUTION_ENVIRONMENT].upper() != "LOCAL":
+            # the actions deployed on other compute nodes send their records
+            host = networking_utils.my_ip()
+        else:
+            host = '127.0.0.1'
+        self.__log_collector = LogCollector(
+            logs_directory=self._configurations_manager.get_directory(DefaultDirectories.LOGS),
+            logger=self.__logger,
+            host=host)
+        try:
+            host, port = self.__log_collector.start()
+        except OSError as e:
+            self.__log_exception(exception=e,
+                                 message="log collector could not be started")
+            self.__log_collector = None
+            return enums.LauncherReturnCodes.LAUNCHER_NOT_OK
+        self._logger_settings = redirect_log_settings(self._logger_settings, host, port)
+        return enums.LauncherReturnCodes.LAUNCHER_OK
+
     def carry_out_action_plan(self):
         """
         Goes through the action-plan dictionary and spawn the required actions
@@ -544,20 +1218,152 @@ class LaunchingManager(object):
 
             PERFORMING_STRATEGY_ERROR: Some action ended with error
         """
+        if self.__is_log_collector_enabled and \
+                self.__start_log_collector() != enums.LauncherReturnCodes.LAUNCHER_OK:
+            # fall back to the logging settings given by the global settings
+            self.__logger.critical("falling back to default logging settings")
+        if self.__metrics_port is not None:
+            self.__start_metrics_server()
+        if self.__is_interactive:
+            self.__start_steering_server()
+        # NOTE before the zygotes, which import the modules with the cache
+        if self.__is_bytecode_cache_enabled:
+            self.__prepare_bytecode_cache()
+        if self.__is_zygote_enabled:
+            self.__start_zygotes()
+        try:
+            return self.__carry_out_action_plan_steps()
+        finally:
+            if self.__launch_throttle.is_enabled:
+                self.__logger.info(f'launch throttle: {self.__launch_throttle.report()}')
+            if len(self.__accounting_table):
+                self.__write_accounting_table()
+            self.__watchdog.stop()
+            if self.__spawn_backend is not None:
+                self.__spawn_backend.close()
+            if self.__zygotes is not None:
+                self.__zygotes.stop()
+                os.environ.pop(zygote.ZYGOTE_DIRECTORY_VARIABLE, None)
+            if self.__is_bytecode_cache_enabled:
+                os.environ.pop(bytecode_utils.PYCACHE_PREFIX_VARIABLE, None)
+            if self.__steering_server is not None:
+                self.__steering_server.stop()
+                os.environ.pop(STEERING_SOCKET_VARIABLE, None)
+            if self.__metrics_server is not None:
+                self.__metrics_server.stop()
+                os.environ.pop(metrics.METRICS_URL_VARIABLE, None)
+            if self.__status_board is not None:
+                self.__status_board.close()
+                os.environ.pop(status_board.STATUS_BOARD_VARIABLE, None)
+            if self.__log_collector is not None:
+                # flush the records of the actions
+                self.__log_collector.stop()
+
+    def __write_accounting_table(self):
+        """
+        helper function to write the resource usage of the actions into the
+        logs directory, sorted by CPU time, to find the actions dominating
+        the node-hours.
+        """
+        try:
+            csv_file, _ = self.__accounting_table.write(
+                self._configurations_manager.get_directory(DefaultDirectories.LOGS))
+        except OSError as e:
+            self.__log_exception(exception=e,
+                                 message="accounting table could not be written")
+            return
+        self.__logger.info(f'accounting of the actions: {csv_file}')
+
+    def __create_status_board(self):
+        """
+        helper function to create the status board with one slot per action,
+        its name is passed down to the children (e.g. the app server) by means
+        of the CO_SIM_STATUS_BOARD environment variable.
+        """
+        # NOTE the action plan is already mapped out
+        actions = [action.action_xml_id for action in self.__action_plan.actions]
+        try:
+            self.__status_board = status_board.StatusBoardWriter(n_slots=max(len(actions), 1))
+        except OSError as e:
+            self.__log_exception(exception=e,
+                                 message="status board could not be created")
+            return
+        for action_xml_id in actions:
+            self.__status_board.register(action_xml_id)
+        os.environ[status_board.STATUS_BOARD_VARIABLE] = self.__status_board.name
+        self.__logger.info(f'status board: {self.__status_board.name}')
+
+    def __receive_spawner_return_code(self, action_xml_id, timeout=30.0):
+        """
+        helper function to receive the return code reported by the spawner
+        which carried out the action, it is gathered with the rest of them.
+
+        Returns
+        ------
+            return_code: ActionReturnCodes
+                NOT_OK if it is not reported within the timeout
+        """
+        try:
+            return_code = self.__actions_return_codes_q.get(timeout=timeout)
+        except queue.Empty:
+            self.__logger.error(f'<{action_xml_id}> did not report its return code '
+                                f'within {timeout}s')
+            return_code = ActionReturnCodes.NOT_OK
+        self.__n_actions_sent_to_spawners -= 1
+        self.__actions_return_codes.put(return_code)
+        # NOTE the spawners report the return codes of EBRAINS_ConfigManager
+        return ActionReturnCodes.__members__.get(return_code.name, ActionReturnCodes.NOT_OK)
+
+    def __gather_return_codes(self, timeout=30.0):
+        """
+        helper function to gather the return codes of the carried out
+        actions. The ones of the spawners not received yet are waited for
+        (within the timeout each) until every action sent to them has
+        reported, since a put onto a multiprocessing queue reaches it later
+        on, i.e. it could still look empty.
+
+        Returns
+        ------
+            return_codes: list
+        """
+        return_codes = []
+        while True:
+            try:
+                return_codes.append(self.__actions_return_codes.get_nowait())
+            except queue.Empty:
+                break
+        for n_reported in range(self.__n_actions_sent_to_spawners):
+            try:
+                return_codes.append(self.__actions_return_codes_q.get(timeout=timeout))
+            except queue.Empty:
+                self.__logger.error(f'{self.__n_actions_sent_to_spawners - n_reported} actions '
+                                    f'did not report their return code within {timeout}s')
+                return_codes.append(ActionReturnCodes.NOT_OK)
+                break
+        return return_codes
+
+    def __carry_out_action_plan_steps(self):
+        """
+        helper function performing the steps of carry_out_action_plan
+        """
         ########
         # STEP 1 - Grouping actions by events
         ########
-        if not self.__map_out_launching_strategy() == \
-               enums.LauncherReturnCodes.LAUNCHER_OK:
+        with profiling_utils.Profile('launching_manager.mapping_out'):
+            return_code = self.__map_out_launching_strategy()
+        if not return_code == enums.LauncherReturnCodes.LAUNCHER_OK:
             self.__logger.debug('something went wrong by mapping out the'
                                 ' action-plan')
             return enums.LauncherReturnCodes.MAPPING_OUT_ERROR
+        # one slot per action of the mapped out action plan
+        self.__create_status_board()
 
         ########
         # STEP 2 - Checking the actions grouping, i.e. SEQUENTIAL or CONCURRENT
         ########
-        if not self.__check_actions_grouping() == \
-               enums.LauncherReturnCodes.LAUNCHER_OK:
+        with profiling_utils.Profile('launching_manager.checking_grouping'):
+            return_code = self.__check_actions_grouping()
+        if not return_code == enums.LauncherReturnCodes.LAUNCHER_OK:
             self.__logger.debug('an action inconsistently associated to a'
                                 ' waiting event was found')
             return enums.LauncherReturnCodes.ACTIONS_GROUPING_ERROR
@@ -566,8 +1372,9 @@ class LaunchingManager(object):
         # STEP 3 - Gathering the XML filenames from the <action_xml> element of
         # each action
         ########
-        if not self.__gather_action_xml_filenames() == \
-               enums.LauncherReturnCodes.LAUNCHER_OK:
+        with profiling_utils.Profile('launching_manager.gathering_xml_filenames'):
+            return_code = self.__gather_action_xml_filenames()
+        if not return_code == enums.LauncherReturnCodes.LAUNCHER_OK:
             self.__logger.debug('error by gathering XML filenames from the'
                                 ' action plan')
             return enums.LauncherReturnCodes.GATHERING_XML_FILENAMES_ERROR
@@ -576,17 +1383,25 @@ class LaunchingManager(object):
         # STEP 4 - Carrying out the action plan, based on events and their
         # associated actions
         ########
-        if not self.__perform_spawning_strategy() == \
-               enums.LauncherReturnCodes.LAUNCHER_OK:
+        with profiling_utils.Profile('launching_manager.spawning_strategy'):
+            if self.__launching_backend is not None:
+                return_code = self.__perform_spawning_strategy_by_asyncio()
+            else:
+                return_code = self.__perform_spawning_strategy()
+        if not return_code == enums.LauncherReturnCodes.LAUNCHER_OK:
             self.__logger.debug('something went wrong by executing the '
                                 'action-plan')
             return enums.LauncherReturnCodes.PERFORMING_STRATEGY_ERROR
 
         # Check if all actions are performed without error
         there_was_an_error = False
-        while not self.__actions_return_codes_q.empty():
-            current_action_result = self.__actions_return_codes_q.get()
-            if current_action_result == enums.ActionReturnCodes.OK:
+        for return_code in self.__gather_return_codes():
+            # NOTE the spawners report the return codes of EBRAINS_ConfigManager,
+            # they are converted by name into the ones of the launcher, which
+            # include TIMEOUT, anything unknown to the launcher is NOT_OK
+            current_action_result = ActionReturnCodes.__members__.get(
+                return_code.name, ActionReturnCodes.NOT_OK)
+            if current_action_result == ActionReturnCodes.OK:
                 continue
             else:
                 there_was_an_error = True
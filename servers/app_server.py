@@ -12,15 +12,35 @@
 # Team: Multi-scale Simulation and Design
 
 
-from flask import Flask, jsonify, json, request
+from flask import Flask, Response, jsonify, json, request
 from flask_cors import CORS
 
 import os
 import sys
+import logging
+import sqlite3
+import pathlib
+import tempfile
+import urllib.request
+
+# adding the parent directory of the launcher into the searching modules/packages
+# path, i.e. the modules are imported by the EBRAINS_Launcher package only (as
+# by the jobs), not twice as different modules
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[2]))
+from EBRAINS_Launcher.common.status_board import StatusBoardReader, STATUS_BOARD_VARIABLE, ActionPhase
+from EBRAINS_Launcher.common.metrics import METRICS_URL_VARIABLE
+from EBRAINS_Launcher.common.steering_channel import SteeringClient, SteeringCommand
+from EBRAINS_Launcher.common import job_queue
 
 app = Flask(__name__)
 CORS(app)
 health_registry_manager_proxy = None
+# reader of the status board published by the launcher (attached lazily)
+status_board_reader = None
+# steering channel to the launcher, if it is served (interactive mode)
+steering_client = SteeringClient()
+# scheduler of the queued action plans (started lazily)
+job_scheduler = None
 
 VERSION = 0.1
 # TODO Use absolute dir path where files can be stored.
@@ -34,10 +54,79 @@ def index():
     })
 
 
+def _attach_status_board():
+    """ Attaches to the status board, returns an error message otherwise. """
+    global status_board_reader
+    if status_board_reader is None:
+        status_board_name = os.environ.get(STATUS_BOARD_VARIABLE)
+        if not status_board_name:
+            return "status board is not available"
+        try:
+            status_board_reader = StatusBoardReader(status_board_name)
+        except (OSError, ValueError) as e:
+            return f"status board cannot be read: {e}"
+    return None
+
+
 @app.route("/global_state", methods=["GET"])
 def global_state():
-    # get current global state from orchestrator
-    return "In progress..."
+    """ Snapshot of the state of the actions, read from the status board. """
+    error = _attach_status_board()
+    if error:
+        return jsonify({"error": error}), 503
+
+    # NOTE lock-free read, the launcher is not involved
+    return jsonify({"actions": status_board_reader.snapshot()})
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """ Launcher metrics in the Prometheus text format, and the job queue metrics. """
+    job_metrics = job_scheduler.get_metrics() if job_scheduler is not None else ""
+    metrics_url = os.environ.get(METRICS_URL_VARIABLE)
+    if metrics_url:
+        try:
+            with urllib.request.urlopen(metrics_url, timeout=2) as response:
+                return Response(response.read() + job_metrics.encode(),
+                                mimetype="text/plain; version=0.0.4")
+        except OSError:
+            # fall back to the status board
+            pass
+
+    # only the actions per phase are known without the launcher metrics
+    error = _attach_status_board()
+    if error:
+        if job_metrics:
+            return Response(f"# {error}\n" + job_metrics, mimetype="text/plain; version=0.0.4")
+        return Response(f"# {error}\n", status=503, mimetype="text/plain")
+    counts = {phase.name: 0 for phase in ActionPhase if phase != ActionPhase.EMPTY}
+    for action in status_board_reader.snapshot():
+        counts[action["phase"]] += 1
+    lines = ["# HELP cosim_actions actions per phase, read from the status board",
+             "# TYPE cosim_actions gauge"]
+    lines.extend(f'cosim_actions{{phase="{phase.lower()}"}} {count}'
+                 for phase, count in counts.items())
+    return Response("\n".join(lines) + "\n" + job_metrics, mimetype="text/plain; version=0.0.4")
+
+
+def _steer(command):
+    """ Sends the steering command to the launcher, returns whether it is acknowledged. """
+    try:
+        ack, round_trip_time, reply = steering_client.send(command)
+    except OSError as e:
+        app.logger.error(f"steering command {command.value} could not be sent: {e}")
+        return False
+    app.logger.info(f"steering command {command.value}: ack={ack}, "
+                    f"round trip time={round_trip_time * 1000:.3f}ms")
+    if not ack:
+        app.logger.error(f"steering command {command.value} is rejected: {reply.get('error')}")
+    return ack
+
+
+@app.route("/steering", methods=["GET"])
+def steering():
+    """ Round trip times of the steering commands. """
+    return jsonify(dict(steering_client.report(), available=steering_client.is_available))
 
 
 @app.route("/submit", methods=["POST"])
@@ -52,17 +141,116 @@ def submit():
 
     # Start simulation
     # NOTE sending start simmulation signal via PIPE
-    # TODO instead of reading/writing through PIPE, communciate via 0MQ
     print("start simulation!", flush=True)
+    # resume the launches as well, e.g. held by a pause
+    if steering_client.is_available:
+        return json.dumps(_steer(SteeringCommand.START))
     return json.dumps(True)
 
 
+@app.route("/pause", methods=["GET"])
+def pause():
+    """ Holds the launches of the actions not started yet. """
+    if not steering_client.is_available:
+        return json.dumps(False), 503
+    return json.dumps(_steer(SteeringCommand.PAUSE))
+
+
 @app.route("/stop", methods=["GET"])
 def stop():
+    """ Stops the action plan. """
+    if not steering_client.is_available:
+        return json.dumps(False), 503
+    return json.dumps(_steer(SteeringCommand.STOP))
 
-    # Stop simulation
 
-    return json.dumps(True)
+def _attach_job_scheduler():
+    """ Starts the scheduler of the job queue, returns an error message otherwise. """
+    global job_scheduler
+    if job_scheduler is None:
+        global_settings = os.environ.get(job_queue.GLOBAL_SETTINGS_VARIABLE)
+        if not global_settings:
+            return f"job queue is not available, {job_queue.GLOBAL_SETTINGS_VARIABLE} is not set"
+        database_file = os.environ.get(job_queue.JOB_QUEUE_DATABASE_VARIABLE) or \
+            os.path.join(tempfile.gettempdir(), f"cosim_jobs.{os.getuid()}.sqlite")
+        try:
+            max_running_jobs = int(os.environ.get(job_queue.MAX_RUNNING_JOBS_VARIABLE, 1))
+            max_running_jobs_per_user = os.environ.get(job_queue.MAX_RUNNING_JOBS_PER_USER_VARIABLE)
+            max_running_jobs_per_user = int(max_running_jobs_per_user) \
+                if max_running_jobs_per_user else None
+            scheduler = job_queue.JobScheduler(job_queue.JobQueue(database_file),
+                                               global_settings, app.logger,
+                                               max_running_jobs=max_running_jobs,
+                                               max_running_jobs_per_user=max_running_jobs_per_user)
+        except (OSError, ValueError, sqlite3.Error) as e:
+            return f"job queue cannot be set up: {e}"
+        scheduler.start()
+        job_scheduler = scheduler
+        app.logger.info(f"job queue: {database_file}, {max_running_jobs} running jobs at most "
+                        f"on {scheduler.max_nodes} nodes")
+    return None
+
+
+@app.route("/jobs", methods=["POST"])
+def submit_job():
+    """ Queues an action plan to be carried out, returns the job ID.
+
+    NOTE the user of the job (i.e. the cap of running jobs per user) is the
+    authenticated one (REMOTE_USER, e.g. set by the front web server) or the
+    address of the client, the one declared in the request is not trusted.
+    """
+    error = _attach_job_scheduler()
+    if error:
+        return jsonify({"error": error}), 503
+    data = request.get_json(silent=True) or {}
+    action_plan = data.get("action_plan")
+    if not action_plan or not os.path.isfile(action_plan):
+        return jsonify({"error": f"action plan {action_plan} is not found"}), 400
+    try:
+        job_id = job_scheduler.submit(action_plan,
+                                      priority=int(data.get("priority", 0)),
+                                      nodes=int(data.get("nodes", 1)),
+                                      user=request.remote_user or request.remote_addr)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(job_scheduler.job_queue.get(job_id)), 201
+
+
+@app.route("/jobs", methods=["GET"])
+def jobs():
+    """ Latest jobs, optionally only the ones in a state (?state=queued). """
+    error = _attach_job_scheduler()
+    if error:
+        return jsonify({"error": error}), 503
+    try:
+        return jsonify({"jobs": job_scheduler.job_queue.jobs(
+            state=request.args.get("state"), limit=int(request.args.get("limit", 100)))})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+
+@app.route("/jobs/<int:job_id>", methods=["GET"])
+def job_status(job_id):
+    """ State of the job, including how long it waited in the queue. """
+    error = _attach_job_scheduler()
+    if error:
+        return jsonify({"error": error}), 503
+    job = job_scheduler.job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": f"job {job_id} is not found"}), 404
+    return jsonify(job)
+
+
+@app.route("/jobs/<int:job_id>", methods=["DELETE"])
+def cancel_job(job_id):
+    """ Cancels the job, terminating it if it is running. """
+    error = _attach_job_scheduler()
+    if error:
+        return jsonify({"error": error}), 503
+    job = job_scheduler.cancel(job_id)
+    if job is None:
+        return jsonify({"error": f"job {job_id} is not found"}), 404
+    return jsonify(job)
 
 
 if __name__ == "__main__":
@@ -76,5 +264,11 @@ if __name__ == "__main__":
     # channel with Orchestrator for fetching the state information or to
     # receive the monitoring metrics from resource usage monitors
 
+    # NOTE the queued jobs are resumed right away, not on the first request
+    app.logger.setLevel(logging.INFO)
+    error = _attach_job_scheduler()
+    if error:
+        app.logger.warning(error)
+
     # start the app server
     app.run(host=host, port=port)
\ No newline at end of file
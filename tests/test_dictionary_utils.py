@@ -0,0 +1,103 @@
+# ------------------------------------------------------------------------------
+#  Copyright 2020 Forschungszentrum Jülich GmbH and Aix-Marseille Université
+# "Licensed to the Apache Software Foundation (ASF) under one or more contributor
+#  license agreements; and to You under the Apache License, Version 2.0. "
+#
+# Forschungszentrum Jülich
+#  Institute: Institute for Advanced Simulation (IAS)
+#    Section: Jülich Supercomputing Centre (JSC)
+#   Division: High Performance Computing in Neuroscience
+# Laboratory: Simulation Laboratory Neuroscience
+#       Team: Multi-scale Simulation and Design
+#
+# ------------------------------------------------------------------------------
+import unittest
+
+from EBRAINS_Launcher.common.utils import dictionary_utils
+from EBRAINS_Launcher.common.utils.dictionary_utils import DictionaryOverlay
+
+
+def sample_dictionary():
+    return {'version': 1,
+            'handlers': {'console': {'class': 'logging.StreamHandler', 'level': 'INFO'},
+                         'info_file': {'class': 'logging.FileHandler',
+                                       'filename': 'default_logs.log'}},
+            'loggers': [{'name': 'root'}, {'name': 'launcher'}]}
+
+
+class TestPaths(unittest.TestCase):
+
+    def test_get_and_set(self):
+        dictionary = sample_dictionary()
+        dictionary_utils.set_in_dictionary(dictionary, ['handlers', 'info_file', 'filename'],
+                                           'my_logs.log')
+        self.assertEqual(dictionary_utils.get_from_dictionary(
+            dictionary, ['handlers', 'info_file', 'filename']), 'my_logs.log')
+
+    def test_set_missing_key(self):
+        with self.assertRaises(KeyError):
+            dictionary_utils.set_in_dictionary(sample_dictionary(),
+                                               ['handlers', 'console', 'formatter'], 'simple')
+
+    def test_set_index_out_of_range(self):
+        with self.assertRaises(IndexError):
+            dictionary_utils.set_in_dictionary(sample_dictionary(), ['loggers', 5, 'name'], 'x')
+
+    def test_compiled_path_is_cached(self):
+        self.assertIs(dictionary_utils.compile_path(['handlers', 'console']),
+                      dictionary_utils.compile_path(('handlers', 'console')))
+
+
+class TestPatch(unittest.TestCase):
+
+    def test_patch_dictionary(self):
+        dictionary = sample_dictionary()
+        dictionary_utils.patch_dictionary(dictionary,
+                                          {('handlers', 'console', 'level'): 'DEBUG',
+                                           ('loggers', 1, 'name'): 'spawner'})
+        self.assertEqual(dictionary['handlers']['console']['level'], 'DEBUG')
+        self.assertEqual(dictionary['loggers'][1]['name'], 'spawner')
+
+    def test_nested_updates_are_rejected(self):
+        with self.assertRaises(KeyError):
+            dictionary_utils.patch_dictionary(sample_dictionary(),
+                                              {('handlers', 'console'): {},
+                                               ('handlers', 'console', 'level'): 'DEBUG'})
+
+    def test_patched_copy_shares_the_untouched_parts(self):
+        dictionary = sample_dictionary()
+        variant = dictionary_utils.patched_copy(
+            dictionary, {('handlers', 'info_file', 'filename'): 'action_004.log'})
+        self.assertEqual(dictionary['handlers']['info_file']['filename'], 'default_logs.log')
+        self.assertEqual(variant['handlers']['info_file']['filename'], 'action_004.log')
+        self.assertIs(variant['handlers']['console'], dictionary['handlers']['console'])
+        self.assertIs(variant['loggers'], dictionary['loggers'])
+
+
+class TestDictionaryOverlay(unittest.TestCase):
+
+    def test_overlay(self):
+        dictionary = sample_dictionary()
+        overlay = DictionaryOverlay(dictionary,
+                                    {('handlers', 'info_file', 'filename'): 'action_004.log'})
+        self.assertEqual(dictionary_utils.get_from_dictionary(
+            overlay, ['handlers', 'info_file', 'filename']), 'action_004.log')
+        self.assertEqual(overlay['handlers']['console'], dictionary['handlers']['console'])
+        self.assertEqual(len(overlay), len(dictionary))
+        self.assertEqual(dictionary['handlers']['info_file']['filename'], 'default_logs.log')
+
+    def test_to_dict(self):
+        overlay = DictionaryOverlay(sample_dictionary(), {('version',): 2})
+        expected = sample_dictionary()
+        expected['version'] = 2
+        self.assertEqual(overlay.to_dict(), expected)
+
+    def test_missing_nested_path_is_rejected(self):
+        for updates in ({('handlers', 'missing', 'level'): 'DEBUG'},
+                        {('handlers', 'console', 'missing'): 'DEBUG'}):
+            with self.subTest(updates=updates), self.assertRaises(KeyError):
+                DictionaryOverlay(sample_dictionary(), updates)
+
+
+if __name__ == '__main__':
+    unittest.main()
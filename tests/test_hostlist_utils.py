@@ -0,0 +1,53 @@
+# ------------------------------------------------------------------------------
+#  Copyright 2020 Forschungszentrum Jülich GmbH and Aix-Marseille Université
+# "Licensed to the Apache Software Foundation (ASF) under one or more contributor
+#  license agreements; and to You under the Apache License, Version 2.0. "
+#
+# Forschungszentrum Jülich
+#  Institute: Institute for Advanced Simulation (IAS)
+#    Section: Jülich Supercomputing Centre (JSC)
+#   Division: High Performance Computing in Neuroscience
+# Laboratory: Simulation Laboratory Neuroscience
+#       Team: Multi-scale Simulation and Design
+#
+# ------------------------------------------------------------------------------
+import unittest
+
+from EBRAINS_Launcher.common.utils import hostlist_utils
+
+
+class TestExpandNodelist(unittest.TestCase):
+
+    def test_single_host(self):
+        self.assertEqual(hostlist_utils.expand_nodelist('jsfc056'), ['jsfc056'])
+
+    def test_ranges_keep_the_zero_padding(self):
+        self.assertEqual(hostlist_utils.expand_nodelist('jsfc[056-058,060],login01'),
+                         ['jsfc056', 'jsfc057', 'jsfc058', 'jsfc060', 'login01'])
+
+    def test_suffix(self):
+        self.assertEqual(hostlist_utils.expand_nodelist('node[1-2]-ib'),
+                         ['node1-ib', 'node2-ib'])
+
+    def test_empty(self):
+        self.assertEqual(hostlist_utils.expand_nodelist(''), [])
+
+
+class TestCompressNodelist(unittest.TestCase):
+
+    def test_ranges(self):
+        self.assertEqual(hostlist_utils.compress_nodelist(
+            ['jsfc056', 'jsfc057', 'jsfc058', 'jsfc060']), 'jsfc[056-058,060]')
+
+    def test_single_and_unnumbered_hosts(self):
+        self.assertEqual(hostlist_utils.compress_nodelist(['jsfc056', 'login']),
+                         'jsfc056,login')
+
+    def test_round_trip(self):
+        nodelist = 'jsfc[001-004,010],jrc[0100-0101]'
+        self.assertEqual(hostlist_utils.compress_nodelist(
+            hostlist_utils.expand_nodelist(nodelist)), nodelist)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+# ------------------------------------------------------------------------------
+#  Copyright 2020 Forschungszentrum Jülich GmbH and Aix-Marseille Université
+# "Licensed to the Apache Software Foundation (ASF) under one or more contributor
+#  license agreements; and to You under the Apache License, Version 2.0. "
+#
+# Forschungszentrum Jülich
+#  Institute: Institute for Advanced Simulation (IAS)
+#    Section: Jülich Supercomputing Centre (JSC)
+#   Division: High Performance Computing in Neuroscience
+# Laboratory: Simulation Laboratory Neuroscience
+#       Team: Multi-scale Simulation and Design
+#
+# ------------------------------------------------------------------------------
+import os
+import logging
+import tempfile
+import unittest
+from unittest import mock
+
+from EBRAINS_Launcher.common.job_queue import JobQueue, JobScheduler, JobState
+
+
+class TestJobQueue(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.database_file = os.path.join(directory.name, 'jobs.sqlite')
+        self.job_queue = JobQueue(self.database_file)
+        self.addCleanup(self.job_queue.close)
+
+    def test_submit(self):
+        job_id = self.job_queue.submit('/path/to/plan.xml', priority=2, nodes=3, user='alice')
+        job = self.job_queue.get(job_id)
+        self.assertEqual((job['action_plan'], job['priority'], job['nodes'], job['user']),
+                         ('/path/to/plan.xml', 2, 3, 'alice'))
+        self.assertEqual(job['state'], JobState.QUEUED.value)
+        self.assertNotIn('queue_wait', job)
+        self.assertIsNone(self.job_queue.get(job_id + 1))
+
+    def test_queued_jobs_by_priority_then_submission(self):
+        first = self.job_queue.submit('first.xml')
+        urgent = self.job_queue.submit('urgent.xml', priority=5)
+        second = self.job_queue.submit('second.xml')
+        self.assertEqual([job['job_id'] for job in self.job_queue.queued_jobs()],
+                         [urgent, first, second])
+
+    def test_lifecycle(self):
+        job_id = self.job_queue.submit('plan.xml')
+        self.assertTrue(self.job_queue.start(job_id, 'node[01-02]', '/tmp/output'))
+        job = self.job_queue.get(job_id)
+        self.assertEqual(job['state'], JobState.RUNNING.value)
+        self.assertEqual(job['nodelist'], 'node[01-02]')
+        self.assertGreaterEqual(job['queue_wait'], 0)
+        # a running job is neither started nor cancelled as if it were queued
+        self.assertFalse(self.job_queue.start(job_id, None, '/tmp/output'))
+        self.assertFalse(self.job_queue.cancel_queued(job_id))
+        self.assertTrue(self.job_queue.finish(job_id, JobState.FINISHED, return_code='OK'))
+        job = self.job_queue.get(job_id)
+        self.assertEqual((job['state'], job['return_code']), (JobState.FINISHED.value, 'OK'))
+        self.assertFalse(self.job_queue.finish(job_id, JobState.FAILED))
+
+    def test_cancelled_job_is_not_started(self):
+        job_id = self.job_queue.submit('plan.xml')
+        self.assertTrue(self.job_queue.cancel_queued(job_id))
+        self.assertFalse(self.job_queue.start(job_id, None, '/tmp/output'))
+        self.assertEqual(self.job_queue.get(job_id)['state'], JobState.CANCELLED.value)
+
+    def test_jobs_and_counts(self):
+        queued = self.job_queue.submit('queued.xml')
+        cancelled = self.job_queue.submit('cancelled.xml')
+        self.job_queue.cancel_queued(cancelled)
+        self.assertEqual([job['job_id'] for job in self.job_queue.jobs()], [cancelled, queued])
+        self.assertEqual([job['job_id'] for job in self.job_queue.jobs(state='queued')],
+                         [queued])
+        self.assertEqual([job['job_id'] for job in self.job_queue.jobs(limit=1)], [cancelled])
+        counts = self.job_queue.counts()
+        self.assertEqual((counts[JobState.QUEUED], counts[JobState.CANCELLED],
+                          counts[JobState.RUNNING]), (1, 1, 0))
+        with self.assertRaises(ValueError):
+            self.job_queue.jobs(state='unknown')
+
+    def test_interrupted_jobs_are_failed_when_reopened(self):
+        job_id = self.job_queue.submit('plan.xml')
+        self.job_queue.start(job_id, None, '/tmp/output')
+        self.job_queue.close()
+        self.job_queue = JobQueue(self.database_file)
+        job = self.job_queue.get(job_id)
+        self.assertEqual(job['state'], JobState.FAILED.value)
+        self.assertIn('interrupted', job['error'])
+
+
+class TestJobScheduler(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.job_queue = JobQueue(os.path.join(directory.name, 'jobs.sqlite'))
+        self.addCleanup(self.job_queue.close)
+        self.logger = logging.getLogger(__name__)
+
+    def __scheduler(self, **kwargs):
+        # NOTE not started, i.e. the submitted jobs stay queued
+        scheduler = JobScheduler(self.job_queue, '/path/to/global_settings.xml',
+                                 self.logger, **kwargs)
+        self.addCleanup(scheduler.stop)
+        return scheduler
+
+    def test_submit_and_cancel(self):
+        with mock.patch.dict(os.environ):
+            os.environ.pop('SLURM_NODELIST', None)
+            scheduler = self.__scheduler(max_running_jobs=2)
+        self.assertEqual(scheduler.max_nodes, 2)
+        job_id = scheduler.submit('plan.xml', priority=1, nodes=2, user='alice')
+        self.assertEqual(self.job_queue.get(job_id)['state'], JobState.QUEUED.value)
+        self.assertEqual(scheduler.cancel(job_id)['state'], JobState.CANCELLED.value)
+        self.assertIsNone(scheduler.cancel(job_id + 1))
+        metrics = scheduler.get_metrics()
+        self.assertIn('cosim_jobs_total{state="cancelled"} 1', metrics)
+        self.assertIn('cosim_jobs_queued 0', metrics)
+        self.assertIn('cosim_job_nodes_free 2', metrics)
+
+    def test_too_many_nodes(self):
+        with mock.patch.dict(os.environ):
+            os.environ.pop('SLURM_NODELIST', None)
+            scheduler = self.__scheduler(max_nodes=2)
+        for nodes in (0, 3):
+            with self.assertRaises(ValueError):
+                scheduler.submit('plan.xml', nodes=nodes)
+        self.assertEqual(self.job_queue.queued_jobs(), [])
+
+    def test_nodes_of_the_allocation(self):
+        with mock.patch.dict(os.environ, {'SLURM_NODELIST': 'node[01-03]'}):
+            self.assertEqual(self.__scheduler().max_nodes, 3)
+            self.assertEqual(self.__scheduler(max_nodes=2).max_nodes, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
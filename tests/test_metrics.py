@@ -0,0 +1,118 @@
+# ------------------------------------------------------------------------------
+#  Copyright 2020 Forschungszentrum Jülich GmbH and Aix-Marseille Université
+# "Licensed to the Apache Software Foundation (ASF) under one or more contributor
+#  license agreements; and to You under the Apache License, Version 2.0. "
+#
+# Forschungszentrum Jülich
+#  Institute: Institute for Advanced Simulation (IAS)
+#    Section: Jülich Supercomputing Centre (JSC)
+#   Division: High Performance Computing in Neuroscience
+# Laboratory: Simulation Laboratory Neuroscience
+#       Team: Multi-scale Simulation and Design
+#
+# ------------------------------------------------------------------------------
+import unittest
+import urllib.error
+import urllib.request
+
+from EBRAINS_Launcher.common import metrics
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = metrics.MetricsRegistry()
+
+    def test_counter(self):
+        counter = self.registry.counter('cosim_test_total', 'test counter')
+        counter.inc()
+        counter.inc(2)
+        self.assertEqual(counter.value, 3)
+        self.assertIn('cosim_test_total 3', self.registry.render())
+
+    def test_counter_folds_many_increments(self):
+        counter = self.registry.counter('cosim_test_total', 'test counter')
+        for _ in range(3 * metrics._MAX_PENDING):
+            counter.inc()
+        self.assertEqual(counter.value, 3 * metrics._MAX_PENDING)
+
+    def test_labeled_counter(self):
+        counter = self.registry.counter('cosim_test_total', 'test counter')
+        counter.labels(code='OK').inc()
+        counter.labels(code='OK').inc()
+        counter.labels(code='NOT_OK').inc()
+        rendered = self.registry.render()
+        self.assertIn('cosim_test_total{code="OK"} 2', rendered)
+        self.assertIn('cosim_test_total{code="NOT_OK"} 1', rendered)
+        # the unlabeled parent is not rendered
+        self.assertNotIn('cosim_test_total 0', rendered)
+
+    def test_registering_twice_returns_the_same_metric(self):
+        self.assertIs(self.registry.counter('cosim_test_total', 'test counter'),
+                      self.registry.counter('cosim_test_total', 'test counter'))
+
+    def test_gauge(self):
+        gauge = self.registry.gauge('cosim_test_gauge', 'test gauge')
+        gauge.set(5)
+        gauge.set(4)
+        self.assertEqual(gauge.value, 4)
+        self.assertIn('# TYPE cosim_test_gauge gauge', self.registry.render())
+        self.assertIn('cosim_test_gauge 4', self.registry.render())
+
+    def test_gauge_function(self):
+        values = iter([1, 2])
+        gauge = self.registry.gauge('cosim_test_gauge', 'test gauge',
+                                    function=lambda: next(values))
+        self.assertEqual(gauge.value, 1)
+        self.assertIn('cosim_test_gauge 2', self.registry.render())
+
+    def test_histogram(self):
+        histogram = self.registry.histogram('cosim_test_seconds', 'test histogram',
+                                            buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 2.0):
+            histogram.observe(value)
+        rendered = self.registry.render()
+        # the buckets are cumulative, the bounds are inclusive
+        self.assertIn('cosim_test_seconds_bucket{le="0.1"} 2', rendered)
+        self.assertIn('cosim_test_seconds_bucket{le="1.0"} 3', rendered)
+        self.assertIn('cosim_test_seconds_bucket{le="+Inf"} 4', rendered)
+        self.assertIn('cosim_test_seconds_sum 2.65', rendered)
+        self.assertIn('cosim_test_seconds_count 4', rendered)
+
+    def test_labeled_histogram_keeps_the_buckets(self):
+        histogram = self.registry.histogram('cosim_test_seconds', 'test histogram',
+                                            buckets=(1.0,))
+        histogram.labels(action='action_002').observe(0.5)
+        rendered = self.registry.render()
+        self.assertIn('cosim_test_seconds_bucket{action="action_002",le="1.0"} 1', rendered)
+        self.assertIn('cosim_test_seconds_count{action="action_002"} 1', rendered)
+
+    def test_resident_set_size(self):
+        self.assertGreater(metrics.resident_set_size(), 0)
+
+
+class TestMetricsServer(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = metrics.MetricsRegistry()
+        self.registry.counter('cosim_test_total', 'test counter').inc()
+        self.server = metrics.MetricsServer(self.registry)
+        self.url = self.server.start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_serves_the_metrics(self):
+        with urllib.request.urlopen(self.url, timeout=5) as response:
+            self.assertEqual(response.status, 200)
+            self.assertIn('cosim_test_total 1', response.read().decode('utf-8'))
+
+    def test_unknown_path(self):
+        with self.assertRaises(urllib.error.HTTPError) as context:
+            urllib.request.urlopen(self.url.replace('/metrics', '/other'), timeout=5)
+        self.assertEqual(context.exception.code, 404)
+        context.exception.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
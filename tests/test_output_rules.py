@@ -0,0 +1,119 @@
+# ------------------------------------------------------------------------------
+#  Copyright 2020 Forschungszentrum Jülich GmbH and Aix-Marseille Université
+# "Licensed to the Apache Software Foundation (ASF) under one or more contributor
+#  license agreements; and to You under the Apache License, Version 2.0. "
+#
+# Forschungszentrum Jülich
+#  Institute: Institute for Advanced Simulation (IAS)
+#    Section: Jülich Supercomputing Centre (JSC)
+#   Division: High Performance Computing in Neuroscience
+# Laboratory: Simulation Laboratory Neuroscience
+#       Team: Multi-scale Simulation and Design
+#
+# ------------------------------------------------------------------------------
+import os
+import json
+import tempfile
+import unittest
+
+from EBRAINS_Launcher.common import output_rules
+from EBRAINS_Launcher.common.output_rules import OutputRuleEngine, Rule, RuleAction
+
+
+def _names(rules):
+    return [rule.name for rule in rules]
+
+
+class TestOutputRuleEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = OutputRuleEngine(output_rules.DEFAULT_RULES)
+
+    def test_no_match(self):
+        self.assertEqual(self.engine.scan('action_002', 'stdout', b'all good\nstill good\n'), [])
+
+    def test_literal(self):
+        self.assertEqual(_names(self.engine.scan('action_002', 'stderr',
+                                                 b'rank 3: Segmentation fault\n')),
+                         ['segmentation_fault'])
+
+    def test_regex(self):
+        self.assertEqual(_names(self.engine.scan('action_002', 'stdout',
+                                                 b'step 12: NaN detected\n')),
+                         ['nan'])
+
+    def test_rule_matches_once_per_action(self):
+        self.assertEqual(_names(self.engine.scan('action_002', 'stdout', b'MPI_ABORT\n')),
+                         ['mpi_abort'])
+        self.assertEqual(self.engine.scan('action_002', 'stdout', b'MPI_ABORT\n'), [])
+        # other actions are matched on their own
+        self.assertEqual(_names(self.engine.scan('action_004', 'stdout', b'MPI_ABORT\n')),
+                         ['mpi_abort'])
+        # until the action is forgotten
+        self.engine.forget('action_002')
+        self.assertEqual(_names(self.engine.scan('action_002', 'stdout', b'MPI_ABORT\n')),
+                         ['mpi_abort'])
+
+    def test_pattern_split_across_chunks(self):
+        self.assertEqual(self.engine.scan('action_002', 'stderr', b'ok\nSegmentation f'), [])
+        self.assertEqual(_names(self.engine.scan('action_002', 'stderr', b'ault\nok\n')),
+                         ['segmentation_fault'])
+
+    def test_pattern_split_across_unterminated_chunks(self):
+        self.assertEqual(self.engine.scan('action_002', 'stderr', b'Segm'), [])
+        self.assertEqual(self.engine.scan('action_002', 'stderr', b'entation '), [])
+        self.assertEqual(_names(self.engine.scan('action_002', 'stderr', b'fault')),
+                         ['segmentation_fault'])
+
+    def test_partial_lines_are_kept_per_stream(self):
+        self.assertEqual(self.engine.scan('action_002', 'stdout', b'MPI_'), [])
+        self.assertEqual(self.engine.scan('action_002', 'stderr', b'ABORT\n'), [])
+
+    def test_overlapping_literals(self):
+        engine = OutputRuleEngine([Rule('abort', 'ABORT'), Rule('mpi_abort', 'MPI_ABORT')])
+        self.assertEqual(sorted(_names(engine.scan('action_002', 'stdout', b'MPI_ABORT\n'))),
+                         ['abort', 'mpi_abort'])
+
+    def test_streams(self):
+        engine = OutputRuleEngine([Rule('error', 'ERROR', streams=['stderr'])])
+        self.assertEqual(engine.scan('action_002', 'stdout', b'ERROR\n'), [])
+        self.assertEqual(_names(engine.scan('action_002', 'stderr', b'ERROR\n')), ['error'])
+
+    def test_no_rules(self):
+        self.assertEqual(OutputRuleEngine([]).scan('action_002', 'stdout', b'MPI_ABORT\n'), [])
+
+    def test_wrong_regex(self):
+        with self.assertRaises(ValueError):
+            OutputRuleEngine([Rule('wrong', '(unbalanced', is_regex=True)])
+
+
+class TestLoadRules(unittest.TestCase):
+
+    def __load(self, entries):
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as json_file:
+            json.dump(entries, json_file)
+        self.addCleanup(os.remove, json_file.name)
+        return output_rules.load_rules(json_file.name)
+
+    def test_load_rules(self):
+        rules = self.__load([{'name': 'mpi_abort', 'pattern': 'MPI_ABORT',
+                              'action': 'abort-plan'},
+                             {'pattern': r'\bNaN\b', 'regex': True, 'streams': ['stderr']}])
+        self.assertEqual(_names(rules), ['mpi_abort', 'rule_1'])
+        self.assertEqual(rules[0].action, RuleAction.ABORT_PLAN)
+        self.assertFalse(rules[0].is_regex)
+        self.assertEqual(rules[1].action, RuleAction.EMIT_EVENT)
+        self.assertTrue(rules[1].is_regex)
+        self.assertEqual(rules[1].streams, ('stderr',))
+
+    def test_missing_pattern(self):
+        with self.assertRaises(ValueError):
+            self.__load([{'name': 'no_pattern'}])
+
+    def test_wrong_action(self):
+        with self.assertRaises(ValueError):
+            self.__load([{'pattern': 'MPI_ABORT', 'action': 'reboot'}])
+
+
+if __name__ == '__main__':
+    unittest.main()
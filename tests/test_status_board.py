@@ -0,0 +1,83 @@
+# ------------------------------------------------------------------------------
+#  Copyright 2020 Forschungszentrum Jülich GmbH and Aix-Marseille Université
+# "Licensed to the Apache Software Foundation (ASF) under one or more contributor
+#  license agreements; and to You under the Apache License, Version 2.0. "
+#
+# Forschungszentrum Jülich
+#  Institute: Institute for Advanced Simulation (IAS)
+#    Section: Jülich Supercomputing Centre (JSC)
+#   Division: High Performance Computing in Neuroscience
+# Laboratory: Simulation Laboratory Neuroscience
+#       Team: Multi-scale Simulation and Design
+#
+# ------------------------------------------------------------------------------
+import os
+import unittest
+from multiprocessing import shared_memory
+
+from EBRAINS_Launcher.common import status_board
+from EBRAINS_Launcher.common.status_board import ActionPhase
+
+
+class TestStatusBoard(unittest.TestCase):
+
+    def setUp(self):
+        self.writer = status_board.StatusBoardWriter(n_slots=3, heartbeat_interval=60)
+        self.reader = status_board.StatusBoardReader(self.writer.name)
+
+    def tearDown(self):
+        self.reader.close()
+        self.writer.close()
+
+    def test_registered_actions_are_pending(self):
+        self.writer.register('action_002')
+        self.writer.register('action_004')
+        self.assertEqual([(action['action_id'], action['phase'], action['exit_code'])
+                          for action in self.reader.snapshot()],
+                         [('action_002', 'PENDING', None), ('action_004', 'PENDING', None)])
+
+    def test_update(self):
+        self.writer.register('action_002')
+        self.writer.update('action_002', ActionPhase.RUNNING, pid=os.getpid())
+        running, = self.reader.snapshot()
+        self.assertEqual(running['phase'], 'RUNNING')
+        self.assertEqual(running['pid'], os.getpid())
+        self.assertGreater(running['start_time'], 0)
+        self.writer.update('action_002', ActionPhase.FAILED, exit_code=3)
+        failed, = self.reader.snapshot()
+        self.assertEqual(failed['phase'], 'FAILED')
+        self.assertEqual(failed['exit_code'], 3)
+        # the start time is kept once running
+        self.assertEqual(failed['start_time'], running['start_time'])
+
+    def test_update_registers_the_action(self):
+        self.writer.update('action_006', ActionPhase.FINISHED, exit_code=0)
+        self.assertEqual([(action['action_id'], action['phase'], action['exit_code'])
+                          for action in self.reader.snapshot()],
+                         [('action_006', 'FINISHED', 0)])
+
+    def test_full_board(self):
+        for index in range(3):
+            self.writer.register(f'action_{index}')
+        with self.assertRaises(IndexError):
+            self.writer.register('action_3')
+
+    def test_long_action_id_is_truncated(self):
+        self.writer.register('a' * 40)
+        self.assertEqual(self.reader.snapshot()[0]['action_id'], 'a' * 32)
+
+
+class TestStatusBoardReader(unittest.TestCase):
+
+    def test_not_a_status_board(self):
+        other = shared_memory.SharedMemory(create=True, size=64)
+        try:
+            with self.assertRaises(ValueError):
+                status_board.StatusBoardReader(other.name)
+        finally:
+            other.close()
+            other.unlink()
+
+
+if __name__ == '__main__':
+    unittest.main()